@@ -3,17 +3,21 @@
 
 import frappe
 
+from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+
 def cancel_all():
 	"""Cancel all submitted attendance records"""
 	frappe.db.auto_commit_on_many_writes = True
-	
+
 	submitted = frappe.get_all('Attendance', filters={'docstatus': 1}, pluck='name')
 	total = len(submitted)
 	cancelled = 0
 	failed = 0
-	
+
 	print(f"Found {total} submitted Attendance records...")
-	
+	progress = JobProgress("Cancel All Attendance", total=total)
+
 	for idx, name in enumerate(submitted, 1):
 		try:
 			doc = frappe.get_doc('Attendance', name)
@@ -24,7 +28,10 @@ def cancel_all():
 				frappe.db.commit()
 		except Exception as e:
 			failed += 1
-	
+			progress.error(f"{name}: {e}")
+		progress.update(processed=idx)
+
+	progress.finish({'cancelled': cancelled, 'failed': failed})
 	frappe.db.commit()
 	print(f"\nDONE: Cancelled={cancelled}, Failed={failed}")
 	return {'cancelled': cancelled, 'failed': failed}
@@ -0,0 +1,325 @@
+# Copyright (c) 2024, Momscode and contributors
+# For license information, please see license.txt
+
+"""
+Bulk creation of Attendance and Attendance Regularization records.
+
+The nightly consolidation creates hundreds of records per day. Instead of running a
+full document lifecycle (insert + submit) for each of them, the rows are validated in
+memory against data fetched once per batch and written with multi-row inserts.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.naming import NamingSeries
+from frappe.utils import cint, getdate, now_datetime
+
+from hamptons.hamptons.dashboard_cache import bump_regularization_generation
+from hamptons.hamptons.dashboard_realtime import publish_regularization_delta
+
+ATTENDANCE_STATUSES = ("Present", "Absent", "On Leave", "Half Day", "Work From Home")
+
+
+def bulk_create_attendance(rows, submit=True):
+	"""
+	Validate and insert a batch of Attendance rows with multi-row inserts.
+
+	Mirrors the validations the Attendance controller runs on insert (status, joining
+	date, future dates, inactive employees, duplicates and the approved leave lookup)
+	using one query per concern for the whole batch.
+
+	Args:
+		rows: List of dicts shaped like the ones passed to frappe.get_doc
+		submit: Write the records as submitted (docstatus 1)
+
+	Returns:
+		dict: {"created": [(row, name), ...], "errors": [(row, message), ...]}
+	"""
+	result = {"created": [], "errors": []}
+	if not rows:
+		return result
+
+	employees = _get_employee_map({r["employee"] for r in rows}, "Attendance")
+	existing = _get_existing_attendance(rows)
+	leave_records = _get_leave_records(rows)
+	today = getdate()
+
+	valid = []
+	for row in rows:
+		employee = employees.get(row["employee"])
+		attendance_date = getdate(row["attendance_date"])
+		key = (row["employee"], attendance_date)
+
+		if not employee:
+			result["errors"].append((row, _("Employee {0} not found").format(row["employee"])))
+			continue
+
+		if row.get("status") not in ATTENDANCE_STATUSES:
+			result["errors"].append((row, _("Invalid attendance status {0}").format(row.get("status"))))
+			continue
+
+		if employee.status == "Inactive":
+			result["errors"].append(
+				(row, _("Cannot mark attendance for an Inactive employee {0}").format(row["employee"]))
+			)
+			continue
+
+		if attendance_date > today and row["status"] not in ("On Leave", "Half Day"):
+			result["errors"].append(
+				(row, _("Attendance can not be marked for future dates: {0}").format(attendance_date))
+			)
+			continue
+
+		if employee.date_of_joining and attendance_date < getdate(employee.date_of_joining):
+			result["errors"].append(
+				(
+					row,
+					_("Attendance date {0} can not be less than employee {1}'s joining date").format(
+						attendance_date, row["employee"]
+					),
+				)
+			)
+			continue
+
+		if key in existing:
+			result["errors"].append(
+				(
+					row,
+					_("Attendance for employee {0} is already marked for the date {1}: {2}").format(
+						row["employee"], attendance_date, existing[key]
+					),
+				)
+			)
+			continue
+
+		doc = frappe.new_doc("Attendance")
+		doc.update(row)
+		doc.attendance_date = attendance_date
+		_apply_leave_record(doc, leave_records.get(key))
+		_apply_fetch_from(doc, "employee", employee)
+
+		existing[key] = True
+		valid.append((row, doc))
+
+	names = _insert_documents("Attendance", [doc for _row, doc in valid], docstatus=1 if submit else 0)
+	result["created"] = [(row, name) for (row, _doc), name in zip(valid, names, strict=True)]
+	return result
+
+
+def bulk_create_regularizations(rows):
+	"""
+	Validate and insert a batch of draft Attendance Regularization rows, including their
+	Attendance Regularization Item children, with multi-row inserts.
+
+	Args:
+		rows: List of dicts shaped like the ones passed to frappe.get_doc, with the child
+			rows under "attendance_regularization_item"
+
+	Returns:
+		dict: {"created": [(row, name), ...], "errors": [(row, message), ...]}
+	"""
+	result = {"created": [], "errors": []}
+	if not rows:
+		return result
+
+	employees = _get_employee_map({r["employee"] for r in rows}, "Attendance Regularization")
+	shifts = _get_shift_map({r["shift"] for r in rows if r.get("shift")})
+
+	valid = []
+	for row in rows:
+		employee = employees.get(row["employee"])
+		if not employee:
+			result["errors"].append((row, _("Employee {0} not found").format(row["employee"])))
+			continue
+
+		if not row.get("posting_date"):
+			result["errors"].append((row, _("Posting Date is required")))
+			continue
+
+		doc = frappe.new_doc("Attendance Regularization")
+		doc.update(row)
+		doc.posting_date = getdate(row["posting_date"])
+		_apply_fetch_from(doc, "employee", employee)
+		if doc.shift:
+			_apply_fetch_from(doc, "shift", shifts.get(doc.shift) or {})
+
+		valid.append((row, doc))
+
+	names = _insert_documents("Attendance Regularization", [doc for _row, doc in valid], docstatus=0)
+	result["created"] = [(row, name) for (row, _doc), name in zip(valid, names, strict=True)]
+
+	# Multi-row inserts skip the hooks that invalidate the dashboard caches and notify
+	# open dashboards
+	for month in {doc.posting_date.replace(day=1) for _row, doc in valid}:
+		bump_regularization_generation(month)
+	publish_regularization_delta([doc for _row, doc in valid])
+
+	return result
+
+
+def _insert_documents(doctype, docs, docstatus):
+	"""
+	Name the documents from their naming series in one counter update and write parent
+	and child rows with frappe.db.bulk_insert.
+
+	Returns:
+		list: Names assigned to the documents, in order
+	"""
+	if not docs:
+		return []
+
+	now = now_datetime()
+	user = frappe.session.user
+	names = _reserve_names(docs[0].naming_series or _get_default_series(doctype), len(docs))
+
+	parent_rows = []
+	child_rows = {}
+	for doc, name in zip(docs, names, strict=True):
+		doc.name = name
+		doc.docstatus = docstatus
+		doc.owner = doc.modified_by = user
+		doc.creation = doc.modified = now
+
+		for idx, child in enumerate(doc.get_all_children(), start=1):
+			child.name = frappe.generate_hash(length=10)
+			child.parent = name
+			child.parenttype = doctype
+			child.docstatus = docstatus
+			child.owner = child.modified_by = user
+			child.creation = child.modified = now
+			child.idx = child.idx or idx
+			child_rows.setdefault(child.doctype, []).append(child.get_valid_dict(convert_dates_to_str=True))
+
+		parent_rows.append(doc.get_valid_dict(convert_dates_to_str=True))
+
+	_bulk_insert_dicts(doctype, parent_rows)
+	for child_doctype, rows in child_rows.items():
+		_bulk_insert_dicts(child_doctype, rows)
+
+	return names
+
+
+def _bulk_insert_dicts(doctype, rows):
+	fields = list(rows[0].keys())
+	frappe.db.bulk_insert(doctype, fields, [tuple(r.get(f) for f in fields) for r in rows])
+
+
+def _reserve_names(naming_series, count):
+	"""Reserve `count` consecutive names from a naming series with a single counter update"""
+	series = NamingSeries(naming_series)
+	prefix = series.get_prefix()
+	digits = naming_series.count("#") or 5
+
+	current = frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", (prefix,))
+	start = cint(current[0][0]) if current else 0
+	series.update_counter(start + count)
+
+	return [f"{prefix}{str(start + i).zfill(digits)}" for i in range(1, count + 1)]
+
+
+def _get_default_series(doctype):
+	field = frappe.get_meta(doctype).get_field("naming_series")
+	return field.default or (field.options or "").split("\n")[0]
+
+
+def _get_employee_map(employees, doctype):
+	"""Fetch Employee status, joining date and every field `doctype` fetches from Employee"""
+	fields = {"name", "status", "date_of_joining"}
+	fields.update(_get_fetch_sources(doctype, "employee"))
+
+	return {
+		e.name: e
+		for e in frappe.get_all("Employee", filters={"name": ["in", list(employees)]}, fields=list(fields))
+	}
+
+
+def _get_shift_map(shifts):
+	if not shifts:
+		return {}
+
+	fields = {"name"}
+	fields.update(_get_fetch_sources("Attendance Regularization", "shift"))
+	return {
+		s.name: s
+		for s in frappe.get_all("Shift Type", filters={"name": ["in", list(shifts)]}, fields=list(fields))
+	}
+
+
+def _get_fetch_sources(doctype, link_fieldname):
+	prefix = f"{link_fieldname}."
+	return {
+		df.fetch_from[len(prefix) :]
+		for df in frappe.get_meta(doctype).fields
+		if df.fetch_from and df.fetch_from.startswith(prefix)
+	}
+
+
+def _apply_fetch_from(doc, link_fieldname, source):
+	"""Fill fetch_from fields the way Document._validate_links would on insert"""
+	prefix = f"{link_fieldname}."
+	for df in doc.meta.fields:
+		if not (df.fetch_from and df.fetch_from.startswith(prefix)):
+			continue
+		if df.fetch_if_empty and doc.get(df.fieldname):
+			continue
+		value = source.get(df.fetch_from[len(prefix) :])
+		if value is not None or not df.fetch_if_empty:
+			doc.set(df.fieldname, value)
+
+
+def _get_existing_attendance(rows):
+	employees = list({r["employee"] for r in rows})
+	dates = list({getdate(r["attendance_date"]) for r in rows})
+
+	existing = frappe.get_all(
+		"Attendance",
+		filters={"employee": ["in", employees], "attendance_date": ["in", dates], "docstatus": ["<", 2]},
+		fields=["name", "employee", "attendance_date"],
+	)
+	return {(a.employee, getdate(a.attendance_date)): a.name for a in existing}
+
+
+def _get_leave_records(rows):
+	"""Approved leave applications per (employee, date), as Attendance.check_leave_record reads them"""
+	employees = list({r["employee"] for r in rows})
+	dates = [getdate(r["attendance_date"]) for r in rows]
+
+	leaves = frappe.db.sql(
+		"""
+		SELECT name, employee, leave_type, half_day, half_day_date, from_date, to_date
+		FROM `tabLeave Application`
+		WHERE employee IN %(employees)s
+			AND docstatus = 1
+			AND status = 'Approved'
+			AND from_date <= %(to_date)s
+			AND to_date >= %(from_date)s
+		ORDER BY creation
+	""",
+		{"employees": employees, "from_date": min(dates), "to_date": max(dates)},
+		as_dict=True,
+	)
+
+	records = {}
+	for row in rows:
+		key = (row["employee"], getdate(row["attendance_date"]))
+		records[key] = [
+			la
+			for la in leaves
+			if la.employee == key[0] and getdate(la.from_date) <= key[1] <= getdate(la.to_date)
+		]
+	return records
+
+
+def _apply_leave_record(doc, leave_record):
+	"""Same status/leave_type adjustments as Attendance.check_leave_record"""
+	for la in leave_record or []:
+		doc.leave_type = la.leave_type
+		doc.leave_application = la.name
+		if la.half_day_date and getdate(la.half_day_date) == doc.attendance_date:
+			doc.status = "Half Day"
+		else:
+			doc.status = "On Leave"
+
+	if doc.status not in ("On Leave", "Half Day") and doc.leave_type:
+		doc.leave_type = None
+		doc.leave_application = None
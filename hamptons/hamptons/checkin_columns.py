@@ -0,0 +1,292 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""
+Columnar in-memory cache of recent checkins for the analytics page.
+
+Each worker keeps, per site, the checkins of the last few months as compact NumPy
+arrays (employee, epoch seconds, log type, device and department indexes). The
+arrays are refreshed incrementally from the last cached `creation` and rebuilt when
+the row count of the window no longer matches (deletes, late commits) or when they
+are older than the reload interval, which also picks up department changes.
+
+Refreshes are skipped while the check-in generation counter (bumped by the checkin
+insert and delete hooks) is unchanged; checkins written without hooks are picked up
+by the periodic reload.
+
+The cache is off unless `hamptons_checkin_columnar_cache` is set in site_config.
+NumPy is an optional dependency, imported lazily: sites without it keep the SQL path.
+
+site_config:
+	hamptons_checkin_columnar_cache		1 to enable
+	hamptons_checkin_columnar_months	months kept in memory, default 3
+"""
+
+import importlib.util
+import threading
+import time
+from datetime import datetime
+
+import frappe
+from frappe.utils import add_days, add_months, cint, get_first_day, getdate
+
+from hamptons.hamptons.dashboard_cache import get_generations
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import get_archive_boundary
+from hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics import (
+	make_summary,
+	top_counts,
+)
+
+DEFAULT_MONTHS = 3
+# Full reload interval in seconds; picks up employee department changes
+RELOAD_INTERVAL = 60 * 60
+LOAD_CHUNK_SIZE = 50000
+
+LOG_TYPE_INDEX = {"IN": 1, "OUT": 2}
+LOG_TYPE_NAMES = [None, "IN", "OUT"]
+SECONDS_PER_DAY = 24 * 60 * 60
+EPOCH = datetime(1970, 1, 1)
+
+_stores = {}
+# One lock per site: refreshes of a site are serialized, sites never wait on each other
+_locks = {}
+
+
+def is_enabled():
+	"""Whether the site enabled the cache and NumPy is available"""
+	if not cint(frappe.conf.get("hamptons_checkin_columnar_cache")):
+		return False
+
+	return importlib.util.find_spec("numpy") is not None
+
+
+def get_window_start():
+	months = cint(frappe.conf.get("hamptons_checkin_columnar_months")) or DEFAULT_MONTHS
+	return get_first_day(add_months(getdate(), -(months - 1)))
+
+
+def get_store():
+	"""The refreshed cache of the current site"""
+	site = frappe.local.site
+	window_start = get_window_start()
+
+	with _locks.setdefault(site, threading.Lock()):
+		store = _stores.get(site)
+		if not store or store.window_start != window_start or store.is_expired():
+			store = CheckinColumns(window_start)
+			_stores[site] = store
+		store.refresh()
+
+	return store
+
+
+class CheckinColumns:
+	"""Checkins with time >= window_start as parallel NumPy arrays"""
+
+	def __init__(self, window_start):
+		self.window_start = window_start
+		self.reset()
+
+	def reset(self):
+		import numpy as np
+
+		self.loaded_at = time.monotonic()
+		# Check-in generation the arrays were last refreshed at
+		self.generation = None
+		self.last_creation = datetime(1900, 1, 1)
+		self.last_name = ""
+
+		# Index 0 of devices and departments stands for NULL
+		self.employees, self.employee_index = [], {}
+		self.devices, self.device_index = [None], {}
+		self.departments, self.department_index = [None], {}
+
+		self.employee = np.empty(0, dtype=np.int32)
+		self.epoch = np.empty(0, dtype=np.int64)
+		self.log_type = np.empty(0, dtype=np.int8)
+		self.device = np.empty(0, dtype=np.int16)
+		self.department = np.empty(0, dtype=np.int16)
+
+	def is_expired(self):
+		return time.monotonic() - self.loaded_at > RELOAD_INTERVAL
+
+	def refresh(self):
+		"""Append the checkins created since the last refresh, if any checkin changed"""
+		# Read before loading, so a checkin committed meanwhile triggers the next refresh
+		generation = get_generations(["checkin"])[0]
+		if generation == self.generation:
+			return
+
+		self._load_new()
+
+		count = frappe.db.sql(
+			"SELECT COUNT(*) FROM `tabEmployee Checkin` WHERE time >= %s", (self.window_start,)
+		)[0][0]
+		if count != len(self.epoch):
+			# Rows were deleted or committed with an older creation; start over
+			self.reset()
+			self._load_new()
+
+		self.generation = generation
+
+	def _load_new(self):
+		import numpy as np
+
+		columns = {"employee": [], "epoch": [], "log_type": [], "device": [], "department": []}
+
+		while True:
+			rows = frappe.db.sql(
+				"""
+				SELECT
+					ec.name,
+					ec.creation,
+					ec.employee,
+					TIMESTAMPDIFF(SECOND, '1970-01-01', ec.time) as epoch,
+					ec.log_type,
+					ec.device_id,
+					emp.department
+				FROM `tabEmployee Checkin` ec
+				LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
+				WHERE ec.time >= %(window_start)s
+					AND (ec.creation > %(creation)s OR (ec.creation = %(creation)s AND ec.name > %(name)s))
+				ORDER BY ec.creation, ec.name
+				LIMIT %(limit)s
+			""",
+				{
+					"window_start": self.window_start,
+					"creation": self.last_creation,
+					"name": self.last_name,
+					"limit": LOAD_CHUNK_SIZE,
+				},
+				as_dict=True,
+			)
+
+			for row in rows:
+				columns["employee"].append(self._index(self.employees, self.employee_index, row.employee))
+				columns["epoch"].append(row.epoch)
+				columns["log_type"].append(LOG_TYPE_INDEX.get(row.log_type, 0))
+				columns["device"].append(self._index(self.devices, self.device_index, row.device_id))
+				columns["department"].append(
+					self._index(self.departments, self.department_index, row.department)
+				)
+
+			if rows:
+				self.last_creation, self.last_name = rows[-1].creation, rows[-1].name
+			if len(rows) < LOAD_CHUNK_SIZE:
+				break
+
+		if not columns["epoch"]:
+			return
+
+		self.employee = np.concatenate([self.employee, np.array(columns["employee"], dtype=np.int32)])
+		self.epoch = np.concatenate([self.epoch, np.array(columns["epoch"], dtype=np.int64)])
+		self.log_type = np.concatenate([self.log_type, np.array(columns["log_type"], dtype=np.int8)])
+		self.device = np.concatenate([self.device, np.array(columns["device"], dtype=np.int16)])
+		self.department = np.concatenate([self.department, np.array(columns["department"], dtype=np.int16)])
+
+	@staticmethod
+	def _index(values, index, value):
+		if value is None:
+			return 0
+		if value not in index:
+			index[value] = len(values)
+			values.append(value)
+		return index[value]
+
+
+def to_epoch(date):
+	return int((datetime.combine(getdate(date), datetime.min.time()) - EPOCH).total_seconds())
+
+
+def get_columnar_analytics(from_date, to_date, employee=None, department=None):
+	"""
+	The analytics widgets computed with NumPy group-bys over the cache, in the shape
+	of get_single_pass_analytics.
+
+	Returns:
+		dict: Widget data, or None when the range and previous period are not cached
+	"""
+	import numpy as np
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	days = (to_date - from_date).days + 1
+	prev_from = add_days(from_date, -days)
+	if prev_from < get_window_start():
+		return None
+
+	# The cache only reads the hot table
+	boundary = get_archive_boundary()
+	if boundary and prev_from < boundary:
+		return None
+
+	store = get_store()
+
+	from_ts, to_ts = to_epoch(from_date), to_epoch(add_days(to_date, 1))
+	base = np.ones(len(store.epoch), dtype=bool)
+	if employee:
+		base &= store.employee == store.employee_index.get(employee, -1)
+	if department:
+		base &= store.department == store.department_index.get(department, -1)
+
+	mask = base & (store.epoch >= from_ts) & (store.epoch < to_ts)
+	prev_count = int(np.count_nonzero(base & (store.epoch >= to_epoch(prev_from)) & (store.epoch < from_ts)))
+
+	epoch = store.epoch[mask]
+	employees = store.employee[mask]
+	log_types = store.log_type[mask]
+	devices = store.device[mask]
+	departments = store.department[mask]
+
+	by_day = np.bincount((epoch - from_ts) // SECONDS_PER_DAY, minlength=days)
+	by_hour = np.bincount((epoch % SECONDS_PER_DAY) // 3600, minlength=24)
+	by_type = np.bincount(log_types, minlength=len(LOG_TYPE_NAMES))
+	by_device = np.bincount(devices, minlength=len(store.devices))
+	by_department = np.bincount(departments, minlength=len(store.departments))
+
+	employee_totals = np.bincount(employees, minlength=len(store.employees))
+	check_ins = np.bincount(employees[log_types == 1], minlength=len(store.employees))
+	check_outs = np.bincount(employees[log_types == 2], minlength=len(store.employees))
+
+	device_counts = {store.devices[i]: int(c) for i, c in enumerate(by_device) if i and c}
+
+	top = [i for i in np.argsort(-employee_totals, kind="stable")[:10] if employee_totals[i]]
+	details = (
+		{
+			e.name: e
+			for e in frappe.get_all(
+				"Employee",
+				filters={"name": ["in", [store.employees[i] for i in top]]},
+				fields=["name", "employee_name", "department"],
+			)
+		}
+		if top
+		else {}
+	)
+
+	return {
+		"summary": make_summary(
+			int(len(epoch)), int(np.count_nonzero(employee_totals)), len(device_counts), prev_count, days
+		),
+		"daily_trend": [
+			frappe._dict(date=add_days(from_date, i), count=int(c)) for i, c in enumerate(by_day) if c
+		],
+		"checkin_type": [
+			frappe._dict(log_type=LOG_TYPE_NAMES[i], count=int(c)) for i, c in enumerate(by_type) if c
+		],
+		"hourly_distribution": [frappe._dict(hour=h, count=int(c)) for h, c in enumerate(by_hour) if c],
+		"department_wise": top_counts(
+			{store.departments[i]: int(c) for i, c in enumerate(by_department) if c}, "department"
+		),
+		"top_employees": [
+			frappe._dict(
+				employee=store.employees[i],
+				employee_name=details.get(store.employees[i], {}).get("employee_name"),
+				department=details.get(store.employees[i], {}).get("department"),
+				check_ins=int(check_ins[i]),
+				check_outs=int(check_outs[i]),
+				total=int(employee_totals[i]),
+			)
+			for i in top
+		],
+		"device_usage": top_counts(device_counts, "device_id"),
+	}
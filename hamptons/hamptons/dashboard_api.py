@@ -3,7 +3,10 @@
 
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, get_datetime, getdate, add_days, formatdate, get_time_str
+from frappe.utils import add_days, cint, formatdate, get_datetime, get_time_str, getdate, now_datetime
+
+from hamptons.hamptons.dashboard_cache import get_cached, get_checkin_scopes, get_ttl
+from hamptons.hamptons.query_cost import is_over_limit
 
 
 @frappe.whitelist()
@@ -26,9 +29,30 @@ def get_checkin_dashboard_data(date=None):
 	else:
 		date = getdate(date)
 
+	# The per-date part is invalidated by checkins of that date only (not by the month or
+	# global scopes every punch bumps), the pending queue by any regularization change;
+	# see dashboard_cache
+	data = dict(get_cached(
+		"checkin_dashboard",
+		get_checkin_scopes(date)[:1],
+		lambda: get_checkin_dashboard_day_data(date),
+		ttl=get_ttl(date),
+		key=date
+	))
+	data["pending_regularizations"] = get_cached(
+		"pending_regularizations",
+		["regularization"],
+		get_pending_regularizations
+	)
+
+	return data
+
+
+def get_checkin_dashboard_day_data(date):
+	"""Check-ins, summary, department breakdown and late arrivals of one date"""
 	# Get today's check-ins with employee details
 	checkins_today = frappe.db.sql("""
-		SELECT 
+		SELECT
 			ec.name,
 			ec.employee,
 			ec.employee_name,
@@ -42,8 +66,8 @@ def get_checkin_dashboard_data(date=None):
 			st.end_time
 		FROM `tabEmployee Checkin` ec
 		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		LEFT JOIN `tabShift Assignment` sa ON sa.employee = ec.employee 
-			AND sa.docstatus = 1 
+		LEFT JOIN `tabShift Assignment` sa ON sa.employee = ec.employee
+			AND sa.docstatus = 1
 			AND sa.start_date <= DATE(ec.time)
 			AND (sa.end_date IS NULL OR sa.end_date >= DATE(ec.time))
 		LEFT JOIN `tabShift Type` st ON st.name = sa.shift_type
@@ -51,10 +75,10 @@ def get_checkin_dashboard_data(date=None):
 		ORDER BY ec.time DESC
 		LIMIT 50
 	""", (date,), as_dict=1)
-	
+
 	# Get summary stats
 	summary = frappe.db.sql("""
-		SELECT 
+		SELECT
 			COUNT(DISTINCT employee) as total_employees,
 			COUNT(*) as total_checkins,
 			SUM(CASE WHEN log_type = 'IN' THEN 1 ELSE 0 END) as total_in,
@@ -62,10 +86,10 @@ def get_checkin_dashboard_data(date=None):
 		FROM `tabEmployee Checkin`
 		WHERE DATE(time) = %s
 	""", (date,), as_dict=1)[0]
-	
+
 	# Get department-wise breakdown
 	dept_breakdown = frappe.db.sql("""
-		SELECT 
+		SELECT
 			emp.department,
 			COUNT(DISTINCT ec.employee) as employee_count,
 			COUNT(*) as checkin_count
@@ -75,26 +99,10 @@ def get_checkin_dashboard_data(date=None):
 		GROUP BY emp.department
 		ORDER BY checkin_count DESC
 	""", (date,), as_dict=1)
-	
-	# Get pending regularizations
-	pending_regularizations = frappe.db.sql("""
-		SELECT 
-			name,
-			employee,
-			employee_name,
-			posting_date,
-			late,
-			status,
-			shift
-		FROM `tabAttendance Regularization`
-		WHERE status = 'Open'
-		ORDER BY posting_date DESC, late DESC
-		LIMIT 10
-	""", as_dict=1)
-	
+
 	# Get late arrivals today
 	late_arrivals = frappe.db.sql("""
-		SELECT 
+		SELECT
 			ec.employee,
 			ec.employee_name,
 			emp.department,
@@ -103,8 +111,8 @@ def get_checkin_dashboard_data(date=None):
 			TIMEDIFF(TIME(ec.time), st.start_time) as late_by
 		FROM `tabEmployee Checkin` ec
 		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		INNER JOIN `tabShift Assignment` sa ON sa.employee = ec.employee 
-			AND sa.docstatus = 1 
+		INNER JOIN `tabShift Assignment` sa ON sa.employee = ec.employee
+			AND sa.docstatus = 1
 			AND sa.start_date <= DATE(ec.time)
 			AND (sa.end_date IS NULL OR sa.end_date >= DATE(ec.time))
 		INNER JOIN `tabShift Type` st ON st.name = sa.shift_type
@@ -114,12 +122,12 @@ def get_checkin_dashboard_data(date=None):
 		ORDER BY late_by DESC
 		LIMIT 10
 	""", (date,), as_dict=1)
-	
+
 	# Format the data
 	for checkin in checkins_today:
 		checkin['time_formatted'] = formatdate(checkin['time'], "dd MMM yyyy hh:mm a")
 		checkin['time_only'] = get_time_str(checkin['time'])
-		
+
 		# Calculate if late/early
 		if checkin.get('start_time') and checkin.get('log_type') == 'IN':
 			checkin_time = get_datetime(checkin['time']).time()
@@ -129,18 +137,35 @@ def get_checkin_dashboard_data(date=None):
 				minutes = int((diff.total_seconds() % 3600) // 60)
 				checkin['late_by'] = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
 				checkin['is_late'] = True
-	
+
 	return {
 		"date": date,
 		"date_formatted": formatdate(date, "dd MMM yyyy"),
 		"summary": summary,
 		"checkins_today": checkins_today,
 		"dept_breakdown": dept_breakdown,
-		"pending_regularizations": pending_regularizations,
 		"late_arrivals": late_arrivals
 	}
 
 
+def get_pending_regularizations():
+	"""Most recent pending regularizations for the dashboard queue"""
+	return frappe.db.sql("""
+		SELECT
+			name,
+			employee,
+			employee_name,
+			posting_date,
+			late,
+			status,
+			shift
+		FROM `tabAttendance Regularization`
+		WHERE status = 'Open'
+		ORDER BY posting_date DESC, late DESC
+		LIMIT 10
+	""", as_dict=1)
+
+
 @frappe.whitelist()
 def get_employee_checkin_details(employee, from_date=None, to_date=None):
 	"""
@@ -162,20 +187,20 @@ def get_employee_checkin_details(employee, from_date=None, to_date=None):
 		from_date = add_days(getdate(), -7)
 	else:
 		from_date = getdate(from_date)
-	
+
 	if not to_date:
 		to_date = getdate()
 	else:
 		to_date = getdate(to_date)
-	
+
 	# Get employee info
-	employee_info = frappe.db.get_value("Employee", employee, 
-		["employee_name", "department", "designation", "attendance_device_id"], 
+	employee_info = frappe.db.get_value("Employee", employee,
+		["employee_name", "department", "designation", "attendance_device_id"],
 		as_dict=1)
-	
+
 	# Get check-ins
 	checkins = frappe.db.sql("""
-		SELECT 
+		SELECT
 			ec.name,
 			ec.time,
 			ec.log_type,
@@ -185,13 +210,13 @@ def get_employee_checkin_details(employee, from_date=None, to_date=None):
 			ar.name as regularization,
 			ar.status as regularization_status
 		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = ec.employee 
+		LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = ec.employee
 			AND ar.posting_date = DATE(ec.time)
 		WHERE ec.employee = %s
 			AND DATE(ec.time) BETWEEN %s AND %s
 		ORDER BY ec.time DESC
 	""", (employee, from_date, to_date), as_dict=1)
-	
+
 	# Group by date
 	checkins_by_date = {}
 	for checkin in checkins:
@@ -212,7 +237,7 @@ def get_employee_checkin_details(employee, from_date=None, to_date=None):
 			'regularization': checkin['regularization'],
 			'regularization_status': checkin['regularization_status']
 		})
-	
+
 	return {
 		"employee": employee,
 		"employee_info": employee_info,
@@ -222,15 +247,118 @@ def get_employee_checkin_details(employee, from_date=None, to_date=None):
 	}
 
 
+@frappe.whitelist()
+def get_employee_checkin_history(employee, from_date=None, to_date=None, cursor=None, page_length=100):
+	"""
+	Page through the check-ins of an employee, newest first.
+
+	Pages are cut on (time, name) keysets instead of offsets, with range predicates on
+	time so the (employee, time) index serves both the filter and the order. The
+	regularizations of the days on the page are read with a separate query on
+	(employee, posting_date).
+
+	Args:
+		employee: Employee ID
+		from_date: Start date (defaults to 7 days ago)
+		to_date: End date (defaults to today)
+		cursor: "next_cursor" of the previous page; empty for the first page
+		page_length: Check-ins per page
+
+	Returns:
+		Dictionary with the page grouped by date and the cursor of the next page (None
+		on the last page). A day can continue on the next page.
+	"""
+	if not frappe.db.exists("DocType", "Attendance Regularization"):
+		frappe.throw(_("Attendance Regularization DocType is not installed on this site"))
+
+	frappe.has_permission("Employee Checkin", "read", throw=True)
+
+	from_date = getdate(from_date) if from_date else add_days(getdate(), -7)
+	to_date = getdate(to_date) if to_date else getdate()
+	page_length = min(max(cint(page_length), 1), 500)
+
+	conditions = ["ec.employee = %(employee)s", "ec.time >= %(from_date)s", "ec.time < %(to_date)s"]
+	values = {
+		"employee": employee,
+		"from_date": from_date,
+		"to_date": add_days(to_date, 1),
+		"limit": page_length + 1
+	}
+
+	if cursor:
+		cursor = frappe.parse_json(cursor)
+		conditions.append("(ec.time < %(cursor_time)s OR (ec.time = %(cursor_time)s AND ec.name < %(cursor_name)s))")
+		values.update({"cursor_time": get_datetime(cursor["time"]), "cursor_name": cursor["name"]})
+
+	checkins = frappe.db.sql(f"""
+		SELECT
+			ec.name,
+			ec.time,
+			ec.log_type,
+			ec.device_id,
+			ec.shift
+		FROM `tabEmployee Checkin` ec
+		WHERE {" AND ".join(conditions)}
+		ORDER BY ec.time DESC, ec.name DESC
+		LIMIT %(limit)s
+	""", values, as_dict=1)
+
+	next_cursor = None
+	if len(checkins) > page_length:
+		checkins = checkins[:page_length]
+		next_cursor = {"time": str(checkins[-1].time), "name": checkins[-1].name}
+
+	dates = sorted({getdate(c.time) for c in checkins})
+	regularizations = {}
+	if dates:
+		for reg in frappe.db.sql("""
+			SELECT name, status, posting_date
+			FROM `tabAttendance Regularization`
+			WHERE employee = %(employee)s AND posting_date IN %(dates)s
+			ORDER BY modified
+		""", {"employee": employee, "dates": dates}, as_dict=1):
+			# The most recently modified regularization of a day wins
+			regularizations[getdate(reg.posting_date)] = reg
+
+	days = []
+	for checkin in checkins:
+		date = getdate(checkin.time)
+		if not days or days[-1]["date"] != date:
+			days.append({
+				"date": date,
+				"date_formatted": formatdate(date, "dd MMM yyyy"),
+				"checkins": []
+			})
+		reg = regularizations.get(date) or {}
+		days[-1]["checkins"].append({
+			"name": checkin.name,
+			"time": checkin.time,
+			"time_formatted": get_time_str(checkin.time),
+			"log_type": checkin.log_type,
+			"device_id": checkin.device_id,
+			"shift": checkin.shift,
+			"regularization": reg.get("name"),
+			"regularization_status": reg.get("status")
+		})
+
+	return {
+		"employee": employee,
+		"from_date": from_date,
+		"to_date": to_date,
+		"checkins_by_date": days,
+		"next_cursor": next_cursor
+	}
+
+
 @frappe.whitelist()
 def get_device_usage_stats(from_date=None, to_date=None):
 	"""
 	Get statistics on device/location usage for check-ins
-	
+
 	Args:
 		from_date: Start date (defaults to today)
 		to_date: End date (defaults to today)
-	
+
 	Returns:
 		List of device usage statistics
 	"""
@@ -238,24 +366,65 @@ def get_device_usage_stats(from_date=None, to_date=None):
 		from_date = getdate()
 	else:
 		from_date = getdate(from_date)
-	
+
 	if not to_date:
 		to_date = getdate()
 	else:
 		to_date = getdate(to_date)
-	
+
+	# Above the row limit the stats are read from the hourly rollup instead
+	if frappe.db.exists("DocType", "Employee Checkin Rollup") and is_over_limit(from_date, to_date):
+		return get_rollup_device_usage_stats(from_date, to_date)
+
 	device_stats = frappe.db.sql("""
-		SELECT 
+		SELECT
 			device_id,
 			COUNT(*) as total_checkins,
 			COUNT(DISTINCT employee) as unique_employees,
 			SUM(CASE WHEN log_type = 'IN' THEN 1 ELSE 0 END) as check_ins,
 			SUM(CASE WHEN log_type = 'OUT' THEN 1 ELSE 0 END) as check_outs
 		FROM `tabEmployee Checkin`
-		WHERE DATE(time) BETWEEN %s AND %s
+		WHERE time >= %s AND time < %s
 			AND device_id IS NOT NULL
 		GROUP BY device_id
 		ORDER BY total_checkins DESC
-	""", (from_date, to_date), as_dict=1)
-	
+	""", (from_date, add_days(to_date, 1)), as_dict=1)
+
 	return device_stats
+
+
+def get_rollup_device_usage_stats(from_date, to_date):
+	"""
+	Device usage statistics from the Employee Checkin Rollup, in the shape of
+	get_device_usage_stats. Unique employees are the union of the bucket employee sets.
+	"""
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		get_employee_set,
+		get_rollup_rows,
+	)
+
+	devices = {}
+	for row in get_rollup_rows(from_date, to_date):
+		if row.device_id is None:
+			continue
+
+		if row.device_id not in devices:
+			devices[row.device_id] = frappe._dict(
+				device_id=row.device_id,
+				total_checkins=0,
+				employees=set(),
+				check_ins=0,
+				check_outs=0
+			)
+		stats = devices[row.device_id]
+		stats.total_checkins += row.checkin_count
+		stats.employees |= get_employee_set(row)
+		if row.log_type == 'IN':
+			stats.check_ins += row.checkin_count
+		elif row.log_type == 'OUT':
+			stats.check_outs += row.checkin_count
+
+	for stats in devices.values():
+		stats.unique_employees = len(stats.pop('employees'))
+
+	return sorted(devices.values(), key=lambda d: d.total_checkins, reverse=True)
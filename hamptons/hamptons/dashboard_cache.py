@@ -0,0 +1,94 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""
+Generation based caching for the check-in dashboards.
+
+Every cached value is keyed by the generation counters of the data it was built from.
+Writers bump the counters of what they changed (once their transaction commits);
+readers then address a new key and rebuild. Old entries are never deleted, they are
+simply no longer read and expire with their TTL.
+
+Scopes:
+	checkin:{YYYY-MM-DD}		checkins of one day
+	checkin:{YYYY-MM}			checkins of one month
+	checkin						any checkin
+	regularization:{YYYY-MM}	regularizations posted in one month
+	regularization				any regularization
+"""
+
+import frappe
+from frappe.utils import cint, getdate
+
+# Past dates only change on backfills, which bump their generation anyway
+PAST_DATE_TTL = 7 * 24 * 60 * 60
+# Safety net for data the counters do not track (shift assignments, employee details)
+CURRENT_DATE_TTL = 5 * 60
+
+
+def get_checkin_scopes(date):
+	date = getdate(date)
+	return [f"checkin:{date}", f"checkin:{date.strftime('%Y-%m')}", "checkin"]
+
+
+def get_regularization_scopes(date):
+	return [f"regularization:{getdate(date).strftime('%Y-%m')}", "regularization"]
+
+
+def get_generations(scopes):
+	"""Current generation of each scope, 0 for scopes that were never bumped"""
+	cache = frappe.cache()
+	return [cint(cache.get(cache.make_key(f"hamptons:generation:{scope}"))) for scope in scopes]
+
+
+def bump_generations(scopes):
+	cache = frappe.cache()
+	for scope in scopes:
+		cache.incr(cache.make_key(f"hamptons:generation:{scope}"))
+
+
+def bump_after_commit(scopes):
+	"""Bump once the current transaction commits, so readers never cache uncommitted state"""
+	scopes = list(scopes)
+	frappe.db.after_commit.add(lambda: bump_generations(scopes))
+
+
+def bump_checkin_generation(date):
+	bump_after_commit(get_checkin_scopes(date))
+
+
+def bump_regularization_generation(date):
+	bump_after_commit(get_regularization_scopes(date))
+
+
+def get_ttl(date):
+	return PAST_DATE_TTL if getdate(date) < getdate() else CURRENT_DATE_TTL
+
+
+def get_cached(name, scopes, builder, ttl=CURRENT_DATE_TTL, key=None, should_cache=None):
+	"""
+	Return the cached value of `builder()` for the current generations of `scopes`.
+
+	Args:
+		name: Cache namespace
+		scopes: Generation scopes the value depends on
+		builder: Function computing the value on a miss
+		ttl: Expiry in seconds
+		key: Extra key part, e.g. the date or filters the value was built for
+		should_cache: Optional predicate; built values it rejects are returned uncached
+	"""
+	generations = ".".join(str(g) for g in get_generations(scopes))
+	cache_key = f"hamptons:cache:{name}:{key}:{generations}"
+
+	value = frappe.cache().get_value(cache_key)
+	if value is None:
+		value = builder()
+		if should_cache is None or should_cache(value):
+			frappe.cache().set_value(cache_key, value, expires_in_sec=ttl)
+
+	return value
+
+
+def on_regularization_change(doc, method=None):
+	"""Hook for Attendance Regularization on_change and after_delete"""
+	bump_regularization_generation(doc.posting_date or getdate())
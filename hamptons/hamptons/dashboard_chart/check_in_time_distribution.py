@@ -3,7 +3,9 @@
 
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, get_datetime, getdate
+from frappe.utils import get_datetime, getdate, now_datetime
+
+from hamptons.hamptons.dashboard_cache import get_cached, get_checkin_scopes, get_ttl
 
 
 def get_data():
@@ -12,39 +14,52 @@ def get_data():
 	Returns data for bar chart showing check-ins by hour
 	"""
 	today = getdate()
-	
-	# Query to get check-ins grouped by hour for today
+
+	# Shared by every user and render until a checkin of the date bumps its generation
+	return get_cached(
+		"chart:check_in_time_distribution",
+		get_checkin_scopes(today)[:1],
+		lambda: get_chart_data(today),
+		ttl=get_ttl(today),
+		key=today
+	)
+
+
+def get_chart_data(today):
+	"""Check-ins by hour and log type of one date"""
+
+	# Check-ins grouped by hour for today, from the hourly rollup
 	checkins = frappe.db.sql("""
-		SELECT 
-			HOUR(time) as hour,
-			COUNT(*) as count,
+		SELECT
+			hour,
+			SUM(checkin_count) as count,
 			log_type
-		FROM `tabEmployee Checkin`
-		WHERE DATE(time) = %s
-		GROUP BY HOUR(time), log_type
+		FROM `tabEmployee Checkin Rollup`
+		WHERE checkin_date = %s
+		GROUP BY hour, log_type
 		ORDER BY hour, log_type
 	""", (today,), as_dict=1)
-	
+
 	# Prepare data structure for chart
 	hours = list(range(24))
 	in_counts = {h: 0 for h in hours}
 	out_counts = {h: 0 for h in hours}
-	
+
 	for checkin in checkins:
 		hour = checkin.get('hour')
 		count = checkin.get('count', 0)
 		log_type = checkin.get('log_type')
-		
+
 		if log_type == 'IN':
 			in_counts[hour] = count
 		else:
 			out_counts[hour] = count
-	
+
 	# Format labels for working hours (6 AM to 10 PM)
 	labels = [f"{h:02d}:00" for h in range(6, 23)]
 	in_data = [in_counts[h] for h in range(6, 23)]
 	out_data = [out_counts[h] for h in range(6, 23)]
-	
+
 	return {
 		"labels": labels,
 		"datasets": [
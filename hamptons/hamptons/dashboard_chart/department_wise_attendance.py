@@ -5,6 +5,12 @@ import frappe
 from frappe import _
 from frappe.utils import getdate
 
+from hamptons.hamptons.dashboard_cache import get_cached, get_checkin_scopes, get_ttl
+from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+	get_employee_set,
+	get_rollup_rows,
+)
+
 
 def get_data():
 	"""
@@ -12,27 +18,44 @@ def get_data():
 	Returns data for donut chart showing check-ins by department
 	"""
 	today = getdate()
-	
-	# Query to get check-ins grouped by department for today
-	dept_data = frappe.db.sql("""
-		SELECT 
-			COALESCE(emp.department, 'Not Assigned') as department,
-			COUNT(DISTINCT ec.employee) as employee_count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE DATE(ec.time) = %s
-		GROUP BY emp.department
-		ORDER BY employee_count DESC
-	""", (today,), as_dict=1)
-	
+
+	# Shared by every user and render until a checkin of the date bumps its generation
+	return get_cached(
+		"chart:department_wise_attendance",
+		get_checkin_scopes(today)[:1],
+		lambda: get_chart_data(today),
+		ttl=get_ttl(today),
+		key=today
+	)
+
+
+def get_chart_data(today):
+	"""Distinct employees per department of one date"""
+
+	# Distinct employees per department for today: union of the employee sets of the
+	# department's hourly rollup buckets
+	employees_by_department = {}
+	for row in get_rollup_rows(today, today):
+		department = row.department or 'Not Assigned'
+		employees_by_department.setdefault(department, set()).update(get_employee_set(row))
+
+	dept_data = sorted(
+		(
+			{"department": department, "employee_count": len(employees)}
+			for department, employees in employees_by_department.items()
+		),
+		key=lambda d: d["employee_count"],
+		reverse=True
+	)
+
 	# Prepare data structure for chart
 	labels = []
 	values = []
-	
+
 	for dept in dept_data:
 		labels.append(dept['department'] or 'Not Assigned')
 		values.append(dept['employee_count'])
-	
+
 	return {
 		"labels": labels,
 		"datasets": [
@@ -0,0 +1,81 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""
+Realtime deltas for open dashboards.
+
+Ingestion publishes one small event per punch (and per new regularization) after its
+transaction commits. Events go to the doctype room, so only users allowed to read the
+doctype and subscribed to it receive them; the pages apply them client-side instead
+of polling.
+"""
+
+import frappe
+from frappe.utils import get_datetime, getdate
+
+CHECKIN_DELTA_EVENT = "hamptons_checkin_delta"
+REGULARIZATION_DELTA_EVENT = "hamptons_regularization_delta"
+
+
+def publish_checkin_delta(checkin, department=None, first_of_day=None):
+	"""
+	Publish a new punch with the dimensions the dashboards aggregate on.
+
+	Args:
+		checkin: Employee Checkin document
+		department: Department of the employee
+		first_of_day: Whether this is the employee's first punch of the day, if known
+	"""
+	punch_time = get_datetime(checkin.time)
+
+	frappe.publish_realtime(
+		CHECKIN_DELTA_EVENT,
+		{
+			"name": checkin.name,
+			"employee": checkin.employee,
+			"employee_name": checkin.employee_name,
+			"department": department,
+			"date": str(punch_time.date()),
+			"hour": punch_time.hour,
+			"time": str(punch_time),
+			"log_type": checkin.log_type,
+			"device_id": checkin.get("device_id"),
+			"first_of_day": first_of_day,
+		},
+		doctype="Employee Checkin",
+		after_commit=True,
+	)
+
+
+def publish_regularization_delta(regularizations):
+	"""
+	Publish newly created regularizations, one event per batch.
+
+	Args:
+		regularizations: List of dicts with name, employee, employee_name and posting_date
+	"""
+	if not regularizations:
+		return
+
+	frappe.publish_realtime(
+		REGULARIZATION_DELTA_EVENT,
+		{
+			"count": len(regularizations),
+			"regularizations": [
+				{
+					"name": r.get("name"),
+					"employee": r.get("employee"),
+					"employee_name": r.get("employee_name"),
+					"posting_date": str(getdate(r.get("posting_date"))),
+				}
+				for r in regularizations
+			],
+		},
+		doctype="Attendance Regularization",
+		after_commit=True,
+	)
+
+
+def on_regularization_insert(doc, method=None):
+	"""Hook for Attendance Regularization after_insert"""
+	publish_regularization_delta([doc.as_dict()])
@@ -0,0 +1,451 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+from datetime import datetime, timedelta
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, get_datetime, getdate, now_datetime
+
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import (
+	get_archive_boundary,
+	get_checkin_source,
+)
+
+SUMMARY_FIELDS = [
+	"name",
+	"employee",
+	"employee_name",
+	"department",
+	"attendance_date",
+	"shift",
+	"status",
+	"first_in",
+	"first_in_checkin",
+	"last_out",
+	"last_out_checkin",
+	"first_punch",
+	"last_punch",
+	"punch_count",
+	"late_seconds",
+	"early_seconds",
+	"devices",
+]
+
+
+class AttendanceDaySummary(Document):
+	pass
+
+
+def get_summary_name(employee, attendance_date):
+	"""Summary rows are named {employee}-{attendance_date}, one per employee-day"""
+	return f"{employee}-{getdate(attendance_date)}"
+
+
+def update_day_summary(checkin):
+	"""
+	Fold a newly ingested Employee Checkin into its employee-day summary.
+
+	Args:
+		checkin: Employee Checkin document
+
+	Returns:
+		The updated summary dict
+	"""
+	attendance_date = getdate(checkin.time)
+	name = get_summary_name(checkin.employee, attendance_date)
+	now = now_datetime()
+
+	# Create the row if this is the first punch of the day; concurrent punches of the
+	# same employee then serialize on the row lock below
+	frappe.db.sql(
+		"""
+		INSERT IGNORE INTO `tabAttendance Day Summary`
+			(name, employee, attendance_date, status, punch_count, late_seconds, early_seconds,
+			creation, modified, owner, modified_by, docstatus)
+		VALUES (%s, %s, %s, 'Open', 0, 0, 0, %s, %s, %s, %s, 0)
+	""",
+		(name, checkin.employee, attendance_date, now, now, frappe.session.user, frappe.session.user),
+	)
+
+	summary = frappe.db.sql(
+		f"SELECT {', '.join(SUMMARY_FIELDS)} FROM `tabAttendance Day Summary` WHERE name = %s FOR UPDATE",
+		(name,),
+		as_dict=True,
+	)[0]
+
+	if not summary.employee_name:
+		employee = (
+			frappe.db.get_value("Employee", checkin.employee, ["employee_name", "department"], as_dict=True)
+			or {}
+		)
+		summary.employee_name = employee.get("employee_name")
+		summary.department = employee.get("department")
+
+	if not summary.shift:
+		summary.shift = get_shift_type_for_day(checkin.employee, attendance_date)
+
+	merge_checkin(summary, checkin)
+	set_late_and_early(summary, get_shift_timings([summary.shift]).get(summary.shift))
+
+	values = {f: summary.get(f) for f in SUMMARY_FIELDS if f != "name"}
+	frappe.db.set_value("Attendance Day Summary", name, values, update_modified=True)
+
+	return summary
+
+
+def merge_checkin(summary, checkin):
+	"""Add one punch to a summary dict: counts, first/last punch, first IN, last OUT and devices"""
+	punch_time = get_datetime(checkin.time)
+
+	summary.punch_count = cint(summary.punch_count) + 1
+
+	if not summary.first_punch or punch_time < get_datetime(summary.first_punch):
+		summary.first_punch = punch_time
+	if not summary.last_punch or punch_time > get_datetime(summary.last_punch):
+		summary.last_punch = punch_time
+
+	if checkin.log_type == "IN" and (not summary.first_in or punch_time < get_datetime(summary.first_in)):
+		summary.first_in = punch_time
+		summary.first_in_checkin = checkin.name
+
+	if checkin.log_type == "OUT" and (not summary.last_out or punch_time >= get_datetime(summary.last_out)):
+		summary.last_out = punch_time
+		summary.last_out_checkin = checkin.name
+
+	device_id = checkin.get("device_id")
+	if device_id:
+		devices = (summary.devices or "").split("\n") if summary.devices else []
+		if device_id not in devices:
+			devices.append(device_id)
+			summary.devices = "\n".join(devices)
+
+
+def set_late_and_early(summary, shift_type):
+	"""
+	Late seconds are measured from shift start plus the late entry grace period, early
+	seconds up to shift end, matching the consolidation rules.
+	"""
+	from hamptons.overrides.employee_checkin import to_time
+
+	summary.late_seconds = 0
+	summary.early_seconds = 0
+	if not shift_type:
+		return
+
+	attendance_date = getdate(summary.attendance_date)
+
+	if summary.first_in and shift_type.start_time is not None:
+		shift_start = datetime.combine(attendance_date, to_time(shift_type.start_time))
+		shift_start += timedelta(minutes=cint(shift_type.late_entry_grace_period))
+		summary.late_seconds = max(0, int((get_datetime(summary.first_in) - shift_start).total_seconds()))
+
+	if summary.last_out and shift_type.end_time is not None:
+		shift_end = datetime.combine(attendance_date, to_time(shift_type.end_time))
+		summary.early_seconds = max(0, int((shift_end - get_datetime(summary.last_out)).total_seconds()))
+
+
+def get_shift_type_for_day(employee, attendance_date):
+	"""Shift Type of the active Shift Assignment, most recent start date first"""
+	shift_type = frappe.db.sql(
+		"""
+		SELECT shift_type
+		FROM `tabShift Assignment`
+		WHERE employee = %s
+			AND docstatus = 1
+			AND start_date <= %s
+			AND (end_date IS NULL OR end_date >= %s)
+		ORDER BY start_date DESC
+		LIMIT 1
+	""",
+		(employee, attendance_date, attendance_date),
+	)
+
+	return shift_type[0][0] if shift_type else None
+
+
+def get_shift_timings(shift_types):
+	"""Start/end time and grace period per Shift Type name"""
+	shift_types = [s for s in set(shift_types) if s]
+	if not shift_types:
+		return {}
+
+	return {
+		st.name: st
+		for st in frappe.get_all(
+			"Shift Type",
+			filters={"name": ["in", shift_types]},
+			fields=["name", "start_time", "end_time", "late_entry_grace_period"],
+		)
+	}
+
+
+def get_day_summaries(attendance_date):
+	"""Summaries of a date keyed by employee"""
+	return {
+		s.employee: s
+		for s in frappe.get_all(
+			"Attendance Day Summary",
+			filters={"attendance_date": getdate(attendance_date)},
+			fields=SUMMARY_FIELDS,
+		)
+	}
+
+
+def get_summary_checkins(summary):
+	"""
+	The consolidated punches of a summary (first IN and last OUT) in the shape the
+	consolidation rules read checkins in, ordered by time.
+	"""
+	checks = []
+	if summary.first_in:
+		checks.append({"name": summary.first_in_checkin, "time": summary.first_in, "log_type": "IN"})
+	if summary.last_out:
+		checks.append({"name": summary.last_out_checkin, "time": summary.last_out, "log_type": "OUT"})
+
+	return sorted(checks, key=lambda c: get_datetime(c["time"]))
+
+
+def finalize_day_summaries(attendance_date):
+	"""Mark the summaries of a consolidated date as Finalized"""
+	frappe.db.sql(
+		"""
+		UPDATE `tabAttendance Day Summary`
+		SET status = 'Finalized', modified = %s
+		WHERE attendance_date = %s
+	""",
+		(now_datetime(), getdate(attendance_date)),
+	)
+
+
+def ensure_day_summaries(from_date, to_date):
+	"""
+	Rebuild the summaries of every date whose punch count no longer matches the raw
+	checkins, e.g. dates from before the summary existed or checkins written without
+	hooks.
+
+	Returns:
+		list: Dates that were rebuilt
+	"""
+	stale = get_stale_summary_dates(from_date, to_date)
+	for attendance_date in stale:
+		rebuild_day_summaries(attendance_date, attendance_date)
+
+	return stale
+
+
+def get_stale_summary_dates(from_date, to_date):
+	"""Dates in the range whose summed punch count differs from the raw checkin count"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+
+	# Archived months are closed; their summaries are kept as they are
+	boundary = get_archive_boundary()
+	if boundary and from_date < boundary:
+		from_date = boundary
+	if from_date > to_date:
+		return []
+
+	checkin_counts = dict(
+		frappe.db.sql(
+			"""
+		SELECT DATE(time), COUNT(*)
+		FROM `tabEmployee Checkin`
+		WHERE time >= %s AND time < %s
+		GROUP BY DATE(time)
+	""",
+			(from_date, add_days(to_date, 1)),
+		)
+	)
+
+	summary_counts = dict(
+		frappe.db.sql(
+			"""
+		SELECT attendance_date, SUM(punch_count)
+		FROM `tabAttendance Day Summary`
+		WHERE attendance_date BETWEEN %s AND %s
+		GROUP BY attendance_date
+	""",
+			(from_date, to_date),
+		)
+	)
+
+	return sorted(
+		getdate(d)
+		for d in set(checkin_counts) | set(summary_counts)
+		if cint(checkin_counts.get(d)) != cint(summary_counts.get(d))
+	)
+
+
+def get_range_summaries(from_date, to_date):
+	"""
+	Summaries of a date range keyed by (employee, date) without writing anything: stored
+	rows for dates that are in sync, summaries folded in memory from the raw checkins
+	for dates that drifted.
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	stale = set(get_stale_summary_dates(from_date, to_date))
+
+	summaries = {}
+	for summary in frappe.get_all(
+		"Attendance Day Summary",
+		filters={"attendance_date": ["between", [from_date, to_date]]},
+		fields=SUMMARY_FIELDS,
+	):
+		attendance_date = getdate(summary.attendance_date)
+		if attendance_date not in stale:
+			summaries[(summary.employee, attendance_date)] = summary
+
+	# Drifted dates are folded in month sized windows, one scan per window rather than
+	# per date, so that a year of drift costs a dozen queries
+	stale = sorted(stale)
+	while stale:
+		window_start = stale[0]
+		window_end = add_days(window_start, 30)
+		window = {d for d in stale if d <= window_end}
+		summaries.update(
+			(key, summary)
+			for key, summary in build_day_summaries(window_start, max(window)).items()
+			if key[1] in window
+		)
+		stale = stale[len(window) :]
+
+	return summaries
+
+
+def rebuild_day_summaries(from_date, to_date, employee=None):
+	"""
+	Recompute the summaries of a date range (optionally one employee) from the raw checkins.
+	Finalized rows keep their status.
+
+	Returns:
+		int: Number of summaries written
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	written = 0
+
+	# Work in month sized windows to keep memory bounded on long ranges
+	window_start = from_date
+	while window_start <= to_date:
+		window_end = min(add_days(window_start, 30), to_date)
+		written += _rebuild_window(window_start, window_end, employee)
+		window_start = add_days(window_end, 1)
+
+	return written
+
+
+def build_day_summaries(from_date, to_date, employee=None):
+	"""
+	Fold the raw checkins of a date range into summaries in memory, keyed by
+	(employee, date). Only the punch derived fields are set.
+	"""
+	conditions = "ec.time >= %(from_date)s AND ec.time < %(to_date)s"
+	values = {"from_date": from_date, "to_date": add_days(to_date, 1), "employee": employee}
+	if employee:
+		conditions += " AND ec.employee = %(employee)s"
+
+	checkins = frappe.db.sql(
+		f"""
+		SELECT name, employee, time, log_type, device_id
+		FROM {get_checkin_source(from_date, conditions)} ec
+		WHERE {conditions}
+		ORDER BY employee, time
+	""",
+		values,
+		as_dict=True,
+	)
+
+	summaries = {}
+	for checkin in checkins:
+		attendance_date = getdate(checkin.time)
+		key = (checkin.employee, attendance_date)
+		if key not in summaries:
+			summaries[key] = frappe._dict(
+				name=get_summary_name(checkin.employee, attendance_date),
+				employee=checkin.employee,
+				attendance_date=attendance_date,
+				status="Open",
+				punch_count=0,
+			)
+		merge_checkin(summaries[key], checkin)
+
+	return summaries
+
+
+def _rebuild_window(from_date, to_date, employee=None):
+	summaries = build_day_summaries(from_date, to_date, employee)
+
+	existing_filters = {"attendance_date": ["between", [from_date, to_date]]}
+	if employee:
+		existing_filters["employee"] = employee
+	finalized = set(
+		frappe.get_all(
+			"Attendance Day Summary", filters=dict(existing_filters, status="Finalized"), pluck="name"
+		)
+	)
+
+	frappe.db.delete("Attendance Day Summary", existing_filters)
+	if not summaries:
+		return 0
+
+	employees = {
+		e.name: e
+		for e in frappe.get_all(
+			"Employee",
+			filters={"name": ["in", list({k[0] for k in summaries})]},
+			fields=["name", "employee_name", "department"],
+		)
+	}
+	shift_of_day = _get_shift_types_for_range({k[0] for k in summaries}, from_date, to_date)
+	shift_types = get_shift_timings(shift_of_day(*key) for key in summaries)
+
+	now = now_datetime()
+	rows = []
+	for key, summary in summaries.items():
+		employee_row = employees.get(key[0]) or {}
+		summary.employee_name = employee_row.get("employee_name")
+		summary.department = employee_row.get("department")
+		summary.shift = shift_of_day(*key)
+		summary.status = "Finalized" if summary.name in finalized else "Open"
+		set_late_and_early(summary, shift_types.get(summary.shift))
+		summary.update(
+			creation=now,
+			modified=now,
+			owner=frappe.session.user,
+			modified_by=frappe.session.user,
+			docstatus=0,
+		)
+		rows.append(summary)
+
+	fields = [*SUMMARY_FIELDS, "creation", "modified", "owner", "modified_by", "docstatus"]
+	frappe.db.bulk_insert("Attendance Day Summary", fields, [tuple(r.get(f) for f in fields) for r in rows])
+
+	return len(rows)
+
+
+def _get_shift_types_for_range(employees, from_date, to_date):
+	"""Returns a lookup (employee, date) -> active shift type, loaded with one query"""
+	assignments = {}
+	for sa in frappe.db.sql(
+		"""
+		SELECT employee, shift_type, start_date, end_date
+		FROM `tabShift Assignment`
+		WHERE docstatus = 1
+			AND employee IN %(employees)s
+			AND start_date <= %(to_date)s
+			AND (end_date IS NULL OR end_date >= %(from_date)s)
+		ORDER BY start_date DESC
+	""",
+		{"employees": list(employees), "from_date": from_date, "to_date": to_date},
+		as_dict=True,
+	):
+		assignments.setdefault(sa.employee, []).append(sa)
+
+	def shift_of_day(employee, attendance_date):
+		for sa in assignments.get(employee, []):
+			if getdate(sa.start_date) <= attendance_date and (
+				not sa.end_date or getdate(sa.end_date) >= attendance_date
+			):
+				return sa.shift_type
+		return None
+
+	return shift_of_day
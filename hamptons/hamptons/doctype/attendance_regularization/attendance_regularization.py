@@ -6,22 +6,47 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import getdate
 
+# Bulk and single decisions: action -> (regularization status, attendance status)
+REGULARIZATION_DECISIONS = {
+	"approve": ("Approved", "Present"),
+	"reject": ("Rejected", "Absent")
+}
+
 
 class AttendanceRegularization(Document):
 	@frappe.whitelist()
 	def approve(self):
 		"""Approve the regularization request and create Present attendance"""
-		if self.status != "Pending":
-			frappe.throw(_("Only Pending requests can be approved"))
-		
-		if self.docstatus != 0:
-			frappe.throw(_("Only draft documents can be approved"))
-		
-		if not self.shift:
-			frappe.throw(_("Shift Type is required to approve Attendance Regularization"))
-		
+		attendance = self.decide("approve")
+		frappe.msgprint(
+			_("Attendance Regularization approved and submitted. Attendance {0} created as Present").format(
+				frappe.utils.get_link_to_form("Attendance", attendance)
+			),
+			indicator="green"
+		)
+
+	@frappe.whitelist()
+	def reject(self):
+		"""Reject the regularization request and create Absent attendance"""
+		attendance = self.decide("reject")
+		frappe.msgprint(
+			_("Attendance Regularization rejected and submitted. Attendance {0} marked as Absent").format(
+				frappe.utils.get_link_to_form("Attendance", attendance)
+			),
+			indicator="orange"
+		)
+
+	def decide(self, action):
+		"""
+		Validate and apply an approve/reject decision, then commit.
+
+		Returns:
+			str: Name of the created Attendance
+		"""
+		self.validate_decision(action)
+
 		attendance_date = getdate(self.posting_date)
-		
+
 		# Check if attendance already exists
 		existing_attendance = frappe.db.exists(
 			"Attendance",
@@ -31,7 +56,7 @@ class AttendanceRegularization(Document):
 				"docstatus": ["<", 2]
 			}
 		)
-		
+
 		if existing_attendance:
 			frappe.throw(
 				_("Attendance already exists for {0} on {1}").format(
@@ -39,156 +64,90 @@ class AttendanceRegularization(Document):
 					frappe.format(attendance_date, {"fieldtype": "Date"})
 				)
 			)
-		
-		# Create Present attendance
-		attendance = frappe.get_doc({
-			"doctype": "Attendance",
-			"employee": self.employee,
-			"employee_name": self.employee_name,
-			"attendance_date": attendance_date,
-			"shift": self.shift,
-			"status": "Present",
-			"custom_attendance_regularization": self.name,
-			"company": frappe.defaults.get_user_default("Company")
-		})
-		
+
 		try:
-			attendance.insert(ignore_permissions=True)
-			attendance.submit()
-			
-			# Update status to Approved
-			self.status = "Approved"
-			self.attendance = attendance.name
-			
-			# Submit the Attendance Regularization document
-			self.submit()
+			attendance = self.apply_decision(action)
 			frappe.db.commit()
-			
-			frappe.msgprint(
-				_("Attendance Regularization approved and submitted. Attendance {0} created as Present").format(
-					frappe.utils.get_link_to_form("Attendance", attendance.name)
-				),
-				indicator="green"
-			)
-			
+			return attendance
 		except Exception as e:
 			frappe.log_error(
 				message=str(e),
 				title=f"Attendance Creation Failed - {self.name}"
 			)
 			frappe.throw(_("Failed to create attendance: {0}").format(str(e)))
-	
-	@frappe.whitelist()
-	def reject(self):
-		"""Reject the regularization request and create Absent attendance"""
+
+	def validate_decision(self, action):
+		"""Only Pending drafts with a Shift Type can be approved or rejected"""
+		# One translatable sentence per action, translators need the whole sentence
+		if action == "approve":
+			not_pending = _("Only Pending requests can be approved")
+			not_draft = _("Only draft documents can be approved")
+			no_shift = _("Shift Type is required to approve Attendance Regularization")
+		else:
+			not_pending = _("Only Pending requests can be rejected")
+			not_draft = _("Only draft documents can be rejected")
+			no_shift = _("Shift Type is required to reject Attendance Regularization")
+
 		if self.status != "Pending":
-			frappe.throw(_("Only Pending requests can be rejected"))
-		
+			frappe.throw(not_pending)
+
 		if self.docstatus != 0:
-			frappe.throw(_("Only draft documents can be rejected"))
-		
+			frappe.throw(not_draft)
+
 		if not self.shift:
-			frappe.throw(_("Shift Type is required to reject Attendance Regularization"))
-		
-		attendance_date = getdate(self.posting_date)
-		
-		# Check if attendance already exists
-		existing_attendance = frappe.db.exists(
-			"Attendance",
-			{
-				"employee": self.employee,
-				"attendance_date": attendance_date,
-				"docstatus": ["<", 2]
-			}
-		)
-		
-		if existing_attendance:
-			frappe.throw(
-				_("Attendance already exists for {0} on {1}").format(
-					self.employee_name,
-					frappe.format(attendance_date, {"fieldtype": "Date"})
-				)
-			)
-		
-		# Create Absent attendance
+			frappe.throw(no_shift)
+
+	def apply_decision(self, action):
+		"""
+		Create and submit the Attendance for the decision and submit this regularization.
+		Does not check for existing attendance and does not commit.
+
+		Returns:
+			str: Name of the created Attendance
+		"""
+		status, attendance_status = REGULARIZATION_DECISIONS[action]
+
 		attendance = frappe.get_doc({
 			"doctype": "Attendance",
 			"employee": self.employee,
 			"employee_name": self.employee_name,
-			"attendance_date": attendance_date,
+			"attendance_date": getdate(self.posting_date),
 			"shift": self.shift,
-			"status": "Absent",
+			"status": attendance_status,
 			"custom_attendance_regularization": self.name,
 			"company": frappe.defaults.get_user_default("Company")
 		})
-		
-		try:
-			attendance.insert(ignore_permissions=True)
-			attendance.submit()
-			
-			# Update status to Rejected
-			self.status = "Rejected"
-			self.attendance = attendance.name
-			
-			# Submit the Attendance Regularization document
-			self.submit()
-			frappe.db.commit()
-			
-			frappe.msgprint(
-				_("Attendance Regularization rejected and submitted. Attendance {0} marked as Absent").format(
-					frappe.utils.get_link_to_form("Attendance", attendance.name)
-				),
-				indicator="orange"
-			)
-			
-		except Exception as e:
-			frappe.log_error(
-				message=str(e),
-				title=f"Attendance Creation Failed - {self.name}"
-			)
-			frappe.throw(_("Failed to create attendance: {0}").format(str(e)))
-	
+		attendance.insert(ignore_permissions=True)
+		attendance.submit()
+
+		self.status = status
+		self.attendance = attendance.name
+
+		# Submit the Attendance Regularization document
+		self.submit()
+		return attendance.name
+
 	def on_cancel(self):
 		"""Handle cancellation of Attendance Regularization and cancel all linked attendance records"""
-		cancelled_count = 0
-		failed_list = []
-		
-		# Find all attendance records linked to this regularization
-		linked_attendance = frappe.get_all(
-			"Attendance",
-			filters={
-				"custom_attendance_regularization": self.name,
-				"docstatus": 1  # Only submitted records
-			},
-			pluck="name"
-		)
-		
-		# Cancel all linked attendance records
-		for attendance_name in linked_attendance:
-			try:
-				attendance_doc = frappe.get_doc("Attendance", attendance_name)
-				attendance_doc.cancel()
-				cancelled_count += 1
-			except Exception as e:
-				failed_list.append(attendance_name)
-				frappe.log_error(
-					message=str(e),
-					title=f"Failed to cancel Attendance {attendance_name} - {self.name}"
-				)
-		
+		# Bulk cancellation cancels the linked attendance of a whole chunk up front
+		if self.flags.linked_attendance_cancelled:
+			return
+
+		result = cancel_linked_attendance([self.name])
+
 		# Show summary message
-		if cancelled_count > 0:
+		if result["cancelled"]:
 			frappe.msgprint(
-				_("Successfully cancelled {0} linked Attendance record(s)").format(cancelled_count),
+				_("Successfully cancelled {0} linked Attendance record(s)").format(len(result["cancelled"])),
 				indicator="green"
 			)
-		
-		if failed_list:
+
+		if result["failed"]:
 			frappe.msgprint(
-				_("Failed to cancel {0} Attendance record(s): {1}").format(len(failed_list), ", ".join(failed_list)),
+				_("Failed to cancel {0} Attendance record(s): {1}").format(len(result["failed"]), ", ".join(result["failed"])),
 				indicator="orange"
 			)
-	
+
 	def on_trash(self):
 		"""Prevent deletion if submitted and not cancelled"""
 		# Allow deletion only if document is Draft (docstatus=0) or Cancelled (docstatus=2)
@@ -196,7 +155,7 @@ class AttendanceRegularization(Document):
 			frappe.throw(
 				_("Cannot delete submitted Attendance Regularization. Please cancel it first.")
 			)
-		
+
 		# If cancelled, check and warn about linked attendance
 		if self.docstatus == 2 and self.attendance:
 			try:
@@ -207,4 +166,283 @@ class AttendanceRegularization(Document):
 					)
 			except frappe.DoesNotExistError:
 				# Attendance already deleted, safe to proceed
-				pass
\ No newline at end of file
+				pass
+
+@frappe.whitelist()
+def bulk_process_regularizations(action, names=None, filters=None):
+	"""
+	Approve, reject or cancel many Attendance Regularizations in a background job.
+
+	Args:
+		action: "approve", "reject" or "cancel"
+		names: List of regularization names
+		filters: List view filters selecting the regularizations, used when names is empty
+
+	Returns:
+		dict: Number of regularizations queued and the Hamptons Job Run reporting the
+		per-item results
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+	if action not in REGULARIZATION_DECISIONS and action != "cancel":
+		frappe.throw(_("Action must be one of {0}").format(", ".join([*REGULARIZATION_DECISIONS, "cancel"])))
+
+	frappe.has_permission("Attendance Regularization", "cancel" if action == "cancel" else "submit", throw=True)
+
+	names = frappe.parse_json(names) if names else None
+	filters = frappe.parse_json(filters) if filters else None
+	if not names and not filters:
+		frappe.throw({
+			"approve": _("Select the regularizations to approve"),
+			"reject": _("Select the regularizations to reject"),
+			"cancel": _("Select the regularizations to cancel")
+		}[action])
+
+	# Resolve through get_list so the user only acts on records they can read
+	if isinstance(filters, dict):
+		filters = [
+			[key, *(value if isinstance(value, list | tuple) else ["=", value])]
+			for key, value in filters.items()
+		]
+	if action == "cancel":
+		filters = [*(filters or []), ["docstatus", "=", 1]]
+	else:
+		filters = [*(filters or []), ["status", "=", "Pending"], ["docstatus", "=", 0]]
+	if names:
+		filters.append(["name", "in", names])
+	names = frappe.get_list(
+		"Attendance Regularization",
+		filters=filters,
+		pluck="name",
+		order_by="posting_date asc",
+		limit_page_length=0
+	)
+	if not names:
+		frappe.throw({
+			"approve": _("No matching regularizations to approve"),
+			"reject": _("No matching regularizations to reject"),
+			"cancel": _("No matching regularizations to cancel")
+		}[action])
+
+	job_run = create_job_run(f"Bulk {action.title()} Attendance Regularization", total=len(names))
+
+	module = "hamptons.hamptons.doctype.attendance_regularization.attendance_regularization"
+	if action == "cancel":
+		frappe.enqueue(f"{module}.cancel_regularizations_background", queue="long", timeout=3600, names=names, job_run=job_run)
+	else:
+		frappe.enqueue(f"{module}.process_regularizations_background", queue="long", timeout=3600, action=action, names=names, job_run=job_run)
+
+	return {"count": len(names), "job_run": job_run}
+
+
+def process_regularizations_background(action, names, job_run=None, chunk_size=50):
+	"""
+	Apply an approve/reject decision to a list of regularizations.
+
+	Regularizations and conflicting Attendance are loaded with one query each before
+	any work starts. Items are decided inside a savepoint so a failing one is rolled
+	back alone, and the work is committed once per chunk.
+
+	Returns:
+		dict: Counts and per-item results, also stored on the Hamptons Job Run
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+	progress = JobProgress(f"Bulk {action.title()} Attendance Regularization", total=len(names), job_run=job_run)
+
+	with progress.fail_on_error():
+		rows = {
+			r.name: r for r in frappe.get_all(
+				"Attendance Regularization",
+				filters={"name": ["in", names]},
+				fields=["name", "employee", "posting_date", "status", "docstatus", "shift"]
+			)
+		}
+		conflicts = get_attendance_conflicts(rows.values())
+
+		results = []
+		counts = {"succeeded": 0, "skipped": 0, "failed": 0}
+
+		def record(name, outcome, message=None, attendance=None):
+			results.append({"name": name, "result": outcome, "message": message, "attendance": attendance})
+			counts[outcome] += 1
+			if outcome == "failed":
+				progress.error(f"{name}: {message}")
+
+		for start in range(0, len(names), chunk_size):
+			for name in names[start:start + chunk_size]:
+				row = rows.get(name)
+				if not row:
+					record(name, "skipped", _("Not found"))
+					continue
+				if row.status != "Pending" or row.docstatus != 0:
+					record(name, "skipped", _("Already {0}").format(row.status))
+					continue
+				if not row.shift:
+					record(name, "skipped", _("Shift Type is required"))
+					continue
+
+				key = (row.employee, getdate(row.posting_date))
+				if key in conflicts:
+					record(name, "skipped", _("Attendance {0} already exists").format(conflicts[key]))
+					continue
+
+				frappe.db.savepoint("regularization_decision")
+				try:
+					doc = frappe.get_doc("Attendance Regularization", name)
+					attendance = doc.apply_decision(action)
+					# Later items of the same employee-day now conflict with this one
+					conflicts[key] = attendance
+					record(name, "succeeded", attendance=attendance)
+				except Exception as e:
+					frappe.db.rollback(save_point="regularization_decision")
+					frappe.log_error(message=frappe.get_traceback(), title=f"Attendance Creation Failed - {name}")
+					record(name, "failed", str(e))
+
+			frappe.db.commit()
+			progress.update(processed=min(start + chunk_size, len(names)))
+
+		result = dict(counts, action=action, results=results)
+		progress.finish(result)
+	frappe.db.commit()
+
+	return result
+
+
+def get_attendance_conflicts(regularizations):
+	"""Existing non-cancelled Attendance per (employee, date) for a set of regularizations"""
+	regularizations = list(regularizations)
+	if not regularizations:
+		return {}
+
+	existing = frappe.get_all(
+		"Attendance",
+		filters={
+			"employee": ["in", list({r.employee for r in regularizations})],
+			"attendance_date": ["in", list({getdate(r.posting_date) for r in regularizations})],
+			"docstatus": ["<", 2]
+		},
+		fields=["name", "employee", "attendance_date"]
+	)
+	return {(a.employee, getdate(a.attendance_date)): a.name for a in existing}
+
+
+def get_linked_attendance(regularization_names):
+	"""
+	Submitted Attendance linked to a set of regularizations, in one query.
+
+	Returns:
+		dict: Regularization name to its attendance names
+	"""
+	linked = {}
+	if not regularization_names:
+		return linked
+
+	for row in frappe.get_all(
+		"Attendance",
+		filters={
+			"custom_attendance_regularization": ["in", list(regularization_names)],
+			"docstatus": 1  # Only submitted records
+		},
+		fields=["name", "custom_attendance_regularization"]
+	):
+		linked.setdefault(row.custom_attendance_regularization, []).append(row.name)
+
+	return linked
+
+
+def cancel_linked_attendance(regularization_names, linked_attendance=None):
+	"""
+	Cancel the submitted Attendance linked to a set of regularizations.
+
+	Only loading is batched: the linked attendance of all regularizations is read with
+	one query. Cancellation stays per document through doc.cancel(), so link checks,
+	the Attendance controller, doc_events and version history all run.
+
+	Args:
+		regularization_names: Attendance Regularization names
+		linked_attendance: Attendance names, when the caller already loaded them
+
+	Returns:
+		dict: {"cancelled": [attendance names], "failed": [attendance names]}
+	"""
+	result = {"cancelled": [], "failed": []}
+	if not regularization_names:
+		return result
+
+	if linked_attendance is None:
+		linked_attendance = [
+			name for names in get_linked_attendance(regularization_names).values() for name in names
+		]
+
+	for attendance_name in linked_attendance:
+		try:
+			frappe.get_doc("Attendance", attendance_name).cancel()
+			result["cancelled"].append(attendance_name)
+		except Exception as e:
+			result["failed"].append(attendance_name)
+			frappe.log_error(message=str(e), title=f"Failed to cancel Attendance {attendance_name}")
+
+	return result
+
+
+def cancel_regularizations_background(names, job_run=None, chunk_size=50):
+	"""
+	Cancel submitted regularizations chunk by chunk: the linked attendance of a chunk is
+	loaded in one query, then each regularization and its attendance are cancelled
+	document by document inside one savepoint, so a failure leaves both submitted.
+
+	Returns:
+		dict: Counts and per-item results, also stored on the Hamptons Job Run
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+	progress = JobProgress("Bulk Cancel Attendance Regularization", total=len(names), job_run=job_run)
+
+	with progress.fail_on_error():
+		results = []
+		counts = {"succeeded": 0, "skipped": 0, "failed": 0}
+
+		for start in range(0, len(names), chunk_size):
+			chunk = names[start:start + chunk_size]
+			linked_attendance = get_linked_attendance(chunk)
+
+			for name in chunk:
+				frappe.db.savepoint("regularization_cancel")
+				try:
+					doc = frappe.get_doc("Attendance Regularization", name)
+					if doc.docstatus != 1:
+						results.append({"name": name, "result": "skipped", "message": _("Not submitted")})
+						counts["skipped"] += 1
+						continue
+
+					attendance = cancel_linked_attendance([name], linked_attendance=linked_attendance.get(name, []))
+					if attendance["failed"]:
+						frappe.throw(_("Failed to cancel Attendance {0}").format(", ".join(attendance["failed"])))
+
+					doc.flags.linked_attendance_cancelled = True
+					doc.cancel()
+					results.append({"name": name, "result": "succeeded", "attendance": doc.attendance})
+					counts["succeeded"] += 1
+				except Exception as e:
+					frappe.db.rollback(save_point="regularization_cancel")
+					frappe.log_error(message=frappe.get_traceback(), title=f"Failed to cancel Attendance Regularization {name}")
+					results.append({"name": name, "result": "failed", "message": str(e)})
+					counts["failed"] += 1
+					progress.error(f"{name}: {e}")
+
+			frappe.db.commit()
+			progress.update(processed=min(start + chunk_size, len(names)))
+
+		result = dict(counts, action="cancel", results=results)
+		progress.finish(result)
+	frappe.db.commit()
+
+	return result
+
+
+def on_doctype_update():
+	"""Composite indexes for the lookups by employee-day, status and approver"""
+	frappe.db.add_index("Attendance Regularization", ["employee", "posting_date", "docstatus"], "employee_posting_date_index")
+	frappe.db.add_index("Attendance Regularization", ["status", "posting_date"], "status_posting_date_index")
+	frappe.db.add_index("Attendance Regularization", ["reports_to", "status"], "reports_to_status_index")
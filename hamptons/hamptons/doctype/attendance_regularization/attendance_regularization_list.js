@@ -30,9 +30,13 @@ frappe.listview_settings['Attendance Regularization'] = {
                 ]),
                 indicator: 'blue',
                 primary_action: {
-                  label: __('Refresh List'),
+                  label: r.message.job_run ? __('Track Progress') : __('Refresh List'),
                   action: function() {
-                    listview.refresh();
+                    if (r.message.job_run) {
+                      frappe.set_route('Form', 'Hamptons Job Run', r.message.job_run);
+                    } else {
+                      listview.refresh();
+                    }
                   }
                 }
               });
@@ -58,5 +62,41 @@ frappe.listview_settings['Attendance Regularization'] = {
 
     // Add single RUN button to toolbar
     listview.page.add_inner_button(__('RUN'), runSync);
+
+    // Bulk approve/reject/cancel of the selected regularizations, processed in the background
+    const bulkProcess = function(action, label) {
+      const names = listview.get_checked_items(true);
+      if (!names.length) {
+        frappe.msgprint(__('Select the regularizations to {0}', [label.toLowerCase()]));
+        return;
+      }
+
+      frappe.confirm(__('{0} {1} selected regularization(s)?', [label, names.length]), () => {
+        frappe.call({
+          method: 'hamptons.hamptons.doctype.attendance_regularization.attendance_regularization.bulk_process_regularizations',
+          args: { action: action, names: names },
+          freeze: true,
+          callback: function(r) {
+            if (!r.message) return;
+            listview.clear_checked_items();
+            frappe.msgprint({
+              title: __('Bulk {0} Queued', [label]),
+              message: __('{0} regularization(s) are being processed in the background.', [r.message.count]),
+              indicator: 'blue',
+              primary_action: {
+                label: __('Track Progress'),
+                action: function() {
+                  frappe.set_route('Form', 'Hamptons Job Run', r.message.job_run);
+                }
+              }
+            });
+          }
+        });
+      });
+    };
+
+    listview.page.add_actions_menu_item(__('Approve'), () => bulkProcess('approve', __('Approve')));
+    listview.page.add_actions_menu_item(__('Reject'), () => bulkProcess('reject', __('Reject')));
+    listview.page.add_actions_menu_item(__('Cancel with Attendance'), () => bulkProcess('cancel', __('Cancel')));
   }
 };
@@ -4,13 +4,16 @@
 # Copyright (c) 2025, sammish and contributors
 # For license information, please see license.txt
 
-import frappe
-from frappe.model.document import Document
-from frappe.utils import now_datetime, get_datetime
-import requests
 import json
+import time
 from datetime import datetime, timedelta
 
+import frappe
+import requests
+from frappe.model.document import Document
+from frappe.utils import get_datetime, now_datetime
+
+
 class CrosschexSettings(Document):
     def validate(self):
         """Validate CrossChex Settings before saving"""
@@ -18,10 +21,10 @@ class CrosschexSettings(Document):
             # Check if either multi-device config or legacy config is set
             has_multi_device_config = self.api_configurations and len(self.api_configurations) > 0
             has_legacy_config = self.api_key and self.api_secret and self.api_url
-            
+
             if not has_multi_device_config and not has_legacy_config:
                 frappe.throw("Either configure API Configurations table or legacy API settings when sync is enabled")
-            
+
             # Validate each API configuration entry if multi-device mode is used
             if has_multi_device_config:
                 for idx, config in enumerate(self.api_configurations, start=1):
@@ -31,7 +34,7 @@ class CrosschexSettings(Document):
                         frappe.throw(f"API Key is required for configuration row {idx}")
                     if not config.get_password('api_secret'):
                         frappe.throw(f"API Secret is required for configuration row {idx}")
-            
+
             # Only validate legacy config if no multi-device config exists
             elif has_legacy_config:
                 if not self.api_key:
@@ -40,16 +43,16 @@ class CrosschexSettings(Document):
                     frappe.throw("API Secret is required for legacy configuration")
                 if not self.api_url:
                     frappe.throw("API URL is required for legacy configuration")
-        
+
         # Ensure API URL ends with / for all configurations
         if self.api_url and not self.api_url.endswith('/'):
             self.api_url += '/'
-        
+
         if self.api_configurations:
             for config in self.api_configurations:
                 if config.api_url and not config.api_url.endswith('/'):
                     config.api_url += '/'
-    
+
     def on_update(self):
         """Called after the document is saved"""
         # Clear token if API credentials changed
@@ -57,23 +60,23 @@ class CrosschexSettings(Document):
             self.db_set('token', None, update_modified=False)
             self.db_set('token_expires', None, update_modified=False)
             self.db_set('connection_status', 'Not Tested', update_modified=False)
-    
+
     @frappe.whitelist()
     def test_connection(self):
         """Test the API connection and generate token"""
         try:
             if not self.api_key or not self.api_secret:
                 return {"success": False, "error": "API Key and Secret are required"}
-            
+
             # Generate token
             token_result = self.generate_token()
-            
+
             if token_result.get("success"):
                 # Update connection status
                 self.db_set('connection_status', 'Connected', update_modified=False)
                 self.db_set('last_token_generated', now_datetime(), update_modified=False)
                 frappe.db.commit()
-                
+
                 return {
                     "success": True,
                     "message": "Connection successful! Token generated and saved."
@@ -81,47 +84,47 @@ class CrosschexSettings(Document):
             else:
                 self.db_set('connection_status', 'Error', update_modified=False)
                 frappe.db.commit()
-                
+
                 return {
                     "success": False,
                     "error": f"Connection failed: {token_result.get('error')}"
                 }
-                
+
         except Exception as e:
             self.db_set('connection_status', 'Error', update_modified=False)
             frappe.db.commit()
-            
-            return {"success": False, "error": f"Connection test failed: {str(e)}"}
-    
+
+            return {"success": False, "error": f"Connection test failed: {e!s}"}
+
     @frappe.whitelist()
     def sync_now(self):
         """Manually trigger sync"""
         try:
             if not self.enable_realtime_sync:
                 return {"success": False, "error": "CrossChex sync is not enabled"}
-            
+
             # Import here to avoid circular imports
             from hamptons.crosschex_cloud.api.sync import manual_sync_crosschex_cloud
-            
+
             result = manual_sync_crosschex_cloud()
-            
+
             # Update sync status
             if result.get("success"):
                 self.db_set('last_sync_time', now_datetime(), update_modified=False)
                 self.db_set('last_sync_status', result.get('message', 'Success'), update_modified=False)
             else:
                 self.db_set('last_sync_status', f"Error: {result.get('error')}", update_modified=False)
-            
+
             frappe.db.commit()
             return result
-            
+
         except Exception as e:
-            error_msg = f"Sync failed: {str(e)}"
+            error_msg = f"Sync failed: {e!s}"
             self.db_set('last_sync_status', error_msg, update_modified=False)
             frappe.db.commit()
-            
+
             return {"success": False, "error": error_msg}
-    
+
     @frappe.whitelist()
     def reset_token(self):
         """Reset/clear the current token"""
@@ -130,38 +133,40 @@ class CrosschexSettings(Document):
             self.db_set('token_expires', None, update_modified=False)
             self.db_set('connection_status', 'Not Tested', update_modified=False)
             frappe.db.commit()
-            
+
             return {"success": True, "message": "Token has been reset"}
-            
+
         except Exception as e:
-            return {"success": False, "error": f"Failed to reset token: {str(e)}"}
-    
+            return {"success": False, "error": f"Failed to reset token: {e!s}"}
+
     @frappe.whitelist()
     def clear_logs(self):
         """Clear CrossChex logs"""
         try:
-            # Delete old CrossChex logs
+            from hamptons.utils import purge_old_records
+
+            # Delete old CrossChex logs in bounded chunks, for at most a minute per request
             cutoff_date = get_datetime() - timedelta(days=int(self.log_retention_days or 30))
-            
-            frappe.db.sql("""
-                DELETE FROM `tabCrossChex Log`
-                WHERE creation < %s
-            """, (cutoff_date,))
-            
-            frappe.db.commit()
-            
+            deleted = purge_old_records("CrossChex Log", cutoff_date, deadline=time.monotonic() + 60)
+
+            if frappe.db.table_exists("CrossChex Log") and frappe.db.exists("CrossChex Log", {"creation": ["<", cutoff_date]}):
+                return {
+                    "success": True,
+                    "message": f"{deleted} logs cleared; older logs remain and will be removed by the scheduled cleanup"
+                }
+
             return {"success": True, "message": f"Logs older than {self.log_retention_days or 30} days have been cleared"}
-            
+
         except Exception as e:
-            return {"success": False, "error": f"Failed to clear logs: {str(e)}"}
-    
+            return {"success": False, "error": f"Failed to clear logs: {e!s}"}
+
     def generate_token(self):
         """Generate CrossChex Cloud access token"""
         try:
             import uuid
-            
+
             request_id = str(uuid.uuid4())
-            
+
             payload = {
                 "header": {
                     "nameSpace": "authorize.token",
@@ -175,72 +180,72 @@ class CrosschexSettings(Document):
                     "api_secret": self.get_password('api_secret')
                 }
             }
-            
+
             response = requests.post(
                 self.api_url or "https://api.us.crosschexcloud.com/",
                 json=payload,
                 headers={'Content-Type': 'application/json'},
                 timeout=30
             )
-            
+
             if response.status_code == 200:
                 data = response.json()
-                
+
                 # Check for error response
                 if 'header' in data and data['header'].get('nameSpace') == 'System':
                     error_type = data.get('payload', {}).get('type', 'Unknown')
                     error_message = data.get('payload', {}).get('message', 'Unknown error')
-                    
+
                     if error_type == 'AUTH_ERROR':
                         return {"success": False, "error": "Authentication failed. Please verify your API Key and API Secret."}
                     else:
                         return {"success": False, "error": f"{error_type}: {error_message}"}
-                
+
                 # Success response
                 elif 'payload' in data and 'token' in data['payload']:
                     # Save token
                     self.db_set('token', data['payload']['token'], update_modified=False)
-                    
+
                     if 'expires' in data['payload']:
                         expires_str = data['payload']['expires']
                         try:
                             expires_dt = datetime.strptime(expires_str, "%Y-%m-%dT%H:%M:%S+00:00")
                             self.db_set('token_expires', expires_dt, update_modified=False)
-                        except:
+                        except Exception:
                             pass
-                    
+
                     frappe.db.commit()
-                    
+
                     return {
                         "success": True,
                         "token": data['payload']['token'],
                         "expires": data['payload'].get('expires')
                     }
-            
+
             return {"success": False, "error": f"API returned status {response.status_code}: {response.text}"}
-            
+
         except Exception as e:
             return {"success": False, "error": str(e)}
-    
+
     def get_valid_token(self):
         """Get a valid access token, generating one if needed"""
         try:
             current_token = self.get_password('token')
-            
+
             # Check if token exists and is not expired
             if current_token and self.token_expires:
                 if get_datetime(self.token_expires) > now_datetime():
                     return current_token
-            
+
             # Generate new token
             token_result = self.generate_token()
             if token_result.get("success"):
                 return token_result.get("token")
-            
+
             return None
-            
+
         except Exception as e:
-            frappe.logger().error(f"Error getting valid token: {str(e)}")
+            frappe.logger().error(f"Error getting valid token: {e!s}")
             return None
 
 @frappe.whitelist()
@@ -248,23 +253,23 @@ def test_individual_api_config(api_url, api_key, config_row_name, config_name=No
     """Test an individual API configuration"""
     try:
         import uuid
-        
+
         # Retrieve the actual password from the child table row using get_doc and get_password
         try:
             config_doc = frappe.get_doc("CrossChex API Configuration", config_row_name)
             api_secret = config_doc.get_password('api_secret')
         except Exception as e:
-            return {"success": False, "error": f"Failed to retrieve API Secret: {str(e)}"}
-        
+            return {"success": False, "error": f"Failed to retrieve API Secret: {e!s}"}
+
         if not api_secret:
             return {"success": False, "error": "API Secret not found. Please enter the API Secret and save the document first."}
-        
+
         request_id = str(uuid.uuid4())
-        
+
         # Ensure API URL ends with /
         if not api_url.endswith('/'):
             api_url += '/'
-        
+
         payload = {
             "header": {
                 "nameSpace": "authorize.token",
@@ -278,32 +283,32 @@ def test_individual_api_config(api_url, api_key, config_row_name, config_name=No
                 "api_secret": api_secret
             }
         }
-        
+
         response = requests.post(
             api_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
             timeout=30
         )
-        
+
         if response.status_code == 200:
             data = response.json()
-            
+
             # Check for error response
             if 'header' in data and data['header'].get('nameSpace') == 'System':
                 error_type = data.get('payload', {}).get('type', 'Unknown')
                 error_message = data.get('payload', {}).get('message', 'Unknown error')
-                
+
                 if error_type == 'AUTH_ERROR':
                     return {"success": False, "error": "Authentication failed. Please verify your API Key and API Secret."}
                 else:
                     return {"success": False, "error": f"{error_type}: {error_message}"}
-            
+
             # Success response
             elif 'payload' in data and 'token' in data['payload']:
                 expires_raw = data['payload'].get('expires')
                 expires_formatted = None
-                
+
                 # Convert ISO 8601 datetime with timezone to MySQL-compatible format
                 if expires_raw:
                     try:
@@ -311,18 +316,18 @@ def test_individual_api_config(api_url, api_key, config_row_name, config_name=No
                         dt = parser.parse(expires_raw)
                         # Convert to MySQL datetime format (YYYY-MM-DD HH:MM:SS)
                         expires_formatted = dt.strftime('%Y-%m-%d %H:%M:%S')
-                    except:
+                    except Exception:
                         expires_formatted = None
-                
+
                 return {
                     "success": True,
                     "token": data['payload']['token'],
                     "expires": expires_formatted,
                     "message": f"Connection to {config_name or api_url} successful!"
                 }
-        
+
         return {"success": False, "error": f"API returned status {response.status_code}: {response.text}"}
-        
+
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -332,9 +337,9 @@ def get_crosschex_status():
     try:
         if not frappe.db.exists("DocType", "Crosschex Settings"):
             return {"error": "Crosschex Settings doctype not found"}
-        
+
         settings = frappe.get_single("Crosschex Settings")
-        
+
         return {
             "sync_enabled": settings.enable_realtime_sync,
             "last_sync": settings.last_sync_time,
@@ -343,27 +348,27 @@ def get_crosschex_status():
             "api_configured": bool(settings.api_key and settings.api_secret),
             "has_token": bool(settings.get_password('token'))
         }
-        
+
     except Exception as e:
-        return {"error": f"Error getting status: {str(e)}"}
+        return {"error": f"Error getting status: {e!s}"}
 
 def scheduled_attendance_sync():
     """Scheduled function for attendance sync - syncs all configured devices"""
     try:
         if not frappe.db.exists("DocType", "Crosschex Settings"):
             return
-        
+
         settings = frappe.get_single("Crosschex Settings")
         if not settings.enable_realtime_sync:
             return
-        
+
         # Check if we have API configurations (multi-device setup)
         if settings.api_configurations and len(settings.api_configurations) > 0:
             # Sync all configured devices from the child table
             total_processed = 0
             total_errors = 0
             sync_results = []
-            
+
             for config in settings.api_configurations:
                 try:
                     result = sync_individual_device(
@@ -372,52 +377,52 @@ def scheduled_attendance_sync():
                         config_row_name=config.name,
                         config_name=config.configuration_name
                     )
-                    
+
                     if result.get("success"):
                         total_processed += result.get("processed", 0)
                         sync_results.append(f"{config.configuration_name}: {result.get('processed', 0)} records")
                     else:
                         total_errors += 1
                         sync_results.append(f"{config.configuration_name}: Error - {result.get('error', 'Unknown')}")
-                        
+
                 except Exception as e:
                     total_errors += 1
-                    sync_results.append(f"{config.configuration_name}: Exception - {str(e)}")
-                    frappe.logger().error(f"Error syncing device {config.configuration_name}: {str(e)}")
-            
+                    sync_results.append(f"{config.configuration_name}: Exception - {e!s}")
+                    frappe.logger().error(f"Error syncing device {config.configuration_name}: {e!s}")
+
             # Update settings with sync summary
             status_message = f"Auto-sync: Processed {total_processed} records from {len(settings.api_configurations)} devices. " + "; ".join(sync_results)
             settings.db_set('last_sync_time', now_datetime(), update_modified=False)
             settings.db_set('last_sync_status', status_message[:255], update_modified=False)  # Limit to 255 chars
             frappe.db.commit()
-            
+
         else:
             # Fallback to old single-device sync using global settings
             from hamptons.crosschex_cloud.api.sync import manual_sync_crosschex_cloud
-            
+
             result = manual_sync_crosschex_cloud()
-            
+
             if result.get("success"):
                 settings.db_set('last_sync_time', now_datetime(), update_modified=False)
                 settings.db_set('last_sync_status', f"Auto-sync: {result.get('message')}", update_modified=False)
             else:
                 settings.db_set('last_sync_status', f"Auto-sync failed: {result.get('error')}", update_modified=False)
-            
+
             frappe.db.commit()
-        
+
     except Exception as e:
-        frappe.logger().error(f"Error in scheduled_attendance_sync: {str(e)}")
+        frappe.logger().error(f"Error in scheduled_attendance_sync: {e!s}")
 
 def check_and_refresh_token():
     """Scheduled function to check and refresh tokens for all devices"""
     try:
         if not frappe.db.exists("DocType", "Crosschex Settings"):
             return
-        
+
         settings = frappe.get_single("Crosschex Settings")
         if not settings.enable_realtime_sync:
             return
-        
+
         # Refresh tokens for all API configurations
         if settings.api_configurations and len(settings.api_configurations) > 0:
             for config in settings.api_configurations:
@@ -425,7 +430,7 @@ def check_and_refresh_token():
                     # Check if token needs refresh
                     token = config.get_password('token') if hasattr(config, 'token') else None
                     token_expires = config.token_expires if hasattr(config, 'token_expires') else None
-                    
+
                     needs_refresh = False
                     if not token:
                         needs_refresh = True
@@ -435,9 +440,9 @@ def check_and_refresh_token():
                             # Refresh if expires within next 30 minutes
                             if (expires_dt - now_datetime()).total_seconds() <= 1800:
                                 needs_refresh = True
-                        except:
+                        except Exception:
                             needs_refresh = True
-                    
+
                     if needs_refresh:
                         # Generate new token via test connection
                         test_individual_api_config(
@@ -447,37 +452,37 @@ def check_and_refresh_token():
                             config_name=config.configuration_name
                         )
                         frappe.logger().info(f"Token refreshed for {config.configuration_name}")
-                        
+
                 except Exception as e:
-                    frappe.logger().error(f"Error refreshing token for {config.configuration_name}: {str(e)}")
+                    frappe.logger().error(f"Error refreshing token for {config.configuration_name}: {e!s}")
         else:
             # Fallback to old single-device token refresh
             current_token = settings.get_password('token')
             if not current_token or (settings.token_expires and get_datetime(settings.token_expires) <= now_datetime()):
                 settings.generate_token()
-            
+
     except Exception as e:
-        frappe.logger().error(f"Error in check_and_refresh_token: {str(e)}")
+        frappe.logger().error(f"Error in check_and_refresh_token: {e!s}")
 
 def auto_generate_token():
     """Scheduled function to auto-generate token for CrossChex Cloud API"""
     try:
         if not frappe.db.exists("DocType", "Crosschex Settings"):
             return
-        
+
         settings = frappe.get_single("Crosschex Settings")
         if not settings.enable_realtime_sync:
             return
-        
+
         # Check if we have valid credentials
         if not (settings.crosschex_username and settings.get_password('crosschex_password')):
             frappe.logger().info("CrossChex credentials not configured, skipping auto token generation")
             return
-        
+
         # Check if token needs refresh (expires within next 30 minutes)
         current_token = settings.get_password('token')
         token_expired = False
-        
+
         if not current_token:
             token_expired = True
         elif settings.token_expires:
@@ -485,14 +490,14 @@ def auto_generate_token():
             expiry_time = get_datetime(settings.token_expires)
             current_time = now_datetime()
             time_until_expiry = expiry_time - current_time
-            
+
             if time_until_expiry.total_seconds() <= 1800:  # 30 minutes
                 token_expired = True
-        
+
         if token_expired:
             frappe.logger().info("Auto-generating new CrossChex token")
             settings.generate_token()
-            
+
             # Create log entry for auto token generation
             if frappe.db.exists("DocType", "Crosschex Log"):
                 log = frappe.get_doc({
@@ -506,10 +511,10 @@ def auto_generate_token():
                 })
                 log.insert(ignore_permissions=True)
                 frappe.db.commit()
-            
+
     except Exception as e:
-        frappe.logger().error(f"Error in auto_generate_token: {str(e)}")
-        
+        frappe.logger().error(f"Error in auto_generate_token: {e!s}")
+
         # Create error log entry
         if frappe.db.exists("DocType", "Crosschex Log"):
             try:
@@ -519,39 +524,40 @@ def auto_generate_token():
                     "method": "POST",
                     "status": "Error",
                     "sync_type": "Auto Token Generation",
-                    "message": f"Error in auto token generation: {str(e)}",
+                    "message": f"Error in auto token generation: {e!s}",
                     "error_details": str(e),
                     "processing_time": 0
                 })
                 error_log.insert(ignore_permissions=True)
                 frappe.db.commit()
-            except:
+            except Exception:
                 pass  # Don't fail if logging fails
 @frappe.whitelist()
 def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
     """Sync attendance data from a specific CrossChex device configuration"""
     try:
         import uuid
+
         from hamptons.crosschex_cloud.api.attendance import create_attendance_log
-        
+
         # Retrieve the actual password from the child table row
         try:
             config_doc = frappe.get_doc("CrossChex API Configuration", config_row_name)
             api_secret = config_doc.get_password('api_secret')
         except Exception as e:
-            return {"success": False, "error": f"Failed to retrieve API Secret: {str(e)}"}
-        
+            return {"success": False, "error": f"Failed to retrieve API Secret: {e!s}"}
+
         if not api_secret:
             return {"success": False, "error": "API Secret not found. Please enter the API Secret and save the document first."}
-        
+
         # Ensure API URL ends with /
         if not api_url.endswith('/'):
             api_url += '/'
-        
+
         # Step 1: Generate or retrieve token
         token = config_doc.get_password('token')
         token_expires = config_doc.token_expires
-        
+
         # Check if token is valid
         needs_new_token = True
         if token and token_expires:
@@ -559,13 +565,13 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                 expires_dt = get_datetime(token_expires)
                 if expires_dt > now_datetime():
                     needs_new_token = False
-            except:
+            except Exception:
                 pass
-        
+
         # Generate new token if needed
         if needs_new_token:
             request_id = str(uuid.uuid4())
-            
+
             payload = {
                 "header": {
                     "nameSpace": "authorize.token",
@@ -579,47 +585,47 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                     "api_secret": api_secret
                 }
             }
-            
+
             response = requests.post(
                 api_url,
                 json=payload,
                 headers={'Content-Type': 'application/json'},
                 timeout=30
             )
-            
+
             if response.status_code == 200:
                 data = response.json()
-                
+
                 # Check for error response
                 if 'header' in data and data['header'].get('nameSpace') == 'System':
                     error_type = data.get('payload', {}).get('type', 'Unknown')
                     error_message = data.get('payload', {}).get('message', 'Unknown error')
                     return {"success": False, "error": f"Authentication failed: {error_type} - {error_message}"}
-                
+
                 # Success response
                 elif 'payload' in data and 'token' in data['payload']:
                     token = data['payload']['token']
                     expires_raw = data['payload'].get('expires')
-                    
+
                     # Save token to database
                     config_doc.db_set('token', token, update_modified=False)
-                    
+
                     if expires_raw:
                         try:
                             from dateutil import parser
                             dt = parser.parse(expires_raw)
                             expires_formatted = dt.strftime('%Y-%m-%d %H:%M:%S')
                             config_doc.db_set('token_expires', expires_formatted, update_modified=False)
-                        except:
+                        except Exception:
                             pass
-                    
+
                     config_doc.db_set('last_token_generated', now_datetime(), update_modified=False)
                     frappe.db.commit()
                 else:
                     return {"success": False, "error": "Failed to generate token"}
             else:
                 return {"success": False, "error": f"API returned status {response.status_code}"}
-        
+
         # Step 2: Fetch attendance data
         end_time = datetime.utcnow()
         # Use last sync time if available, otherwise fetch last 7 days
@@ -632,17 +638,17 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                 # Convert to UTC
                 if begin_time > end_time:
                     begin_time = end_time - timedelta(days=7)
-            except:
+            except Exception:
                 begin_time = end_time - timedelta(days=7)
         else:
             # Initial sync: get last 30 days of data
             begin_time = end_time - timedelta(days=30)
-        
+
         begin_time_str = begin_time.strftime("%Y-%m-%dT%H:%M:%S+00:00")
         end_time_str = end_time.strftime("%Y-%m-%dT%H:%M:%S+00:00")
-        
+
         request_id = str(uuid.uuid4())
-        
+
         payload = {
             "header": {
                 "nameSpace": "attendance.record",
@@ -663,45 +669,45 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                 "per_page": 1000
             }
         }
-        
+
         response = requests.post(
             api_url,
             json=payload,
             headers={'Content-Type': 'application/json'},
             timeout=30
         )
-        
+
         if response.status_code != 200:
             return {"success": False, "error": f"Failed to fetch attendance data: {response.status_code}"}
-        
+
         data = response.json()
-        
+
         if 'payload' not in data or 'list' not in data['payload']:
             return {"success": False, "error": "No attendance data in response"}
-        
+
         records = data['payload']['list']
-        
+
         # Log sync summary as info (not error)
         if records:
             frappe.logger().info(
                 f"CrossChex Sync: Fetched {len(records)} records from {config_name or api_url} "
                 f"(first: {records[0].get('checktime', 'N/A')}, last: {records[-1].get('checktime', 'N/A')})"
             )
-        
+
         # Step 3: Process attendance records
         processed_count = 0
         errors = []
-        
+
         for record in records:
             try:
                 # Transform API response format to webhook format expected by create_attendance_log
                 # API format: {"emp_pin": "1040", "checktime": "...", "check_type": 0, ...}
                 # Webhook format: {"employee": {"workno": "1040"}, "checktime": "...", "checktype": 0, ...}
-                
+
                 # Try to extract employee identifier from multiple possible field names
                 employee_id = (
-                    record.get("emp_pin") or 
-                    record.get("employee_id") or 
+                    record.get("emp_pin") or
+                    record.get("employee_id") or
                     record.get("empno") or
                     record.get("emp_code") or
                     record.get("pin") or
@@ -710,7 +716,7 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                     (record.get("employee", {}).get("pin") if isinstance(record.get("employee"), dict) else None) or
                     (record.get("employee", {}).get("emp_pin") if isinstance(record.get("employee"), dict) else None)
                 )
-                
+
                 # Log the record if employee_id is missing to help debug
                 if not employee_id:
                     frappe.log_error(
@@ -719,7 +725,7 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                     )
                     errors.append("Missing employee identifier in record")
                     continue
-                
+
                 transformed_record = {
                     "employee": {
                         "workno": employee_id
@@ -729,28 +735,28 @@ def sync_individual_device(api_url, api_key, config_row_name, config_name=None):
                     "uuid": record.get("uuid") or record.get("id") or record.get("record_id"),
                     "device": record.get("device", {})
                 }
-                
+
                 create_attendance_log([transformed_record])
                 processed_count += 1
             except Exception as e:
-                errors.append(f"Error processing record: {str(e)}")
+                errors.append(f"Error processing record: {e!s}")
                 frappe.log_error(
-                    message=f"Failed to process record: {json.dumps(record, indent=2)}\nError: {str(e)}",
+                    message=f"Failed to process record: {json.dumps(record, indent=2)}\nError: {e!s}",
                     title="CrossChex Sync - Record Processing Error"
                 )
                 continue
-        
+
         # Update last sync time on the config row
         config_doc.db_set('last_sync_time', now_datetime(), update_modified=False)
         frappe.db.commit()
-        
+
         return {
             "success": True,
             "processed": processed_count,
             "errors": len(errors),
             "message": f"Successfully synced {processed_count} attendance records from {config_name or api_url}"
         }
-        
+
     except Exception as e:
-        frappe.log_error(f"Individual device sync failed: {str(e)}", "CrossChex Sync Error")
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        frappe.log_error(f"Individual device sync failed: {e!s}", "CrossChex Sync Error")
+        return {"success": False, "error": str(e)}
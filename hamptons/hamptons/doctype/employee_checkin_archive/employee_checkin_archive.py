@@ -0,0 +1,191 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""
+Archival of closed-period Employee Checkins.
+
+Checkins older than the archive boundary are moved, whole months at a time, from
+`tabEmployee Checkin` to `tabEmployee Checkin Archive`, so the hot table only holds
+the open periods its hooks, ingestion dedup and dashboards work on. The boundary is a
+date kept in the site defaults: every checkin before it is in the archive (or being
+moved there), every checkin after it is in the hot table.
+
+Readers that may reach before the boundary (the check-in report, the analytics raw
+scan and export, day summary rebuilds) select from `get_checkin_source`, which unions
+both tables, with the scan predicates inside each branch, only when the range needs
+it. The hourly rollup keeps the archived months, so the rollup based widgets are
+unaffected.
+
+site_config:
+	hamptons_checkin_archive_months		open months kept in the hot table, default 12
+"""
+
+import time
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_months, cint, get_first_day, getdate
+
+ARCHIVE_BOUNDARY_KEY = "hamptons_checkin_archive_boundary"
+DEFAULT_OPEN_MONTHS = 12
+ARCHIVE_CHUNK_SIZE = 5000
+# Seconds a scheduled run may move rows for, under the long queue's job timeout
+ARCHIVE_TIME_BUDGET = 20 * 60
+
+# Columns moved to the archive; the rest of the Employee Checkin columns are not read
+# by the archive readers
+ARCHIVE_COLUMNS = [
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"employee",
+	"employee_name",
+	"log_type",
+	"shift",
+	"time",
+	"device_id",
+	"skip_auto_attendance",
+	"attendance",
+]
+
+
+class EmployeeCheckinArchive(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Employee Checkin Archive", ["employee", "time"], "employee_time_index")
+
+
+def get_archive_boundary():
+	"""
+	First date still in the hot table.
+
+	Returns:
+		date: The boundary, or None when nothing was archived
+	"""
+	boundary = frappe.db.get_default(ARCHIVE_BOUNDARY_KEY)
+	return getdate(boundary) if boundary else None
+
+
+def get_checkin_source(from_date=None, conditions=None, order_by=None, limit=None):
+	"""
+	Table expression of the Employee Checkins of a range starting at `from_date`.
+
+	When the range reaches before the archive boundary both tables are read through a
+	UNION ALL. The union is a materialized derived table, so the scan predicates are
+	repeated inside each branch where they can use the (employee, time) index of each
+	table; the outer query keeps its own WHERE, ORDER BY and LIMIT.
+
+	Args:
+		from_date: First date read; None reads from the beginning
+		conditions: WHERE clause over the checkin columns only, with the alias `ec`
+		order_by: ORDER BY of each branch, for keyset pages
+		limit: LIMIT of each branch, with order_by
+
+	Returns:
+		str: The hot table, or the union of the hot and archive tables
+	"""
+	boundary = get_archive_boundary()
+	if not boundary or (from_date and getdate(from_date) >= boundary):
+		return "`tabEmployee Checkin`"
+
+	columns = ", ".join(f"ec.`{column}`" for column in ARCHIVE_COLUMNS)
+	clauses = ""
+	if conditions:
+		clauses += f" WHERE {conditions}"
+	if order_by:
+		clauses += f" ORDER BY {order_by}"
+		if limit:
+			clauses += f" LIMIT {limit}"
+
+	branches = [
+		f"(SELECT {columns} FROM `{table}` ec{clauses})"
+		for table in ("tabEmployee Checkin", "tabEmployee Checkin Archive")
+	]
+	return "(\n\t\t" + "\n\t\tUNION ALL\n\t\t".join(branches) + "\n\t)"
+
+
+def get_default_boundary():
+	"""First day of the oldest open month"""
+	months = cint(frappe.conf.get("hamptons_checkin_archive_months")) or DEFAULT_OPEN_MONTHS
+	return get_first_day(add_months(getdate(), -months))
+
+
+def archive_checkins(boundary=None, chunk_size=ARCHIVE_CHUNK_SIZE, deadline=None):
+	"""
+	Move the checkins before `boundary` to the archive.
+
+	The boundary is rounded down to a month start and only ever moves forward. It is
+	published first, so readers union both tables while the rows move; each chunk is
+	copied and deleted in one transaction, so a row is always in exactly one table. A
+	name collision with an archived row raises and rolls the chunk back. Rows
+	left when the deadline passes are moved by the next run; until then readers still
+	find them through the union.
+
+	Args:
+		boundary: First date kept in the hot table, default the oldest open month
+		chunk_size: Rows moved per transaction
+		deadline: time.monotonic() value after which no new chunk is started
+
+	Returns:
+		int: Number of checkins moved
+	"""
+	boundary = get_first_day(getdate(boundary) if boundary else get_default_boundary())
+	current = get_archive_boundary()
+	if current and boundary < current:
+		frappe.throw(
+			frappe._("The archive boundary can not move back from {0} to {1}").format(current, boundary)
+		)
+
+	frappe.db.set_default(ARCHIVE_BOUNDARY_KEY, str(boundary))
+	frappe.db.commit()
+
+	columns = ", ".join(f"`{column}`" for column in ARCHIVE_COLUMNS)
+	moved = 0
+	while True:
+		names = frappe.db.sql_list(
+			"""
+			SELECT name FROM `tabEmployee Checkin`
+			WHERE time < %s
+			ORDER BY time
+			LIMIT %s
+		""",
+			(boundary, chunk_size),
+		)
+		if not names:
+			break
+
+		placeholders = ", ".join(["%s"] * len(names))
+		# A plain INSERT: a name already in the archive fails the chunk instead of the
+		# DELETE below dropping a row that was never copied
+		frappe.db.sql(
+			f"""
+			INSERT INTO `tabEmployee Checkin Archive` ({columns})
+			SELECT {columns} FROM `tabEmployee Checkin` WHERE name IN ({placeholders})
+		""",
+			names,
+		)
+		frappe.db.sql(f"DELETE FROM `tabEmployee Checkin` WHERE name IN ({placeholders})", names)
+		frappe.db.commit()
+		moved += len(names)
+
+		if deadline and time.monotonic() >= deadline:
+			break
+
+	if moved:
+		frappe.logger().info(f"Archived {moved} Employee Checkins before {boundary}")
+
+	return moved
+
+
+def archive_closed_periods():
+	"""Scheduler: move the months that closed since the last run"""
+	try:
+		archive_checkins(deadline=time.monotonic() + ARCHIVE_TIME_BUDGET)
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(frappe.get_traceback(), "Employee Checkin Archive Error")
@@ -0,0 +1,256 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, get_datetime, getdate, now_datetime
+
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import get_archive_boundary
+
+ROLLUP_FIELDS = [
+	"name",
+	"checkin_date",
+	"hour",
+	"department",
+	"device_id",
+	"log_type",
+	"checkin_count",
+	"employee_count",
+	"employees",
+]
+
+
+class EmployeeCheckinRollup(Document):
+	pass
+
+
+def get_rollup_name(checkin_date, hour, department, device_id, log_type):
+	"""One row per (date, hour, department, device, log type) bucket"""
+	key = "\x1f".join(str(v or "") for v in (department, device_id, log_type))
+	return f"{getdate(checkin_date)}-{cint(hour):02d}-{hashlib.md5(key.encode()).hexdigest()[:10]}"
+
+
+def get_employee_set(row):
+	"""The distinct employees of a bucket"""
+	return set(row.employees.split("\n")) if row.employees else set()
+
+
+def add_checkin_to_rollup(checkin, department):
+	"""
+	Count a newly ingested Employee Checkin in its hourly bucket.
+
+	Args:
+		checkin: Employee Checkin document
+		department: Department of the employee at ingestion time
+	"""
+	punch_time = get_datetime(checkin.time)
+	device_id = checkin.get("device_id")
+	name = get_rollup_name(punch_time.date(), punch_time.hour, department, device_id, checkin.log_type)
+	now = now_datetime()
+
+	# Same pattern as the day summary: create the bucket if missing, then serialize
+	# concurrent punches on its row lock
+	frappe.db.sql(
+		"""
+		INSERT IGNORE INTO `tabEmployee Checkin Rollup`
+			(name, checkin_date, hour, department, device_id, log_type, checkin_count, employee_count,
+			creation, modified, owner, modified_by, docstatus)
+		VALUES (%s, %s, %s, %s, %s, %s, 0, 0, %s, %s, %s, %s, 0)
+	""",
+		(
+			name,
+			punch_time.date(),
+			punch_time.hour,
+			department,
+			device_id,
+			checkin.log_type,
+			now,
+			now,
+			frappe.session.user,
+			frappe.session.user,
+		),
+	)
+
+	row = frappe.db.sql(
+		"SELECT checkin_count, employees FROM `tabEmployee Checkin Rollup` WHERE name = %s FOR UPDATE",
+		(name,),
+		as_dict=True,
+	)[0]
+
+	employees = get_employee_set(row)
+	employees.add(checkin.employee)
+
+	frappe.db.set_value(
+		"Employee Checkin Rollup",
+		name,
+		{
+			"checkin_count": cint(row.checkin_count) + 1,
+			"employee_count": len(employees),
+			"employees": "\n".join(sorted(employees)),
+		},
+		update_modified=True,
+	)
+
+
+def get_rollup_rows(from_date, to_date, department=None):
+	"""Rollup buckets of a date range, optionally of one department"""
+	filters = {"checkin_date": ["between", [getdate(from_date), getdate(to_date)]]}
+	if department:
+		filters["department"] = department
+
+	return frappe.get_all("Employee Checkin Rollup", filters=filters, fields=ROLLUP_FIELDS)
+
+
+def ensure_checkin_rollup(from_date, to_date):
+	"""
+	Rebuild the rollup of every date whose check-in count no longer matches the raw
+	checkins (checkins written without hooks, deleted in bulk, ...).
+
+	Returns:
+		list: Dates that were rebuilt
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+
+	# Archived checkins are no longer in the table; their buckets are kept as they are
+	boundary = get_archive_boundary()
+	if boundary and from_date < boundary:
+		from_date = boundary
+	if from_date > to_date:
+		return []
+
+	checkin_counts = dict(
+		frappe.db.sql(
+			"""
+		SELECT DATE(time), COUNT(*)
+		FROM `tabEmployee Checkin`
+		WHERE time >= %s AND time < %s
+		GROUP BY DATE(time)
+	""",
+			(from_date, add_days(to_date, 1)),
+		)
+	)
+
+	rollup_counts = dict(
+		frappe.db.sql(
+			"""
+		SELECT checkin_date, SUM(checkin_count)
+		FROM `tabEmployee Checkin Rollup`
+		WHERE checkin_date BETWEEN %s AND %s
+		GROUP BY checkin_date
+	""",
+			(from_date, to_date),
+		)
+	)
+
+	stale = sorted(
+		getdate(d)
+		for d in set(checkin_counts) | set(rollup_counts)
+		if cint(checkin_counts.get(d)) != cint(rollup_counts.get(d))
+	)
+	for checkin_date in stale:
+		rebuild_checkin_rollup(checkin_date, checkin_date)
+
+	return stale
+
+
+def rebuild_checkin_rollup(from_date=None, to_date=None):
+	"""
+	Recompute the rollup from the raw checkins, by default for the whole table.
+	Departments are taken from the current Employee records.
+
+	Returns:
+		int: Number of buckets written
+	"""
+	# Buckets of archived checkins are kept, the raw rows are no longer here
+	boundary = get_archive_boundary()
+
+	if not from_date or not to_date:
+		first, last = frappe.db.sql("SELECT MIN(time), MAX(time) FROM `tabEmployee Checkin`")[0]
+		if not first:
+			frappe.db.delete(
+				"Employee Checkin Rollup", {"checkin_date": [">=", boundary]} if boundary else None
+			)
+			return 0
+		from_date = from_date or getdate(first)
+		to_date = to_date or getdate(last)
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	if boundary and from_date < boundary:
+		from_date = boundary
+	written = 0
+
+	# Month sized windows keep memory bounded when rebuilding years of punches
+	window_start = from_date
+	while window_start <= to_date:
+		window_end = min(add_days(window_start, 30), to_date)
+		written += _rebuild_window(window_start, window_end)
+		window_start = add_days(window_end, 1)
+
+	return written
+
+
+def daily_rollup_check():
+	"""Scheduler: repair the rollup of the last week"""
+	ensure_checkin_rollup(add_days(getdate(), -7), getdate())
+
+
+def _rebuild_window(from_date, to_date):
+	grouped = frappe.db.sql(
+		"""
+		SELECT
+			DATE(ec.time) as checkin_date,
+			HOUR(ec.time) as hour,
+			emp.department,
+			ec.device_id,
+			ec.log_type,
+			ec.employee,
+			COUNT(*) as checkin_count
+		FROM `tabEmployee Checkin` ec
+		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
+		WHERE ec.time >= %s AND ec.time < %s
+		GROUP BY DATE(ec.time), HOUR(ec.time), emp.department, ec.device_id, ec.log_type, ec.employee
+	""",
+		(from_date, add_days(to_date, 1)),
+		as_dict=True,
+	)
+
+	buckets = {}
+	for row in grouped:
+		name = get_rollup_name(row.checkin_date, row.hour, row.department, row.device_id, row.log_type)
+		if name not in buckets:
+			buckets[name] = frappe._dict(
+				name=name,
+				checkin_date=row.checkin_date,
+				hour=row.hour,
+				department=row.department,
+				device_id=row.device_id,
+				log_type=row.log_type,
+				checkin_count=0,
+				employees=set(),
+			)
+		buckets[name].checkin_count += row.checkin_count
+		buckets[name].employees.add(row.employee)
+
+	frappe.db.delete("Employee Checkin Rollup", {"checkin_date": ["between", [from_date, to_date]]})
+	if not buckets:
+		return 0
+
+	now = now_datetime()
+	fields = [*ROLLUP_FIELDS, "creation", "modified", "owner", "modified_by", "docstatus"]
+	rows = []
+	for bucket in buckets.values():
+		bucket.employee_count = len(bucket.employees)
+		bucket.employees = "\n".join(sorted(bucket.employees))
+		bucket.update(
+			creation=now,
+			modified=now,
+			owner=frappe.session.user,
+			modified_by=frappe.session.user,
+			docstatus=0,
+		)
+		rows.append(tuple(bucket.get(f) for f in fields))
+
+	frappe.db.bulk_insert("Employee Checkin Rollup", fields, rows)
+	return len(rows)
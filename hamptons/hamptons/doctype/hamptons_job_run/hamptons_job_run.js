@@ -0,0 +1,43 @@
+// Copyright (c) 2025, Hamptons and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on('Hamptons Job Run', {
+  setup: function(frm) {
+    // Progress is pushed by the background job, apply it without reloading the form.
+    // setup runs once per form, which is reused for every Job Run opened, so the
+    // listener is registered once and checks the run currently shown
+    frappe.realtime.on('hamptons_job_progress', function(data) {
+      if (!data || data.name !== frm.doc.name) return;
+
+      ['status', 'phase', 'processed', 'total', 'rate', 'eta_seconds', 'error_count', 'last_error'].forEach(function(field) {
+        if (data[field] !== undefined) frm.doc[field] = data[field];
+      });
+      frm.refresh_fields();
+      frm.trigger('show_progress');
+
+      if (['Completed', 'Failed'].includes(data.status)) {
+        frm.reload_doc();
+      }
+    });
+  },
+
+  refresh: function(frm) {
+    frm.trigger('show_progress');
+  },
+
+  show_progress: function(frm) {
+    frm.dashboard.clear_headline();
+    if (!frm.doc.total) return;
+
+    const percent = Math.min(100, (frm.doc.processed || 0) * 100 / frm.doc.total);
+    let message = __('{0} of {1} processed', [frm.doc.processed || 0, frm.doc.total]);
+    if (frm.doc.status === 'Running' && frm.doc.eta_seconds) {
+      message += ' · ' + __('about {0} remaining', [frappe.utils.get_formatted_duration(frm.doc.eta_seconds)]);
+    }
+    frm.dashboard.show_progress(__('Progress'), percent, message);
+  },
+
+  onload_post_render: function(frm) {
+    frm.disable_save();
+  }
+});
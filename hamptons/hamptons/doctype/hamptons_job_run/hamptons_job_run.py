@@ -0,0 +1,173 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+PROGRESS_EVENT = "hamptons_job_progress"
+
+
+class HamptonsJobRun(Document):
+	pass
+
+
+def create_job_run(job_name, total=0, phase=None, status="Queued"):
+	"""
+	Create the Hamptons Job Run record a background job reports its progress to.
+
+	Args:
+		job_name: Human readable job name
+		total: Number of items the job will process, if known
+		phase: Initial phase
+		status: Queued when created before enqueueing, Running when created by the job itself
+
+	Returns:
+		str: Name of the Hamptons Job Run
+	"""
+	job_run = frappe.get_doc(
+		{
+			"doctype": "Hamptons Job Run",
+			"job_name": job_name,
+			"status": status,
+			"phase": phase,
+			"total": cint(total),
+			"user": frappe.session.user,
+		}
+	)
+	job_run.insert(ignore_permissions=True)
+	return job_run.name
+
+
+class JobProgress:
+	"""
+	Low frequency progress reporting for long-running background jobs.
+
+	Progress is kept in memory and flushed at most every `interval` seconds (and on
+	phase changes, errors and completion) to the Hamptons Job Run record and to the
+	Desk via frappe.publish_realtime. The record update is not committed here, it
+	becomes visible with the job's own commits; the realtime push is immediate.
+
+	Usage:
+		progress = JobProgress("Attendance Sync", total=len(days))
+		for day in days:
+			...
+			progress.update(increment=1)
+		progress.finish(result)
+
+	Wrap the job body in `with progress.fail_on_error():` so an unexpected exception
+	marks the run Failed.
+	"""
+
+	def __init__(self, job_name=None, total=0, phase=None, job_run=None, interval=5):
+		if not job_run:
+			job_run = create_job_run(job_name, total, phase, status="Running")
+			# Make the run visible right away, before the job does any work
+			frappe.db.commit()
+
+		self.job_run = job_run
+		self.job_name = job_name or frappe.db.get_value("Hamptons Job Run", job_run, "job_name")
+		self.user = frappe.db.get_value("Hamptons Job Run", job_run, "user") or frappe.session.user
+		self.total = cint(total)
+		self.phase = phase
+		self.processed = 0
+		self.error_count = 0
+		self.last_error = None
+		self.interval = interval
+		self.started = time.monotonic()
+		self.last_flush = 0
+
+		self._flush({"status": "Running", "started_at": now_datetime()})
+
+	def update(self, processed=None, increment=0, phase=None, total=None, force=False):
+		"""
+		Record progress. Either pass the absolute `processed` count or an `increment`.
+		"""
+		if processed is not None:
+			self.processed = cint(processed)
+		self.processed += increment
+
+		if total is not None:
+			self.total = cint(total)
+
+		phase_changed = phase is not None and phase != self.phase
+		if phase_changed:
+			self.phase = phase
+
+		if force or phase_changed or time.monotonic() - self.last_flush >= self.interval:
+			self._flush()
+
+	def error(self, message):
+		"""Record an item level error; the job keeps running"""
+		self.error_count += 1
+		self.last_error = str(message)[:1000]
+		self._flush()
+
+	def finish(self, result=None):
+		"""Mark the run Completed and store its result"""
+		self._flush(
+			{
+				"status": "Completed",
+				"finished_at": now_datetime(),
+				"eta_seconds": 0,
+				"result": json.dumps(result, default=str, indent=1) if result is not None else None,
+			}
+		)
+
+	def fail(self, message):
+		"""Mark the run Failed; committed so it survives the job's rollback"""
+		self.error_count += 1
+		self.last_error = str(message)[:1000]
+		self._flush({"status": "Failed", "finished_at": now_datetime()})
+		frappe.db.commit()
+
+	@contextmanager
+	def fail_on_error(self):
+		"""
+		Mark the run Failed when the wrapped block raises, so it is not left Running,
+		then re-raise. The job's uncommitted work is rolled back first.
+
+		Usage:
+			with progress.fail_on_error():
+				...
+		"""
+		try:
+			yield self
+		except Exception as e:
+			frappe.db.rollback()
+			self.fail(str(e))
+			raise
+
+	def get_rate(self):
+		elapsed = time.monotonic() - self.started
+		return self.processed / elapsed if elapsed > 0 else 0
+
+	def get_eta(self):
+		rate = self.get_rate()
+		if not rate or not self.total:
+			return None
+		return int(max(self.total - self.processed, 0) / rate)
+
+	def _flush(self, extra=None):
+		self.last_flush = time.monotonic()
+
+		values = {
+			"phase": self.phase,
+			"processed": self.processed,
+			"total": self.total,
+			"rate": round(self.get_rate(), 2),
+			"eta_seconds": self.get_eta(),
+			"error_count": self.error_count,
+			"last_error": self.last_error,
+		}
+		values.update(extra or {})
+
+		frappe.db.set_value("Hamptons Job Run", self.job_run, values, update_modified=False)
+
+		payload = {k: v for k, v in values.items() if k != "result"}
+		payload.update({"name": self.job_run, "job_name": self.job_name})
+		frappe.publish_realtime(PROGRESS_EVENT, payload, user=self.user)
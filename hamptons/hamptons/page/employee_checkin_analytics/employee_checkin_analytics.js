@@ -35,6 +35,89 @@ class EmployeeCheckinAnalytics {
 		this.make_filters();
 		this.make_dashboard();
 		this.load_data();
+		this.subscribe_realtime();
+	}
+
+	subscribe_realtime() {
+		// New punches are pushed by the ingestion hook; apply them to the loaded data
+		// instead of re-querying
+		frappe.realtime.doctype_subscribe('Employee Checkin');
+		frappe.realtime.on('hamptons_checkin_delta', (delta) => this.apply_delta(delta));
+
+		// New regularizations of the loaded range are counted on the page indicator
+		frappe.realtime.doctype_subscribe('Attendance Regularization');
+		frappe.realtime.on('hamptons_regularization_delta', (delta) => this.apply_regularization_delta(delta));
+	}
+
+	apply_regularization_delta(delta) {
+		const filters = this.loaded_filters;
+		if (!filters) return;
+
+		// Regularizations carry no department, so only the date and employee filters apply
+		const matching = (delta.regularizations || []).filter(r =>
+			r.posting_date >= filters.from_date && r.posting_date <= filters.to_date
+			&& (!filters.employee || r.employee === filters.employee)
+		);
+		if (!matching.length) return;
+
+		this.new_regularizations = (this.new_regularizations || 0) + matching.length;
+		this.page.set_indicator(__('{0} new regularizations', [this.new_regularizations]), 'orange');
+	}
+
+	apply_delta(delta) {
+		const data = this.data;
+		const filters = this.loaded_filters;
+		if (!data || !filters) return;
+
+		if (delta.date < filters.from_date || delta.date > filters.to_date) return;
+		if (filters.employee && delta.employee !== filters.employee) return;
+		if (filters.department && delta.department !== filters.department) return;
+
+		const increment = (rows, key, value, extra) => {
+			let row = rows.find(r => r[key] === value);
+			if (!row) {
+				row = Object.assign({ [key]: value, count: 0 }, extra || {});
+				rows.push(row);
+			}
+			row.count += 1;
+			return row;
+		};
+
+		const days = frappe.datetime.get_day_diff(filters.to_date, filters.from_date) + 1;
+		data.summary.total_checkins = (data.summary.total_checkins || 0) + 1;
+		data.summary.avg_daily_checkins = Math.round(data.summary.total_checkins / days * 10) / 10;
+		// Distinct employees are only known exactly for a single day range
+		if (days === 1 && delta.first_of_day) {
+			data.summary.unique_employees = (data.summary.unique_employees || 0) + 1;
+		}
+
+		increment(data.daily_trend, 'date', delta.date);
+		data.daily_trend.sort((a, b) => (a.date > b.date ? 1 : -1));
+		increment(data.checkin_type, 'log_type', delta.log_type);
+		increment(data.hourly_distribution, 'hour', delta.hour);
+		data.hourly_distribution.sort((a, b) => a.hour - b.hour);
+		increment(data.department_wise, 'department', delta.department);
+		data.department_wise.sort((a, b) => b.count - a.count);
+		if (delta.device_id) {
+			increment(data.device_usage, 'device_id', delta.device_id);
+			data.device_usage.sort((a, b) => b.count - a.count);
+		}
+
+		const employee = data.top_employees.find(e => e.employee === delta.employee);
+		if (employee) {
+			employee.total += 1;
+			if (delta.log_type === 'IN') employee.check_ins += 1;
+			if (delta.log_type === 'OUT') employee.check_outs += 1;
+			data.top_employees.sort((a, b) => b.total - a.total);
+		}
+
+		// Punches arrive in bursts from the devices, redraw at most once a second
+		if (!this.render_timer) {
+			this.render_timer = setTimeout(() => {
+				this.render_timer = null;
+				this.render_dashboard(this.data);
+			}, 1000);
+		}
 	}
 
 	make_filters() {
@@ -238,17 +321,95 @@ class EmployeeCheckinAnalytics {
 		frappe.dom.freeze('Loading analytics...');
 		
 		const filters = this.get_filters();
+		// Widgets already loaded are sent with their ETag and only come back if changed
+		const etags = {};
+		if (this.data && this.widget_etags) {
+			Object.assign(etags, this.widget_etags);
+		}
 
 		frappe.call({
-			method: 'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.get_analytics_data',
-			args: { filters: filters },
+			method: 'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.get_analytics_widgets',
+			args: { filters: filters, etags: etags },
 			callback: (r) => {
 				frappe.dom.unfreeze();
-				if (r.message) {
-					this.render_dashboard(r.message);
+				if (r.message && r.message.queued) {
+					// Over the row limit: computed in the background and pushed when ready
+					this.pending_job_run = r.message.job_run;
+					frappe.show_alert({
+						message: __('Large range, the analytics are being computed in the background.'),
+						indicator: 'blue'
+					});
+				} else if (r.message) {
+					this.pending_job_run = null;
+					this.show_loaded(this.from_widgets(r.message), filters);
 				}
 			}
 		});
+		
+		if (!this.analytics_listener) {
+			this.analytics_listener = (result) => {
+				if (result.job_run !== this.pending_job_run) return;
+				this.pending_job_run = null;
+				this.widget_etags = {};
+				this.show_loaded(result.data, result.filters);
+			};
+			frappe.realtime.on('hamptons_checkin_analytics_ready', this.analytics_listener);
+		}
+	}
+
+	from_widgets(widgets) {
+		// Rebuild the row lists the charts render from the columnar widgets, keeping the
+		// loaded rows of widgets that were not modified
+		const labels = {
+			daily_trend: 'date',
+			checkin_type: 'log_type',
+			hourly_distribution: 'hour',
+			department_wise: 'department',
+			device_usage: 'device_id'
+		};
+		const data = Object.assign({}, this.data || {}, { approximate: widgets.approximate });
+		this.widget_etags = this.widget_etags || {};
+
+		Object.keys(widgets).forEach((widget) => {
+			const result = widgets[widget];
+			if (!result || !result.etag) return;
+
+			this.widget_etags[widget] = result.etag;
+			if (result.not_modified) return;
+
+			const columns = result.data;
+			if (widget === 'summary') {
+				data.summary = columns;
+			} else if (widget === 'top_employees') {
+				data.top_employees = (columns.employee || []).map((employee, i) => {
+					const row = {};
+					Object.keys(columns).forEach((field) => { row[field] = columns[field][i]; });
+					return row;
+				});
+			} else {
+				data[widget] = columns.labels.map((label, i) => ({
+					[labels[widget]]: label,
+					count: columns.values[i]
+				}));
+			}
+		});
+
+		return data;
+	}
+
+	show_loaded(data, filters) {
+		this.data = data;
+		this.loaded_filters = filters;
+		this.new_regularizations = 0;
+		this.page.clear_indicator();
+		this.render_dashboard(data);
+		
+		if (data.approximate) {
+			frappe.show_alert({
+				message: __('Large range: top employees are estimated from the hourly rollup.'),
+				indicator: 'orange'
+			});
+		}
 	}
 
 	render_dashboard(data) {
@@ -472,14 +633,37 @@ class EmployeeCheckinAnalytics {
 	export_to_excel() {
 		const filters = this.get_filters();
 		
-		frappe.call({
-			method: 'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.export_to_excel',
-			args: { filters: filters },
-			callback: (r) => {
-				if (r.message) {
-					window.open(r.message.file_url);
+		frappe.prompt({
+			fieldname: 'file_format',
+			label: __('Format'),
+			fieldtype: 'Select',
+			options: 'xlsx\ncsv',
+			default: 'xlsx'
+		}, (values) => {
+			frappe.call({
+				method: 'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.export_to_excel',
+				args: { filters: filters, file_format: values.file_format },
+				callback: (r) => {
+					if (r.message && r.message.queued) {
+						frappe.show_alert({
+							message: __('Export queued. You will be notified when the file is ready.'),
+							indicator: 'blue'
+						});
+					}
 				}
-			}
-		});
+			});
+		}, __('Export Check-ins'), __('Export'));
+		
+		if (!this.export_listener) {
+			// The file is written by a background job, which notifies the user when done
+			this.export_listener = (data) => {
+				frappe.msgprint({
+					title: __('Export Ready'),
+					indicator: 'green',
+					message: __('{0} rows exported. <a href="{1}" target="_blank">Download file</a>', [data.rows, data.file_url])
+				});
+			};
+			frappe.realtime.on('hamptons_checkin_export_ready', this.export_listener);
+		}
 	}
 }
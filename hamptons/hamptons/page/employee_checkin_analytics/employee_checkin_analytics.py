@@ -1,288 +1,698 @@
 # Copyright (c) 2024, Momscode and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+import os
+
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, add_days, now_datetime
-import json
+from frappe.utils import add_days, add_months, flt, get_first_day, getdate, now_datetime
+
+from hamptons.hamptons.dashboard_cache import get_checkin_scopes, get_generations, get_ttl
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import get_checkin_source
+from hamptons.hamptons.query_cost import estimate_checkin_rows, is_over_limit
+
+ANALYTICS_EVENT = "hamptons_checkin_analytics_ready"
 
 
 @frappe.whitelist()
-def get_analytics_data(filters):
-	"""Get comprehensive analytics data for employee check-ins"""
-	
+def get_analytics_data(filters, widgets=None):
+	"""
+	Get comprehensive analytics data for employee check-ins
+
+	Args:
+		filters: Analytics page filters
+		widgets: Widgets the caller needs, default all; on the rollup path the others
+			are not computed
+
+	Sources, first match wins: the columnar cache for ranges it holds, the hourly
+	rollup without an employee filter, the raw punches (in the background above the
+	row limit).
+	"""
+
 	if isinstance(filters, str):
 		filters = json.loads(filters)
-	
+
 	from_date = filters.get('from_date')
 	to_date = filters.get('to_date')
 	employee = filters.get('employee')
 	department = filters.get('department')
-	
-	# Build filter conditions
-	conditions = ["ec.time BETWEEN %(from_date)s AND %(to_date)s"]
-	values = {'from_date': from_date, 'to_date': to_date}
-	
-	if employee:
-		conditions.append("ec.employee = %(employee)s")
-		values['employee'] = employee
-	
-	if department:
-		conditions.append("emp.department = %(department)s")
-		values['department'] = department
-	
-	where_clause = " AND ".join(conditions)
-	
-	return {
-		'summary': get_summary_stats(where_clause, values),
-		'daily_trend': get_daily_trend(where_clause, values),
-		'checkin_type': get_checkin_type_distribution(where_clause, values),
-		'hourly_distribution': get_hourly_distribution(where_clause, values),
-		'department_wise': get_department_wise_stats(where_clause, values),
-		'top_employees': get_top_employees(where_clause, values),
-		'device_usage': get_device_usage(where_clause, values)
+
+	from hamptons.hamptons import checkin_columns
+
+	# Recent ranges, with or without filters, are answered exactly from the in-memory
+	# columnar cache when the site enabled it
+	if checkin_columns.is_enabled():
+		data = checkin_columns.get_columnar_analytics(from_date, to_date, employee, department)
+		if data:
+			return data
+
+	# Otherwise, without an employee filter every widget but the top employees can be
+	# served from the hourly rollup instead of the raw punches
+	if not employee and frappe.db.exists("DocType", "Employee Checkin Rollup"):
+		# Both dates are inclusive
+		conditions = ["ec.time >= %(from_date)s", "ec.time < %(to_date_exclusive)s"]
+		values = {'from_date': from_date, 'to_date_exclusive': add_days(getdate(to_date), 1)}
+
+		if department:
+			conditions.append("emp.department = %(department)s")
+			values['department'] = department
+
+		needs_top_employees = not widgets or 'top_employees' in widgets
+		needs_rollup = not widgets or any(widget != 'top_employees' for widget in widgets)
+
+		# The top employees need the raw punches; above the row limit they are
+		# estimated from the rollup instead
+		if needs_top_employees and is_over_limit(from_date, to_date):
+			data = get_rollup_analytics(from_date, to_date, department, estimate_top_employees=True)
+			data['approximate'] = 1
+			return data
+
+		data = get_rollup_analytics(from_date, to_date, department) if needs_rollup else {}
+		if needs_top_employees:
+			data['top_employees'] = get_top_employees(conditions, values)
+		return data
+
+	# The raw scan covers the previous period too; above the row limit it runs in the
+	# background and the result is pushed to the user
+	days = (getdate(to_date) - getdate(from_date)).days + 1
+	if is_over_limit(add_days(getdate(from_date), -days), to_date, employee):
+		from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+		job_run = create_job_run("Employee Checkin Analytics", phase=f"{from_date} to {to_date}")
+		frappe.enqueue(
+			'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.get_analytics_background',
+			queue='long',
+			timeout=3600,
+			filters=filters,
+			job_run=job_run
+		)
+		return {
+			'queued': True,
+			'job_run': job_run
+		}
+
+	return get_single_pass_analytics(from_date, to_date, employee, department)
+
+
+# Label column of the label/count widgets; top_employees is sent as one array per field
+WIDGET_LABELS = {
+	'daily_trend': 'date',
+	'checkin_type': 'log_type',
+	'hourly_distribution': 'hour',
+	'department_wise': 'department',
+	'device_usage': 'device_id'
+}
+WIDGETS = ['summary', *WIDGET_LABELS, 'top_employees']
+TOP_EMPLOYEE_FIELDS = ['employee', 'employee_name', 'department', 'check_ins', 'check_outs', 'total']
+
+
+# Filters every widget is computed from; other keys the page sends do not change them
+WIDGET_FILTERS = ['from_date', 'to_date', 'employee', 'department']
+
+
+@frappe.whitelist()
+def get_analytics_widgets(filters, widgets=None, etags=None):
+	"""
+	Analytics widgets in a compact columnar format, with ETags.
+
+	Every widget is tagged with a hash of the filters it is computed from and of the
+	check-in generations of the days it reads: the requested range, plus the previous
+	period for the summary. Widgets whose tag matches the one the page already holds
+	(`etags`, or the If-None-Match header for a single widget) are answered with
+	`not_modified`. The others are cached per widget, and only the widgets missing from
+	the cache are computed.
+
+	Args:
+		filters: Analytics page filters
+		widgets: Widgets to return, default all
+		etags: Dict of widget name to the ETag the page holds
+
+	Returns:
+		dict: Widget name to {etag, data} or {etag, not_modified}; or the queued job
+			when the range runs in the background
+	"""
+	filters = frappe._dict(frappe.parse_json(filters))
+	widgets = frappe.parse_json(widgets) if widgets else WIDGETS
+	etags = frappe.parse_json(etags) if etags else {}
+
+	for widget in widgets:
+		if widget not in WIDGETS:
+			frappe.throw(_("Unknown analytics widget: {0}").format(widget))
+
+	single = len(widgets) == 1
+	if single and not etags and frappe.get_request_header("If-None-Match"):
+		etags = {widgets[0]: frappe.get_request_header("If-None-Match").strip('"')}
+
+	widget_filters = frappe._dict({key: filters.get(key) for key in WIDGET_FILTERS if filters.get(key)})
+	filters_key = hashlib.md5(frappe.as_json(widget_filters).encode()).hexdigest()
+
+	result = {}
+	changed = []
+	for widget in widgets:
+		scopes = get_widget_scopes(widget, widget_filters)
+		generations = ".".join(str(g) for g in get_generations(scopes))
+		etag = hashlib.md5(f"{widget}:{filters_key}:{generations}".encode()).hexdigest()
+		if etags.get(widget) == etag:
+			result[widget] = {'etag': etag, 'not_modified': 1}
+		else:
+			result[widget] = {'etag': etag}
+			changed.append(widget)
+
+	if single and getattr(frappe.local, 'response_headers', None) is not None:
+		frappe.local.response_headers.set('ETag', f'"{result[widgets[0]]["etag"]}"')
+
+	if not changed:
+		return result
+
+	# The ETag covers the widget, its filters and generations, so it is the cache key too
+	cache = frappe.cache()
+	values = {
+		widget: cache.get_value(f"hamptons:cache:checkin_analytics_widget:{result[widget]['etag']}")
+		for widget in changed
 	}
 
+	missing = [widget for widget, value in values.items() if value is None]
+	if missing:
+		data = get_analytics_data(widget_filters, widgets=missing)
+		if data.get('queued'):
+			return data
 
-def get_summary_stats(where_clause, values):
-	"""Get summary statistics"""
-	
-	query = f"""
-		SELECT 
-			COUNT(*) as total_checkins,
-			COUNT(DISTINCT ec.employee) as unique_employees,
-			COUNT(DISTINCT ec.device_id) as total_devices
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
+		for widget in missing:
+			# Only the top employees are ever estimated
+			values[widget] = {
+				'rows': data.get(widget) or [],
+				'approximate': data.get('approximate') if widget == 'top_employees' else None
+			}
+			cache.set_value(
+				f"hamptons:cache:checkin_analytics_widget:{result[widget]['etag']}",
+				values[widget],
+				expires_in_sec=get_ttl(widget_filters.to_date)
+			)
+
+	for widget, value in values.items():
+		result[widget]['data'] = to_columns(widget, value['rows'])
+	result['approximate'] = 1 if any(value['approximate'] for value in values.values()) else None
+
+	return result
+
+
+def get_widget_scopes(widget, filters):
 	"""
-	
-	result = frappe.db.sql(query, values, as_dict=True)
-	stats = result[0] if result else {}
-	
-	# Calculate average daily check-ins
-	from_date = getdate(values['from_date'])
-	to_date = getdate(values['to_date'])
-	days = (to_date - from_date).days + 1
-	
-	avg_daily = flt(stats.get('total_checkins', 0)) / days if days > 0 else 0
-	
-	# Calculate change from previous period
-	prev_from = add_days(from_date, -days)
-	prev_to = add_days(from_date, -1)
-	
-	prev_query = f"""
-		SELECT COUNT(*) as prev_count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE ec.time BETWEEN %(prev_from)s AND %(prev_to)s
+	Check-in generation scopes of the days a widget reads: whole months by their month
+	scope, the days of partially covered months by their day scopes.
 	"""
-	
-	if values.get('employee'):
-		prev_query += " AND ec.employee = %(employee)s"
-	if values.get('department'):
-		prev_query += " AND emp.department = %(department)s"
-	
-	prev_values = values.copy()
-	prev_values.update({'prev_from': prev_from, 'prev_to': prev_to})
-	
-	prev_result = frappe.db.sql(prev_query, prev_values, as_dict=True)
-	prev_count = prev_result[0].get('prev_count', 0) if prev_result else 0
-	
+	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
+	if widget == 'summary':
+		# The change percentage compares with the period before
+		from_date = add_days(from_date, -((to_date - from_date).days + 1))
+
+	scopes = []
+	month = get_first_day(from_date)
+	while month <= to_date:
+		next_month = add_months(month, 1)
+		if month >= from_date and add_days(next_month, -1) <= to_date:
+			scopes.append(get_checkin_scopes(month)[1])
+		else:
+			day = max(month, from_date)
+			while day < next_month and day <= to_date:
+				scopes.append(get_checkin_scopes(day)[0])
+				day = add_days(day, 1)
+		month = next_month
+
+	return scopes
+
+
+def to_columns(widget, rows):
+	"""Widget rows as column arrays"""
+	if widget == 'summary':
+		return rows
+
+	if widget == 'top_employees':
+		return {field: [row.get(field) for row in rows] for field in TOP_EMPLOYEE_FIELDS}
+
+	label = WIDGET_LABELS[widget]
+	return {
+		'labels': [row.get(label) for row in rows],
+		'values': [row.get('count') for row in rows]
+	}
+
+
+def get_analytics_background(filters, job_run=None):
+	"""Compute the raw analytics of a range over the row limit and push them to the user"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+	progress = JobProgress("Employee Checkin Analytics", total=1, phase="Scanning", job_run=job_run)
+
+	try:
+		data = get_single_pass_analytics(
+			filters.get('from_date'),
+			filters.get('to_date'),
+			filters.get('employee'),
+			filters.get('department')
+		)
+	except Exception:
+		frappe.log_error(frappe.get_traceback(), "Employee Checkin Analytics Error")
+		progress.fail(_("Analytics failed, see the Error Log"))
+		return
+
+	progress.update(processed=1)
+	progress.finish({'total_checkins': data['summary']['total_checkins']})
+	frappe.db.commit()
+
+	frappe.publish_realtime(
+		ANALYTICS_EVENT,
+		{'job_run': progress.job_run, 'filters': filters, 'data': data},
+		user=progress.user
+	)
+
+
+def make_summary(total_checkins, unique_employees, total_devices, prev_count, days):
+	"""Summary card values, with the daily average and the change from the previous period"""
+	avg_daily = flt(total_checkins) / days if days > 0 else 0
+
 	change_percentage = 0
 	if prev_count > 0:
-		change_percentage = round(((stats.get('total_checkins', 0) - prev_count) / prev_count) * 100, 1)
-	
+		change_percentage = round(((total_checkins - prev_count) / prev_count) * 100, 1)
+
 	return {
-		'total_checkins': stats.get('total_checkins', 0),
-		'unique_employees': stats.get('unique_employees', 0),
-		'total_devices': stats.get('total_devices', 0),
+		'total_checkins': total_checkins,
+		'unique_employees': unique_employees,
+		'total_devices': total_devices,
 		'avg_daily_checkins': round(avg_daily, 1),
 		'change_percentage': change_percentage
 	}
 
 
-def get_daily_trend(where_clause, values):
-	"""Get daily check-in trend"""
-	
-	query = f"""
-		SELECT 
-			DATE(ec.time) as date,
-			COUNT(*) as count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
-		GROUP BY DATE(ec.time)
-		ORDER BY date
+def get_rollup_analytics(from_date, to_date, department=None, estimate_top_employees=False):
 	"""
-	
-	return frappe.db.sql(query, values, as_dict=True)
+	Summary, trend, type, hourly, department and device widgets aggregated from the
+	Employee Checkin Rollup. Distinct employees are the union of the bucket employee
+	sets, so the count is exact. Departments are the ones recorded at ingestion.
 
-
-def get_checkin_type_distribution(where_clause, values):
-	"""Get check-in vs check-out distribution"""
-	
-	query = f"""
-		SELECT 
-			ec.log_type,
-			COUNT(*) as count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
-		GROUP BY ec.log_type
+	With `estimate_top_employees` the top employees are estimated too, splitting the
+	count of every bucket evenly across its employees.
 	"""
-	
-	return frappe.db.sql(query, values, as_dict=True)
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		get_employee_set,
+		get_rollup_rows,
+	)
 
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	days = (to_date - from_date).days + 1
 
-def get_hourly_distribution(where_clause, values):
-	"""Get hourly distribution of check-ins"""
-	
-	query = f"""
-		SELECT 
-			HOUR(ec.time) as hour,
-			COUNT(*) as count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
-		GROUP BY HOUR(ec.time)
-		ORDER BY hour
+	rows = get_rollup_rows(from_date, to_date, department)
+
+	by_date, by_type, by_hour, by_department, by_device = {}, {}, {}, {}, {}
+	by_employee = {}
+	employees = set()
+	total = 0
+	for row in rows:
+		count = row.checkin_count
+		total += count
+		bucket_employees = get_employee_set(row)
+		employees |= bucket_employees
+		if estimate_top_employees and bucket_employees:
+			share = count / len(bucket_employees)
+			for employee in bucket_employees:
+				totals = by_employee.setdefault(employee, {'IN': 0, 'OUT': 0, 'total': 0})
+				totals['total'] += share
+				if row.log_type in ('IN', 'OUT'):
+					totals[row.log_type] += share
+		by_date[row.checkin_date] = by_date.get(row.checkin_date, 0) + count
+		by_type[row.log_type] = by_type.get(row.log_type, 0) + count
+		by_hour[row.hour] = by_hour.get(row.hour, 0) + count
+		by_department[row.department] = by_department.get(row.department, 0) + count
+		if row.device_id is not None:
+			by_device[row.device_id] = by_device.get(row.device_id, 0) + count
+
+	prev_conditions = {"checkin_date": ["between", [add_days(from_date, -days), add_days(from_date, -1)]]}
+	if department:
+		prev_conditions["department"] = department
+	prev_count = frappe.get_all(
+		"Employee Checkin Rollup",
+		filters=prev_conditions,
+		fields=["sum(checkin_count) as prev_count"]
+	)[0].prev_count or 0
+
+	data = {
+		'summary': make_summary(total, len(employees), len(by_device), prev_count, days),
+		'daily_trend': [frappe._dict(date=d, count=by_date[d]) for d in sorted(by_date)],
+		'checkin_type': [frappe._dict(log_type=t, count=c) for t, c in by_type.items()],
+		'hourly_distribution': [frappe._dict(hour=h, count=by_hour[h]) for h in sorted(by_hour)],
+		'department_wise': top_counts(by_department, 'department'),
+		'device_usage': top_counts(by_device, 'device_id')
+	}
+
+	if estimate_top_employees:
+		top = sorted(by_employee.items(), key=lambda item: item[1]['total'], reverse=True)[:10]
+		details = {
+			e.name: e for e in frappe.get_all(
+				"Employee",
+				filters={"name": ["in", [employee for employee, _totals in top]]},
+				fields=["name", "employee_name", "department"]
+			)
+		} if top else {}
+		data['top_employees'] = [
+			frappe._dict(
+				employee=employee,
+				employee_name=details.get(employee, {}).get('employee_name'),
+				department=details.get(employee, {}).get('department'),
+				check_ins=round(totals['IN']),
+				check_outs=round(totals['OUT']),
+				total=round(totals['total'])
+			)
+			for employee, totals in top
+		]
+
+	return data
+
+
+def top_counts(counts, key, limit=10):
+	"""The `limit` largest counts as rows of {key: value, count}"""
+	ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:limit]
+	return [frappe._dict({key: value, 'count': count}) for value, count in ranked]
+
+
+def get_single_pass_analytics(from_date, to_date, employee=None, department=None):
 	"""
-	
-	return frappe.db.sql(query, values, as_dict=True)
+	Every widget from one scan of the raw checkins.
 
+	The scan covers the previous period and the requested range and is grouped on the
+	finest grain the widgets need (date, hour, log type, device, employee); summary,
+	trend, type split, hourly, department, top employees and device usage are folded
+	from those groups in one pass, and the previous period only adds to its count.
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	days = (to_date - from_date).days + 1
 
-def get_department_wise_stats(where_clause, values):
-	"""Get department-wise check-in statistics"""
-	
-	query = f"""
-		SELECT 
+	conditions = ["ec.time >= %(prev_from)s", "ec.time < %(to_date_exclusive)s"]
+	values = {'prev_from': add_days(from_date, -days), 'to_date_exclusive': add_days(to_date, 1)}
+
+	if employee:
+		conditions.append("ec.employee = %(employee)s")
+		values['employee'] = employee
+
+	if department:
+		conditions.append("emp.department = %(department)s")
+		values['department'] = department
+
+	groups = frappe.db.sql(f"""
+		SELECT
+			DATE(ec.time) as date,
+			HOUR(ec.time) as hour,
+			ec.log_type,
+			ec.device_id,
+			ec.employee,
+			emp.employee_name,
 			emp.department,
 			COUNT(*) as count
-		FROM `tabEmployee Checkin` ec
+		FROM {get_checkin_source(values['prev_from'], get_scan_conditions(conditions))} ec
 		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
-		GROUP BY emp.department
-		ORDER BY count DESC
-		LIMIT 10
-	"""
-	
-	return frappe.db.sql(query, values, as_dict=True)
+		WHERE {" AND ".join(conditions)}
+		GROUP BY DATE(ec.time), HOUR(ec.time), ec.log_type, ec.device_id, ec.employee
+	""", values, as_dict=True)
+
+	by_date, by_type, by_hour, by_department, by_device, by_employee = {}, {}, {}, {}, {}, {}
+	total = prev_count = 0
+	for row in groups:
+		count = row.count
+		if row.date < from_date:
+			prev_count += count
+			continue
+
+		total += count
+		by_date[row.date] = by_date.get(row.date, 0) + count
+		by_type[row.log_type] = by_type.get(row.log_type, 0) + count
+		by_hour[row.hour] = by_hour.get(row.hour, 0) + count
+		by_department[row.department] = by_department.get(row.department, 0) + count
+		if row.device_id is not None:
+			by_device[row.device_id] = by_device.get(row.device_id, 0) + count
+
+		if row.employee not in by_employee:
+			by_employee[row.employee] = frappe._dict(
+				employee=row.employee,
+				employee_name=row.employee_name,
+				department=row.department,
+				check_ins=0,
+				check_outs=0,
+				total=0
+			)
+		totals = by_employee[row.employee]
+		totals.total += count
+		if row.log_type == 'IN':
+			totals.check_ins += count
+		elif row.log_type == 'OUT':
+			totals.check_outs += count
+
+	return {
+		'summary': make_summary(total, len(by_employee), len(by_device), prev_count, days),
+		'daily_trend': [frappe._dict(date=d, count=by_date[d]) for d in sorted(by_date)],
+		# NULL log types sort first, as in the grouped query
+		'checkin_type': [
+			frappe._dict(log_type=t, count=by_type[t])
+			for t in sorted(by_type, key=lambda t: (t is not None, t or ''))
+		],
+		'hourly_distribution': [frappe._dict(hour=h, count=by_hour[h]) for h in sorted(by_hour)],
+		'department_wise': top_counts(by_department, 'department'),
+		'top_employees': sorted(by_employee.values(), key=lambda e: e.total, reverse=True)[:10],
+		'device_usage': top_counts(by_device, 'device_id')
+	}
 
 
-def get_top_employees(where_clause, values):
+def get_scan_conditions(conditions):
+	"""The conditions on checkin columns, which can be pushed into the checkin source"""
+	return " AND ".join(c for c in conditions if c.startswith("ec."))
+
+
+def get_top_employees(conditions, values):
 	"""Get top employees by check-in count"""
-	
+
 	query = f"""
-		SELECT 
+		SELECT
 			ec.employee,
 			emp.employee_name,
 			emp.department,
 			SUM(CASE WHEN ec.log_type = 'IN' THEN 1 ELSE 0 END) as check_ins,
 			SUM(CASE WHEN ec.log_type = 'OUT' THEN 1 ELSE 0 END) as check_outs,
 			COUNT(*) as total
-		FROM `tabEmployee Checkin` ec
+		FROM {get_checkin_source(values.get('from_date'), get_scan_conditions(conditions))} ec
 		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
+		WHERE {" AND ".join(conditions)}
 		GROUP BY ec.employee, emp.employee_name, emp.department
 		ORDER BY total DESC
 		LIMIT 10
 	"""
-	
+
 	return frappe.db.sql(query, values, as_dict=True)
 
 
-def get_device_usage(where_clause, values):
-	"""Get device usage statistics"""
-	
-	query = f"""
-		SELECT 
-			ec.device_id,
-			COUNT(*) as count
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause} AND ec.device_id IS NOT NULL
-		GROUP BY ec.device_id
-		ORDER BY count DESC
-		LIMIT 10
-	"""
-	
-	return frappe.db.sql(query, values, as_dict=True)
+EXPORT_HEADER = ['Time', 'Employee ID', 'Employee Name', 'Department', 'Designation', 'Type', 'Device ID', 'Skip Auto Attendance']
+EXPORT_EVENT = "hamptons_checkin_export_ready"
 
 
 @frappe.whitelist()
-def export_to_excel(filters):
-	"""Export analytics data to Excel"""
-	
+def export_to_excel(filters, file_format="xlsx"):
+	"""
+	Queue the export of the filtered checkins to a private file.
+
+	The file is written by a background job; the user is notified with its URL
+	through the EXPORT_EVENT realtime event once it is ready.
+
+	Returns:
+		dict: The Hamptons Job Run tracking the export
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+	frappe.has_permission("Employee Checkin", "export", throw=True)
+
 	if isinstance(filters, str):
 		filters = json.loads(filters)
-	
-	from frappe.utils.xlsxutils import make_xlsx
-	
-	# Get data
-	from_date = filters.get('from_date')
-	to_date = filters.get('to_date')
-	employee = filters.get('employee')
-	department = filters.get('department')
-	
-	conditions = ["time BETWEEN %(from_date)s AND %(to_date)s"]
-	values = {'from_date': from_date, 'to_date': to_date}
-	
-	if employee:
-		conditions.append("ec.employee = %(employee)s")
-		values['employee'] = employee
-	
-	if department:
-		conditions.append("ec.employee IN (SELECT name FROM `tabEmployee` WHERE department = %(department)s)")
-		values['department'] = department
-	
-	where_clause = " AND ".join(conditions)
-	
-	data = frappe.db.sql(f"""
-		SELECT 
-			ec.time,
-			ec.employee,
-			emp.employee_name,
-			emp.department,
-			emp.designation,
-			ec.log_type,
-			ec.device_id,
-			ec.skip_auto_attendance
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		WHERE {where_clause}
-		ORDER BY ec.time DESC
-	""", values, as_dict=True)
-	
-	# Prepare data for Excel
-	rows = [['Time', 'Employee ID', 'Employee Name', 'Department', 'Designation', 'Type', 'Device ID', 'Skip Auto Attendance']]
-	
-	for d in data:
-		rows.append([
-			str(d.get('time', '')),
-			d.get('employee', ''),
-			d.get('employee_name', ''),
-			d.get('department', ''),
-			d.get('designation', ''),
-			d.get('log_type', ''),
-			d.get('device_id', ''),
-			d.get('skip_auto_attendance', 0)
-		])
-	
-	# Create Excel file
-	xlsx_file = make_xlsx(rows, "Employee Checkin Analytics")
-	
-	# Save file
-	from frappe.utils.file_manager import save_file
-	
-	file_doc = save_file(
-		fname=f"Employee_Checkin_Analytics_{from_date}_to_{to_date}.xlsx",
-		content=xlsx_file.getvalue(),
-		dt="Page",
-		dn="employee-checkin-analytics",
-		is_private=1
+
+	if file_format not in ("xlsx", "csv"):
+		frappe.throw(_("Unsupported export format: {0}").format(file_format))
+
+	job_run = create_job_run(
+		"Employee Checkin Export",
+		phase=f"{filters.get('from_date')} to {filters.get('to_date')}"
+	)
+
+	frappe.enqueue(
+		'hamptons.hamptons.page.employee_checkin_analytics.employee_checkin_analytics.export_checkins_background',
+		queue='long',
+		timeout=3600,
+		filters=filters,
+		file_format=file_format,
+		job_run=job_run
 	)
-	
+
 	return {
-		'file_url': file_doc.file_url
+		'queued': True,
+		'job_run': job_run
+	}
+
+
+def export_checkins_background(filters, file_format="xlsx", job_run=None, chunk_size=5000):
+	"""
+	Write the filtered checkins to a private file with flat memory use.
+
+	Rows are read in keyset pages on (time, name), newest first, and appended to a
+	CSV writer or a write-only openpyxl worksheet, so only one page is held in memory
+	whatever the row count.
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+	from_date = filters.get('from_date')
+	to_date = filters.get('to_date')
+	conditions, values = get_export_conditions(filters)
+
+	# An estimate is enough for the progress bar and avoids an extra scan
+	total = estimate_checkin_rows(from_date, to_date, filters.get('employee'))
+
+	progress = JobProgress("Employee Checkin Export", total=total, phase="Writing", job_run=job_run)
+
+	file_name = f"Employee_Checkin_Analytics_{from_date}_to_{to_date}_{frappe.generate_hash(length=6)}.{file_format}"
+	path = frappe.get_site_path("private", "files", file_name)
+
+	try:
+		writer = ExportWriter(path, file_format)
+		writer.append(EXPORT_HEADER)
+
+		for rows in iter_export_chunks(conditions, values, chunk_size):
+			for d in rows:
+				writer.append([
+					str(d.time),
+					d.employee,
+					d.employee_name or '',
+					d.department or '',
+					d.designation or '',
+					d.log_type or '',
+					d.device_id or '',
+					d.skip_auto_attendance or 0
+				])
+			progress.update(increment=len(rows))
+
+		writer.close()
+
+		file_doc = frappe.get_doc({
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"attached_to_doctype": "Page",
+			"attached_to_name": "employee-checkin-analytics",
+			"is_private": 1
+		})
+		file_doc.insert(ignore_permissions=True)
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(frappe.get_traceback(), "Employee Checkin Export Error")
+		if os.path.exists(path):
+			os.remove(path)
+		progress.fail(_("Export failed, see the Error Log"))
+		return
+
+	result = {'file_url': file_doc.file_url, 'rows': progress.processed}
+	progress.finish(result)
+	frappe.db.commit()
+
+	frappe.publish_realtime(EXPORT_EVENT, dict(result, job_run=progress.job_run), user=progress.user)
+
+
+def get_export_conditions(filters):
+	"""WHERE conditions and values of the export; both dates are inclusive"""
+	conditions = ["ec.time >= %(from_date)s", "ec.time < %(to_date_exclusive)s"]
+	values = {
+		'from_date': filters.get('from_date'),
+		'to_date_exclusive': add_days(getdate(filters.get('to_date')), 1)
 	}
+
+	if filters.get('employee'):
+		conditions.append("ec.employee = %(employee)s")
+		values['employee'] = filters.get('employee')
+
+	if filters.get('department'):
+		conditions.append("emp.department = %(department)s")
+		values['department'] = filters.get('department')
+
+	return conditions, values
+
+
+def iter_export_chunks(conditions, values, chunk_size):
+	"""Yield the export rows page by page, continuing after the last (time, name) seen"""
+	cursor = None
+	# Each branch of an archive union can stop at one page only when no condition on the
+	# joined employee drops rows after it
+	push_page = all(c.startswith("ec.") for c in conditions)
+	while True:
+		page_conditions = list(conditions)
+		page_values = dict(values, limit=chunk_size)
+		if cursor:
+			page_conditions.append("(ec.time < %(cursor_time)s OR (ec.time = %(cursor_time)s AND ec.name < %(cursor_name)s))")
+			page_values.update(cursor_time=cursor.time, cursor_name=cursor.name)
+
+		source = get_checkin_source(
+			values.get('from_date'),
+			get_scan_conditions(page_conditions),
+			order_by="ec.time DESC, ec.name DESC" if push_page else None,
+			limit="%(limit)s"
+		)
+
+		rows = frappe.db.sql(f"""
+			SELECT
+				ec.name,
+				ec.time,
+				ec.employee,
+				emp.employee_name,
+				emp.department,
+				emp.designation,
+				ec.log_type,
+				ec.device_id,
+				ec.skip_auto_attendance
+			FROM {source} ec
+			LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
+			WHERE {" AND ".join(page_conditions)}
+			ORDER BY ec.time DESC, ec.name DESC
+			LIMIT %(limit)s
+		""", page_values, as_dict=True)
+
+		if not rows:
+			return
+
+		yield rows
+
+		if len(rows) < chunk_size:
+			return
+		cursor = rows[-1]
+
+
+class ExportWriter:
+	"""Append-only row writer for CSV or write-only XLSX files"""
+
+	def __init__(self, path, file_format):
+		self.path = path
+		self.file_format = file_format
+
+		if file_format == "csv":
+			import csv
+
+			self.file = open(path, "w", newline="", encoding="utf-8")
+			self.writer = csv.writer(self.file)
+		else:
+			from openpyxl import Workbook
+
+			# Write-only workbooks stream rows to a temporary file instead of keeping cells
+			self.workbook = Workbook(write_only=True)
+			self.writer = self.workbook.create_sheet("Employee Checkin Analytics")
+
+	def append(self, row):
+		if self.file_format == "csv":
+			self.writer.writerow(row)
+		else:
+			self.writer.append(row)
+
+	def close(self):
+		if self.file_format == "csv":
+			self.file.close()
+		else:
+			self.workbook.save(self.path)
@@ -0,0 +1,69 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""
+Cost guard for the check-in analytics endpoints.
+
+Before scanning raw Employee Checkin rows an endpoint estimates how many rows the
+range holds: from the hourly rollup when it exists (one indexed read per bucket, no
+raw rows touched), otherwise from the optimizer's index statistics via EXPLAIN.
+Above the site's limit the endpoint answers from the rollup, flagged approximate
+where the answer is one, or moves the work to a background job.
+
+site_config:
+	hamptons_analytics_max_rows		rows a web request may scan, default 500000
+"""
+
+import frappe
+from frappe.utils import add_days, cint, getdate
+
+DEFAULT_MAX_ROWS = 500000
+
+
+def get_max_rows():
+	return cint(frappe.conf.get("hamptons_analytics_max_rows")) or DEFAULT_MAX_ROWS
+
+
+def estimate_checkin_rows(from_date, to_date, employee=None):
+	"""
+	Expected number of Employee Checkin rows of an inclusive date range.
+
+	Args:
+		from_date: First date
+		to_date: Last date
+		employee: Restrict the estimate to one employee
+
+	Returns:
+		int: Estimated row count
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+
+	if not employee and frappe.db.exists("DocType", "Employee Checkin Rollup"):
+		return cint(
+			frappe.db.sql(
+				"""
+			SELECT SUM(checkin_count)
+			FROM `tabEmployee Checkin Rollup`
+			WHERE checkin_date BETWEEN %s AND %s
+		""",
+				(from_date, to_date),
+			)[0][0]
+		)
+
+	conditions = ["time >= %(from_date)s", "time < %(to_date_exclusive)s"]
+	values = {"from_date": from_date, "to_date_exclusive": add_days(to_date, 1)}
+	if employee:
+		conditions.append("employee = %(employee)s")
+		values["employee"] = employee
+
+	plan = frappe.db.sql(
+		f"EXPLAIN SELECT name FROM `tabEmployee Checkin` WHERE {' AND '.join(conditions)}",
+		values,
+		as_dict=True,
+	)
+	return cint(plan[0].rows) if plan else 0
+
+
+def is_over_limit(from_date, to_date, employee=None):
+	"""Whether scanning the range would exceed the site's row limit"""
+	return estimate_checkin_rows(from_date, to_date, employee) > get_max_rows()
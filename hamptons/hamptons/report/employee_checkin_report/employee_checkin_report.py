@@ -1,9 +1,31 @@
 # Copyright (c) 2024, Momscode and contributors
 # For license information, please see license.txt
 
+import hashlib
+
 import frappe
 from frappe import _
-from frappe.utils import getdate, get_datetime, formatdate, get_time_str
+from frappe.utils import (
+	add_days,
+	add_months,
+	formatdate,
+	get_datetime,
+	get_first_day,
+	get_last_day,
+	get_time_str,
+	getdate,
+)
+
+from hamptons.hamptons.dashboard_cache import (
+	PAST_DATE_TTL,
+	get_cached,
+	get_checkin_scopes,
+	get_regularization_scopes,
+)
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import (
+	get_archive_boundary,
+	get_checkin_source,
+)
 
 
 def execute(filters=None):
@@ -139,49 +161,84 @@ def get_columns():
 
 
 def get_data(filters):
-	"""Get the data for the report based on filters"""
-	conditions = get_conditions(filters)
-	
-	# Get employee check-ins with aggregated data
-	# Note: If all punches are IN type, we treat the last punch as OUT for reporting purposes
-	data = frappe.db.sql("""
-		SELECT
-			DATE(ec.time) as date,
-			ec.employee,
-			ec.employee_name,
-			emp.department,
-			emp.designation,
-			sa.shift_type as shift,
-			st.start_time as shift_start,
-			st.end_time as shift_end,
-			MIN(ec.time) as first_in,
-			MAX(CASE WHEN ec.log_type = 'OUT' THEN ec.time
-				ELSE (
-					SELECT MAX(ec2.time)
-					FROM `tabEmployee Checkin` ec2
-					WHERE ec2.employee = ec.employee
-						AND DATE(ec2.time) = DATE(ec.time)
-				)
-			END) as last_out,
-			COUNT(*) as total_checkins,
-			GROUP_CONCAT(DISTINCT ec.device_id ORDER BY ec.time SEPARATOR ', ') as device_id,
-			ar.name as regularization,
-			ar.status as regularization_status
-		FROM `tabEmployee Checkin` ec
-		LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
-		LEFT JOIN `tabShift Assignment` sa ON sa.employee = ec.employee
-			AND sa.docstatus = 1
-			AND sa.start_date <= DATE(ec.time)
-			AND (sa.end_date IS NULL OR sa.end_date >= DATE(ec.time))
-		LEFT JOIN `tabShift Type` st ON st.name = sa.shift_type
-		LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = ec.employee
-			AND ar.posting_date = DATE(ec.time)
-		WHERE 1=1 {conditions}
-		GROUP BY DATE(ec.time), ec.employee
-		ORDER BY DATE(ec.time) DESC, ec.employee_name
-	""".format(conditions=conditions), filters, as_dict=1)
-	
-	# Process the data to calculate working hours and late/early times
+	"""
+	Get the data for the report based on filters.
+
+	The range is computed month by month. Completed past months are cached as whole
+	month chunks keyed by the check-in and regularization generations of the month, so
+	re-running a long range only recomputes the current month and the months written
+	to since.
+	"""
+	filters = frappe._dict(filters or {})
+
+	if not (filters.get("from_date") and filters.get("to_date")):
+		return process_rows(get_rows(filters))
+
+	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
+	current_month_start = get_first_day(getdate())
+
+	data = []
+	# Latest month first, matching the date descending order of every chunk
+	for month_start in reversed(get_month_starts(from_date, to_date)):
+		if month_start < current_month_start:
+			rows = get_month_chunk(filters, month_start)
+			data.extend(row for row in rows if from_date <= getdate(row.date) <= to_date)
+		else:
+			month_filters = frappe._dict(
+				filters,
+				from_date=max(from_date, month_start),
+				to_date=min(to_date, get_last_day(month_start))
+			)
+			data.extend(process_rows(get_rows(month_filters)))
+
+	return data
+
+
+def get_month_starts(from_date, to_date):
+	"""First day of every month the range touches"""
+	month_starts = []
+	month_start = get_first_day(from_date)
+	while month_start <= to_date:
+		month_starts.append(month_start)
+		month_start = add_months(month_start, 1)
+
+	return month_starts
+
+
+def get_month_chunk(filters, month_start):
+	"""
+	Rows of a whole completed month for the non-date filters, from the cache.
+
+	Shift assignment and employee changes are not tracked by the generations; the
+	chunks of past months expire with the past date TTL.
+	"""
+	month = month_start.strftime("%Y-%m")
+	chunk_filters = {k: v for k, v in filters.items() if k not in ("from_date", "to_date") and v}
+	key = f"{month}:{hashlib.md5(frappe.as_json(chunk_filters).encode()).hexdigest()}"
+
+	def build():
+		month_filters = frappe._dict(chunk_filters, from_date=month_start, to_date=get_last_day(month_start))
+		return process_rows(get_rows(month_filters))
+
+	return get_cached(
+		"employee_checkin_report",
+		[get_checkin_scopes(month_start)[1], get_regularization_scopes(month_start)[0]],
+		build,
+		ttl=PAST_DATE_TTL,
+		key=key
+	)
+
+
+def get_rows(filters):
+	"""Employee-day rows of the filters, from the day summary when possible"""
+	if can_use_day_summary(filters):
+		return get_summary_data(filters)
+
+	return get_checkin_data(filters)
+
+
+def process_rows(data):
+	"""Calculate working hours and late/early times"""
 	for row in data:
 		# Calculate working hours
 		if row.get('first_in') and row.get('last_out'):
@@ -191,12 +248,12 @@ def get_data(filters):
 			row['working_hours'] = round(time_diff.total_seconds() / 3600, 2)
 		else:
 			row['working_hours'] = 0.0
-		
+
 		# Calculate late arrival
 		if row.get('first_in') and row.get('shift_start'):
 			first_in_dt = get_datetime(row['first_in'])
 			shift_start_dt = get_datetime(str(row['date']) + ' ' + str(row['shift_start']))
-			
+
 			if first_in_dt > shift_start_dt:
 				late_diff = first_in_dt - shift_start_dt
 				hours = int(late_diff.total_seconds() // 3600)
@@ -204,12 +261,12 @@ def get_data(filters):
 				row['late_by'] = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
 			else:
 				row['late_by'] = "On Time"
-		
+
 		# Calculate early exit
 		if row.get('last_out') and row.get('shift_end'):
 			last_out_dt = get_datetime(row['last_out'])
 			shift_end_dt = get_datetime(str(row['date']) + ' ' + str(row['shift_end']))
-			
+
 			if last_out_dt < shift_end_dt:
 				early_diff = shift_end_dt - last_out_dt
 				hours = int(early_diff.total_seconds() // 3600)
@@ -217,55 +274,221 @@ def get_data(filters):
 				row['early_exit_by'] = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
 			else:
 				row['early_exit_by'] = "On Time"
-	
+
 	return data
 
 
-def get_conditions(filters):
-	"""Build SQL conditions based on filters"""
+def can_use_day_summary(filters):
+	"""
+	Employee-day rows can be read from the Attendance Day Summary unless a filter needs
+	the individual punches (log type, device or the late-arrival punch check).
+	"""
+	if not (filters.get("from_date") and filters.get("to_date")):
+		return False
+
+	if not frappe.db.exists("DocType", "Attendance Day Summary"):
+		return False
+
+	# Day summaries are kept for the hot table only
+	boundary = get_archive_boundary()
+	if boundary and getdate(filters.get("from_date")) < boundary:
+		return False
+
+	return not any(filters.get(f) for f in ("log_type", "device_id", "show_only_late"))
+
+
+def get_summary_data(filters):
+	"""
+	Employee-day rows from the incrementally maintained Attendance Day Summary.
+	Overlapping shift assignments and several regularizations of a day are collapsed
+	to one row per employee-day, as in get_checkin_data.
+	"""
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import ensure_day_summaries
+
+	ensure_day_summaries(filters.get("from_date"), filters.get("to_date"))
+
+	conditions = get_summary_conditions(filters)
+	return frappe.db.sql(f"""
+		SELECT
+			s.attendance_date as date,
+			s.employee,
+			s.employee_name,
+			emp.department,
+			emp.designation,
+			sa.shift_type as shift,
+			st.start_time as shift_start,
+			st.end_time as shift_end,
+			s.first_punch as first_in,
+			s.last_punch as last_out,
+			s.punch_count * COUNT(*) as total_checkins,
+			REPLACE(s.devices, '\\n', ', ') as device_id,
+			ar.name as regularization,
+			ar.status as regularization_status
+		FROM `tabAttendance Day Summary` s
+		LEFT JOIN `tabEmployee` emp ON emp.name = s.employee
+		LEFT JOIN `tabShift Assignment` sa ON sa.employee = s.employee
+			AND sa.docstatus = 1
+			AND sa.start_date <= s.attendance_date
+			AND (sa.end_date IS NULL OR sa.end_date >= s.attendance_date)
+		LEFT JOIN `tabShift Type` st ON st.name = sa.shift_type
+		LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = s.employee
+			AND ar.posting_date = s.attendance_date
+		WHERE s.attendance_date BETWEEN %(from_date)s AND %(to_date)s {conditions}
+		GROUP BY s.attendance_date, s.employee
+		ORDER BY s.attendance_date DESC, s.employee_name
+	""", filters, as_dict=1)
+
+
+def get_summary_conditions(filters):
+	"""Build SQL conditions for the summary based query"""
 	conditions = []
-	
+
+	if filters.get("employee"):
+		conditions.append("s.employee = %(employee)s")
+
+	if filters.get("department"):
+		conditions.append("emp.department = %(department)s")
+
+	if filters.get("designation"):
+		conditions.append("emp.designation = %(designation)s")
+
+	if filters.get("shift"):
+		conditions.append("sa.shift_type = %(shift)s")
+
+	if filters.get("show_only_with_regularization"):
+		conditions.append("ar.name IS NOT NULL")
+
+	return " AND " + " AND ".join(conditions) if conditions else ""
+
+
+def get_checkin_data(filters):
+	"""
+	Employee-day rows aggregated from the individual Employee Checkin punches.
+
+	The punches of the range are aggregated once per employee-day in a CTE with range
+	predicates on time; conditional aggregates give both the values over the punches
+	matching the log type / device filters and the day wide values the last check-out
+	and the late filter need. Employee, shift and regularization are joined to the
+	aggregated days only.
+	"""
+	values = dict(filters)
+	scan_conditions, match_condition = get_checkin_scan_conditions(filters, values)
+
+	# Note: If any matching punch is not an OUT, the last punch of the day is reported
+	# as the check-out
+	data = frappe.db.sql("""
+		WITH day_checkins AS (
+			SELECT
+				ec.employee,
+				DATE(ec.time) as date,
+				MAX(ec.employee_name) as employee_name,
+				COUNT(CASE WHEN {match} THEN 1 END) as checkin_count,
+				MIN(CASE WHEN {match} THEN ec.time END) as first_in,
+				MAX(CASE WHEN {match} AND ec.log_type = 'OUT' THEN ec.time END) as last_out_punch,
+				MAX(CASE WHEN {match} AND NOT (ec.log_type <=> 'OUT') THEN 1 ELSE 0 END) as has_other_punch,
+				MAX(ec.time) as last_punch,
+				MAX(CASE WHEN ec.log_type = 'IN' THEN TIME(ec.time) END) as last_in_time,
+				GROUP_CONCAT(DISTINCT CASE WHEN {match} THEN ec.device_id END ORDER BY ec.time SEPARATOR ', ') as device_id
+			FROM {source} ec
+			WHERE {scan_conditions}
+			GROUP BY ec.employee, DATE(ec.time)
+		),
+		late_days AS (
+			SELECT DISTINCT d.employee, d.date
+			FROM day_checkins d
+			INNER JOIN `tabShift Assignment` sa2 ON sa2.employee = d.employee
+				AND sa2.docstatus = 1
+				AND sa2.start_date <= d.date
+				AND (sa2.end_date IS NULL OR sa2.end_date >= d.date)
+			INNER JOIN `tabShift Type` st2 ON st2.name = sa2.shift_type
+			WHERE d.last_in_time > st2.start_time
+		)
+		SELECT
+			d.date,
+			d.employee,
+			d.employee_name,
+			emp.department,
+			emp.designation,
+			sa.shift_type as shift,
+			st.start_time as shift_start,
+			st.end_time as shift_end,
+			d.first_in,
+			CASE WHEN d.has_other_punch THEN d.last_punch ELSE d.last_out_punch END as last_out,
+			d.checkin_count * COUNT(*) as total_checkins,
+			d.device_id,
+			ar.name as regularization,
+			ar.status as regularization_status
+		FROM day_checkins d
+		LEFT JOIN `tabEmployee` emp ON emp.name = d.employee
+		LEFT JOIN `tabShift Assignment` sa ON sa.employee = d.employee
+			AND sa.docstatus = 1
+			AND sa.start_date <= d.date
+			AND (sa.end_date IS NULL OR sa.end_date >= d.date)
+		LEFT JOIN `tabShift Type` st ON st.name = sa.shift_type
+		LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = d.employee
+			AND ar.posting_date = d.date
+		{late_join}
+		WHERE d.checkin_count > 0 {conditions}
+		GROUP BY d.date, d.employee
+		ORDER BY d.date DESC, d.employee_name
+	""".format(
+		match=match_condition,
+		source=get_checkin_source(filters.get("from_date"), scan_conditions),
+		scan_conditions=scan_conditions,
+		late_join="INNER JOIN late_days ld ON ld.employee = d.employee AND ld.date = d.date"
+			if filters.get("show_only_late") else "",
+		conditions=get_conditions(filters)
+	), values, as_dict=1)
+
+	return data
+
+
+def get_checkin_scan_conditions(filters, values):
+	"""
+	Conditions of the check-in scan: the date range (as range predicates on time) and
+	the employee restrict the scanned punches, the log type and device only decide
+	which punches are counted.
+
+	Returns:
+		tuple: (WHERE clause of the scan, condition matching the counted punches)
+	"""
+	conditions = ["1=1"]
+
 	if filters.get("from_date"):
-		conditions.append("DATE(ec.time) >= %(from_date)s")
-	
+		conditions.append("ec.time >= %(from_date)s")
+
 	if filters.get("to_date"):
-		conditions.append("DATE(ec.time) <= %(to_date)s")
-	
+		values["to_date_exclusive"] = add_days(getdate(filters.get("to_date")), 1)
+		conditions.append("ec.time < %(to_date_exclusive)s")
+
 	if filters.get("employee"):
 		conditions.append("ec.employee = %(employee)s")
-	
+
+	match = ["1=1"]
+
+	if filters.get("log_type"):
+		match.append("ec.log_type = %(log_type)s")
+
+	if filters.get("device_id"):
+		match.append("ec.device_id = %(device_id)s")
+
+	return " AND ".join(conditions), "(" + " AND ".join(match) + ")"
+
+
+def get_conditions(filters):
+	"""Build SQL conditions on the aggregated employee-days based on filters"""
+	conditions = []
+
 	if filters.get("department"):
 		conditions.append("emp.department = %(department)s")
-	
+
 	if filters.get("designation"):
 		conditions.append("emp.designation = %(designation)s")
-	
+
 	if filters.get("shift"):
 		conditions.append("sa.shift_type = %(shift)s")
-	
-	if filters.get("log_type"):
-		conditions.append("ec.log_type = %(log_type)s")
-	
-	if filters.get("device_id"):
-		conditions.append("ec.device_id = %(device_id)s")
-	
-	if filters.get("show_only_late"):
-		conditions.append("""
-			EXISTS (
-				SELECT 1 FROM `tabEmployee Checkin` ec2
-				INNER JOIN `tabShift Assignment` sa2 ON sa2.employee = ec2.employee 
-					AND sa2.docstatus = 1 
-					AND sa2.start_date <= DATE(ec2.time)
-					AND (sa2.end_date IS NULL OR sa2.end_date >= DATE(ec2.time))
-				INNER JOIN `tabShift Type` st2 ON st2.name = sa2.shift_type
-				WHERE ec2.employee = ec.employee
-					AND DATE(ec2.time) = DATE(ec.time)
-					AND ec2.log_type = 'IN'
-					AND TIME(ec2.time) > st2.start_time
-			)
-		""")
-	
+
 	if filters.get("show_only_with_regularization"):
 		conditions.append("ar.name IS NOT NULL")
-	
+
 	return " AND " + " AND ".join(conditions) if conditions else ""
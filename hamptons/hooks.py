@@ -85,7 +85,8 @@ doctype_js = {
 # ------------
 
 # before_install = "hamptons.install.before_install"
-# after_install = "hamptons.install.after_install"
+after_install = "hamptons.install.after_install"
+after_migrate = "hamptons.install.after_migrate"
 
 # Uninstallation
 # ------------
@@ -141,7 +142,17 @@ override_doctype_class = {
 
 doc_events = {
 	"Employee Checkin": {
-		"after_insert": "hamptons.overrides.employee_checkin.on_employee_checkin_submit"
+		"after_insert": [
+			"hamptons.overrides.employee_checkin.update_checkin_aggregates",
+			"hamptons.overrides.employee_checkin.on_employee_checkin_submit"
+		],
+		"on_update": "hamptons.overrides.employee_checkin.update_edited_checkin_aggregates",
+		"after_delete": "hamptons.overrides.employee_checkin.remove_checkin_from_aggregates"
+	},
+	"Attendance Regularization": {
+		"after_insert": "hamptons.hamptons.dashboard_realtime.on_regularization_insert",
+		"on_change": "hamptons.hamptons.dashboard_cache.on_regularization_change",
+		"after_delete": "hamptons.hamptons.dashboard_cache.on_regularization_change"
 	}
 }
 
@@ -163,6 +174,14 @@ scheduler_events = {
 	},
 	"hourly": [
 		"hamptons.hamptons.doctype.crosschex_settings.crosschex_settings.check_and_refresh_token"
+	],
+	"daily": [
+		# Repair the hourly check-in rollup of the last week
+		"hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup.daily_rollup_check"
+	],
+	"monthly_long": [
+		# Move the Employee Checkins of closed periods to the archive
+		"hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive.archive_closed_periods"
 	]
 }
 # scheduler_events = {
@@ -6,22 +6,21 @@ Import Opening Leave Balances and Allocate Leaves
 Run using: bench --site [site] execute hamptons.import_opening_leave_balances.allocate_leaves_with_opening_balance
 """
 
+from datetime import datetime
+
 import frappe
 from frappe import _
-from frappe.utils import today, getdate, add_days, add_years
-from datetime import datetime
+from frappe.utils import add_days, add_years, cint, flt, getdate, today
 
+from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
 
 # Annual Leave opening balances as of November 2025
 OPENING_BALANCES = {
-	"1016": 6,
 	"1002": 24,
 	"1037": 16,
-	"1017": 11.5,
 	"1056": 6,
 	"1004": 0,
 	"1011": 8,
-	"1026": -1,
 	"1034": 1.5,
 	"1048": 3.5,
 	"1007": 13,
@@ -60,7 +59,6 @@ OPENING_BALANCES = {
 	"1043": 22,
 	"1045": 5,
 	"1044": -1,
-	"1046": 10,
 	"1046": 8,
 	"1047": 30,
 	"1051": 13,
@@ -98,6 +96,14 @@ def get_leave_policy_details(policy_name="HR-LPOL-2025-00002"):
 	return leave_allocations
 
 
+# Leave Type restriction fields, by the Employee attribute they restrict
+LEAVE_TYPE_RULE_FIELDS = {
+	"gender": "custom_gender_specific",
+	"nationality": "custom_nationality_specific",
+	"religion": "custom_religion_specific"
+}
+
+
 def create_leave_allocation(employee_id, leave_type, leaves_allocated, from_date, to_date,
 							description="", carry_forward=False):
 	"""
@@ -116,58 +122,478 @@ def create_leave_allocation(employee_id, leave_type, leaves_allocated, from_date
 		Leave Allocation document or None
 	"""
 	try:
-		# Check if allocation already exists
-		existing = frappe.db.exists("Leave Allocation", {
-			"employee": employee_id,
-			"leave_type": leave_type,
-			"from_date": from_date,
-			"to_date": to_date,
-			"docstatus": ["<", 2]  # Not cancelled
-		})
-
-		if existing:
-			doc = frappe.get_doc("Leave Allocation", existing)
+		target = frappe._dict(
+			employee=employee_id,
+			leave_type=leave_type,
+			new_leaves_allocated=leaves_allocated,
+			description=description,
+			carry_forward=cint(carry_forward)
+		)
 
-			# If already submitted, cancel it first
-			if doc.docstatus == 1:
-				doc.cancel()
-				frappe.db.commit()
+		# Check if allocation already exists
+		existing = get_existing_allocations([target], from_date, to_date).get((employee_id, leave_type))
+		if existing and not get_allocation_changes(target, existing):
+			# Already allocated as requested; leave the ledger alone
+			return frappe.get_doc("Leave Allocation", existing.name)
 
-			# Update and resubmit
-			doc.new_leaves_allocated = leaves_allocated
-			doc.description = description
-			doc.carry_forward = carry_forward
-			doc.docstatus = 0  # Reset to draft
-		else:
-			# Create new allocation
-			doc = frappe.new_doc("Leave Allocation")
-			doc.employee = employee_id
-			doc.leave_type = leave_type
-			doc.from_date = from_date
-			doc.to_date = to_date
-			doc.new_leaves_allocated = leaves_allocated
-			doc.description = description
-			doc.carry_forward = carry_forward
-
-		# Save and submit
-		doc.save(ignore_permissions=True)
-		doc.submit()
+		doc = apply_leave_allocation(target, from_date, to_date, existing.name if existing else None)
 		frappe.db.commit()
 
 		return doc
 
 	except Exception as e:
 		frappe.log_error(
-			message=f"Error creating leave allocation for {employee_id} - {leave_type}: {str(e)}",
+			message=f"Error creating leave allocation for {employee_id} - {leave_type}: {e!s}",
 			title="Leave Allocation Error"
 		)
-		print(f"  ✗ Error: {str(e)}")
+		print(f"  ✗ Error: {e!s}")
 		frappe.db.rollback()
 		return None
 
 
+def apply_leave_allocation(target, from_date, to_date, existing=None):
+	"""
+	Create and submit a Leave Allocation, or update an existing one. Does not commit.
+
+	Args:
+		target: Dict with employee, leave_type, new_leaves_allocated, description and
+			carry_forward
+		from_date: Allocation from date
+		to_date: Allocation to date
+		existing: Name of the existing, not cancelled allocation of the period
+
+	Returns:
+		Leave Allocation document, the amendment when a submitted allocation changed
+	"""
+	if existing:
+		doc = frappe.get_doc("Leave Allocation", existing)
+
+		# A submitted allocation is cancelled and replaced by its amendment
+		if doc.docstatus == 1:
+			doc.cancel()
+			cancelled = doc
+			doc = frappe.copy_doc(cancelled)
+			doc.amended_from = cancelled.name
+
+		doc.new_leaves_allocated = target.new_leaves_allocated
+		doc.description = target.description
+		doc.carry_forward = target.carry_forward
+	else:
+		# Create new allocation
+		doc = frappe.new_doc("Leave Allocation")
+		doc.employee = target.employee
+		doc.leave_type = target.leave_type
+		doc.from_date = from_date
+		doc.to_date = to_date
+		doc.new_leaves_allocated = target.new_leaves_allocated
+		doc.description = target.description
+		doc.carry_forward = target.carry_forward
+
+	# Save and submit
+	doc.save(ignore_permissions=True)
+	doc.submit()
+
+	return doc
+
+
+def get_allocation_employees(employee=None):
+	"""Active employees (or one employee) with the attributes leave eligibility depends on"""
+	filters = {"name": employee} if employee else {"status": "Active"}
+	fields = ["name", "employee_name", "gender"]
+	has_custom_fields = frappe.db.has_column("Employee", "custom_nationality")
+	if has_custom_fields:
+		fields += ["custom_nationality", "custom_religion"]
+
+	employees = frappe.get_all("Employee", filters=filters, fields=fields)
+
+	if not has_custom_fields:
+		# Add empty custom fields
+		for emp in employees:
+			emp["custom_nationality"] = None
+			emp["custom_religion"] = None
+
+	return employees
+
+
+def get_leave_type_rules(leave_types):
+	"""
+	Gender, nationality and religion restriction of each leave type, in one query.
+
+	Returns:
+		dict: Leave type to {gender, nationality, religion}
+	"""
+	fields = ["name"] + [
+		field for field in LEAVE_TYPE_RULE_FIELDS.values() if frappe.db.has_column("Leave Type", field)
+	]
+	return {
+		row.name: frappe._dict({key: row.get(field) for key, field in LEAVE_TYPE_RULE_FIELDS.items()})
+		for row in frappe.get_all("Leave Type", filters={"name": ["in", leave_types]}, fields=fields)
+	}
+
+
+def get_ineligibility_reason(rule, gender, nationality, religion):
+	"""The restriction excluding an employee profile from a leave type, None when eligible"""
+	if rule.gender and rule.gender != "All" and rule.gender != gender:
+		return "Gender restriction"
+
+	if rule.nationality and rule.nationality != "All" and rule.nationality != nationality:
+		return "Nationality restriction"
+
+	if rule.religion == "All (Muslim)" and religion != "Muslim":
+		return "Religion restriction"
+	elif rule.religion == "Non-Muslim" and religion == "Muslim":
+		return "Religion restriction"
+
+	return None
+
+
+def get_employee_profile(emp):
+	return (emp.gender, emp.get("custom_nationality"), emp.get("custom_religion"))
+
+
+def build_eligibility_matrix(employees, leave_types):
+	"""
+	Eligibility of every (gender, nationality, religion) profile present among the
+	employees for every leave type, evaluated once per profile.
+
+	Returns:
+		dict: Profile to {leave type: ineligibility reason or None}
+	"""
+	rules = get_leave_type_rules(leave_types)
+	matrix = {}
+
+	for emp in employees:
+		profile = get_employee_profile(emp)
+		if profile not in matrix:
+			# Leave types missing from the rules fail at creation, as before
+			matrix[profile] = {
+				leave_type: get_ineligibility_reason(rules.get(leave_type, frappe._dict()), *profile)
+				for leave_type in leave_types
+			}
+
+	return matrix
+
+
+def plan_leave_allocations(employees, leave_allocations, policy_name):
+	"""
+	The allocations every employee should have, computed in memory.
+
+	Args:
+		employees: Employees from get_allocation_employees
+		leave_allocations: Leave types of the policy from get_leave_policy_details
+		policy_name: Leave Policy name, for the descriptions
+
+	Returns:
+		tuple: (list of target allocations, list of (employee, leave type, reason) skipped)
+	"""
+	matrix = build_eligibility_matrix(employees, [la["leave_type"] for la in leave_allocations])
+	targets = []
+	skipped = []
+
+	for emp in employees:
+		eligibility = matrix[get_employee_profile(emp)]
+
+		for leave_data in leave_allocations:
+			leave_type = leave_data["leave_type"]
+
+			reason = eligibility[leave_type]
+			if reason:
+				skipped.append((emp.name, leave_type, reason))
+				continue
+
+			# Determine allocation amount
+			if leave_type == "Annual Leave" and emp.name in OPENING_BALANCES:
+				# Use opening balance for Annual Leave
+				allocation = OPENING_BALANCES[emp.name]
+				description = f"Opening balance as of November 2025: {allocation} days"
+			else:
+				# Use standard allocation from policy
+				allocation = leave_data["annual_allocation"]
+				description = f"Annual allocation from {policy_name}"
+
+			# Skip if allocation is 0 or negative
+			if allocation <= 0:
+				skipped.append((emp.name, leave_type, f"Zero/Negative balance ({allocation})"))
+				continue
+
+			targets.append(frappe._dict(
+				employee=emp.name,
+				leave_type=leave_type,
+				new_leaves_allocated=allocation,
+				description=description,
+				# Only Annual Leave can be carried forward
+				carry_forward=int(leave_type == "Annual Leave")
+			))
+
+	return targets, skipped
+
+
+def get_existing_allocations(targets, from_date, to_date):
+	"""
+	Not cancelled allocations of the period for the targets' employees and leave
+	types, in one query.
+
+	Returns:
+		dict: (employee, leave type) to the allocation row
+	"""
+	if not targets:
+		return {}
+
+	existing = {}
+	for row in frappe.get_all(
+		"Leave Allocation",
+		filters={
+			"employee": ["in", list({t.employee for t in targets})],
+			"leave_type": ["in", list({t.leave_type for t in targets})],
+			"from_date": from_date,
+			"to_date": to_date,
+			"docstatus": ["<", 2]
+		},
+		fields=["name", "employee", "leave_type", "docstatus", "new_leaves_allocated", "description", "carry_forward"],
+		order_by="creation"
+	):
+		existing.setdefault((row.employee, row.leave_type), row)
+
+	return existing
+
+
+def get_allocation_changes(target, existing):
+	"""
+	Fields of an existing allocation that differ from the target.
+
+	Returns:
+		list: Changed field names; ["docstatus"] for an unchanged draft, which still
+			needs submitting
+	"""
+	changes = [
+		field for field, changed in (
+			("new_leaves_allocated", flt(existing.new_leaves_allocated) != flt(target.new_leaves_allocated)),
+			("description", (existing.description or "") != (target.description or "")),
+			("carry_forward", cint(existing.carry_forward) != cint(target.carry_forward))
+		) if changed
+	]
+
+	if not changes and existing.docstatus == 0:
+		changes.append("docstatus")
+
+	return changes
+
+
+def diff_leave_allocations(targets, from_date, to_date):
+	"""
+	Compare the target allocations with the allocations of the period, loaded in one query.
+
+	Returns:
+		frappe._dict: `create` (targets without an allocation), `update` ((target,
+			existing, changed fields) whose allocation differs) and `unchanged` (targets
+			already allocated as planned)
+	"""
+	existing = get_existing_allocations(targets, from_date, to_date)
+	diff = frappe._dict(create=[], update=[], unchanged=[])
+
+	for target in targets:
+		current = existing.get((target.employee, target.leave_type))
+		if not current:
+			diff.create.append(target)
+			continue
+
+		changes = get_allocation_changes(target, current)
+		if changes:
+			diff.update.append((target, current, changes))
+		else:
+			diff.unchanged.append(target)
+
+	return diff
+
+
+def process_leave_allocations(targets, from_date, to_date, chunk_size=50, job_run=None,
+							job_name="Opening Leave Allocation"):
+	"""
+	Reconcile the allocations of the period with the targets in chunked transactions.
+
+	Only missing allocations are created and only allocations whose values differ are
+	cancelled and resubmitted, so a re-run over an already allocated period does not
+	rewrite the leave ledger. Each allocation runs in its own savepoint so a failure
+	only rolls back that allocation; the chunk is committed as a whole.
+
+	Args:
+		targets: Target allocations from plan_leave_allocations
+		from_date: Allocation from date
+		to_date: Allocation to date
+		chunk_size: Allocations per transaction
+		job_run: Hamptons Job Run to report progress to, created when missing
+
+	Returns:
+		dict: Created, updated, unchanged and failed counts
+	"""
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	diff = diff_leave_allocations(targets, from_date, to_date)
+	changes = [(target, None) for target in diff.create] + [
+		(target, current.name) for target, current, _fields in diff.update
+	]
+	progress = JobProgress(job_name, total=len(changes), job_run=job_run)
+
+	with progress.fail_on_error():
+		created = 0
+		updated = 0
+		failed = 0
+		for start in range(0, len(changes), chunk_size):
+			for target, existing in changes[start:start + chunk_size]:
+				frappe.db.savepoint("leave_allocation")
+				try:
+					apply_leave_allocation(target, from_date, to_date, existing)
+					if existing:
+						updated += 1
+					else:
+						created += 1
+				except Exception as e:
+					frappe.db.rollback(save_point="leave_allocation")
+					frappe.log_error(
+						message=f"Error creating leave allocation for {target.employee} - {target.leave_type}: {e!s}",
+						title="Leave Allocation Error"
+					)
+					progress.error(f"{target.employee} - {target.leave_type}: {e!s}")
+					failed += 1
+
+			frappe.db.commit()
+			progress.update(processed=min(start + chunk_size, len(changes)))
+
+		result = {
+			"allocations_created": created,
+			"allocations_updated": updated,
+			"allocations_unchanged": len(diff.unchanged),
+			"allocations_failed": failed
+		}
+		progress.finish(result)
+	frappe.db.commit()
+
+	return result
+
+
+def reconcile_leave_allocations(from_date=None, to_date=None, policy_name="HR-LPOL-2025-00002",
+								dry_run=True, chunk_size=50):
+	"""
+	Bring the allocations of the period in line with the policy and opening balances,
+	touching only what differs. With dry_run nothing is written and the planned changes
+	are returned.
+
+	Run using: bench --site [site] execute hamptons.import_opening_leave_balances.reconcile_leave_allocations --kwargs "{'dry_run': 0}"
+
+	Returns:
+		dict: Counts per action; with dry_run also the changes, as
+			{employee, leave_type, action, from, to}
+	"""
+	from_date = getdate(from_date or today())
+	to_date = getdate(to_date or add_years(from_date, 1))
+
+	leave_allocations = get_leave_policy_details(policy_name)
+	if not leave_allocations:
+		return {"status": "failed", "message": "No leave types in policy"}
+
+	targets, skipped = plan_leave_allocations(get_allocation_employees(), leave_allocations, policy_name)
+
+	if not cint(dry_run):
+		result = process_leave_allocations(targets, from_date, to_date, chunk_size=chunk_size)
+		result.update(status="success", allocations_skipped=len(skipped))
+		return result
+
+	diff = diff_leave_allocations(targets, from_date, to_date)
+	changes = [
+		frappe._dict(
+			employee=target.employee,
+			leave_type=target.leave_type,
+			action="Create",
+			to=target.new_leaves_allocated
+		)
+		for target in diff.create
+	] + [
+		frappe._dict(
+			employee=target.employee,
+			leave_type=target.leave_type,
+			action="Submit" if fields == ["docstatus"] else "Update",
+			changed_fields=fields,
+			**{"from": current.new_leaves_allocated, "to": target.new_leaves_allocated}
+		)
+		for target, current, fields in diff.update
+	]
+
+	print(f"Dry run {from_date} to {to_date}: {len(diff.create)} to create, {len(diff.update)} to update, "
+		f"{len(diff.unchanged)} unchanged, {len(skipped)} skipped")
+	for change in changes:
+		print(f"  {change.action}: {change.employee} - {change.leave_type} "
+			f"{change.get('from') if change.get('from') is not None else '-'} → {change.to}")
+
+	return {
+		"status": "dry_run",
+		"allocations_to_create": len(diff.create),
+		"allocations_to_update": len(diff.update),
+		"allocations_unchanged": len(diff.unchanged),
+		"allocations_skipped": len(skipped),
+		"changes": changes
+	}
+
+
+def enqueue_leave_allocations(from_date=None, to_date=None, policy_name="HR-LPOL-2025-00002",
+							workers=1, chunk_size=50):
+	"""
+	Plan the allocations and process them in background jobs, split by employee
+	across `workers` jobs of the long queue.
+
+	Run using: bench --site [site] execute hamptons.import_opening_leave_balances.enqueue_leave_allocations --kwargs "{'workers': 4}"
+
+	Returns:
+		dict: Planned and skipped counts and the Hamptons Job Run of every worker
+	"""
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+	from_date = getdate(from_date or today())
+	to_date = getdate(to_date or add_years(from_date, 1))
+
+	leave_allocations = get_leave_policy_details(policy_name)
+	if not leave_allocations:
+		return {"status": "failed", "message": "No leave types in policy"}
+
+	targets, skipped = plan_leave_allocations(get_allocation_employees(), leave_allocations, policy_name)
+
+	# Split by employee so two workers never touch the same employee's allocations
+	employees = sorted({t.employee for t in targets})
+	workers = max(1, min(cint(workers), len(employees) or 1))
+	groups = [[] for _i in range(workers)]
+	worker_of = {employee: i % workers for i, employee in enumerate(employees)}
+	for target in targets:
+		groups[worker_of[target.employee]].append(target)
+
+	job_runs = []
+	for i, group in enumerate(groups):
+		if not group:
+			continue
+		job_name = f"Opening Leave Allocation ({i + 1}/{workers})"
+		job_run = create_job_run(job_name, total=len(group), phase=policy_name)
+		frappe.enqueue(
+			"hamptons.import_opening_leave_balances.process_leave_allocations",
+			queue="long",
+			timeout=3600,
+			targets=group,
+			from_date=from_date,
+			to_date=to_date,
+			chunk_size=chunk_size,
+			job_run=job_run,
+			job_name=job_name
+		)
+		job_runs.append(job_run)
+
+	frappe.db.commit()
+
+	return {
+		"status": "queued",
+		"allocations_planned": len(targets),
+		"allocations_skipped": len(skipped),
+		"job_runs": job_runs
+	}
+
+
 def allocate_leaves_with_opening_balance(from_date=None, to_date=None,
-										policy_name="HR-LPOL-2025-00002"):
+										policy_name="HR-LPOL-2025-00002", chunk_size=50):
 	"""
 	Allocate all leave types from policy with Annual Leave opening balances
 
@@ -175,6 +601,7 @@ def allocate_leaves_with_opening_balance(from_date=None, to_date=None,
 		from_date: Allocation from date (default: today)
 		to_date: Allocation to date (default: 1 year from today)
 		policy_name: Leave Policy name
+		chunk_size: Allocations per transaction
 
 	Returns:
 		Dictionary with results
@@ -205,129 +632,34 @@ def allocate_leaves_with_opening_balance(from_date=None, to_date=None,
 		print(f"  - {la['leave_type']}: {la['annual_allocation']} days")
 	print("\n" + "-" * 80 + "\n")
 
-	# Get all active employees
-	# Check if custom fields exist
-	has_custom_fields = frappe.db.has_column("Employee", "custom_nationality")
-
-	if has_custom_fields:
-		employees = frappe.get_all("Employee",
-			filters={"status": "Active"},
-			fields=["name", "employee_name", "gender", "custom_nationality", "custom_religion"]
-		)
-	else:
-		print("⚠ Custom fields not found, using basic employee data")
-		employees = frappe.get_all("Employee",
-			filters={"status": "Active"},
-			fields=["name", "employee_name", "gender"]
-		)
-		# Add empty custom fields
-		for emp in employees:
-			emp["custom_nationality"] = None
-			emp["custom_religion"] = None
+	employees = get_allocation_employees()
 
 	if not employees:
 		print("✗ No active employees found")
 		return {"status": "failed", "message": "No active employees"}
 
-	print(f"Processing {len(employees)} active employees...\n")
-	print("=" * 80 + "\n")
-
-	success_count = 0
-	failed_count = 0
-	skipped_count = 0
-
-	for emp in employees:
-		emp_id = emp.name
-		emp_name = emp.employee_name
-		gender = emp.gender
-		nationality = emp.get("custom_nationality")
-		religion = emp.get("custom_religion")
-
-		print(f"Employee: {emp_id} - {emp_name}")
-		print(f"  Gender: {gender}, Nationality: {nationality}, Religion: {religion}")
-
-		emp_success = 0
-		emp_failed = 0
-
-		# Process each leave type
-		for leave_data in leave_allocations:
-			leave_type = leave_data["leave_type"]
-			standard_allocation = leave_data["annual_allocation"]
-
-			# Check if employee is eligible for this leave type
-			leave_type_doc = frappe.get_doc("Leave Type", leave_type)
-
-			# Gender restriction check
-			if hasattr(leave_type_doc, "custom_gender_specific") and leave_type_doc.custom_gender_specific:
-				if leave_type_doc.custom_gender_specific != "All" and leave_type_doc.custom_gender_specific != gender:
-					print(f"  ⊘ Skipped {leave_type} - Gender restriction")
-					skipped_count += 1
-					continue
-
-			# Religion restriction check
-			if hasattr(leave_type_doc, "custom_religion_specific") and leave_type_doc.custom_religion_specific:
-				if leave_type_doc.custom_religion_specific == "All (Muslim)" and religion != "Muslim":
-					print(f"  ⊘ Skipped {leave_type} - Religion restriction")
-					skipped_count += 1
-					continue
-				elif leave_type_doc.custom_religion_specific == "Non-Muslim" and religion == "Muslim":
-					print(f"  ⊘ Skipped {leave_type} - Religion restriction")
-					skipped_count += 1
-					continue
-
-			# Determine allocation amount
-			if leave_type == "Annual Leave" and emp_id in OPENING_BALANCES:
-				# Use opening balance for Annual Leave
-				allocation = OPENING_BALANCES[emp_id]
-				description = f"Opening balance as of November 2025: {allocation} days"
-			else:
-				# Use standard allocation from policy
-				allocation = standard_allocation
-				description = f"Annual allocation from {policy_name}"
-
-			# Skip if allocation is 0 or negative
-			if allocation <= 0:
-				print(f"  ⊘ Skipped {leave_type} - Zero/Negative balance ({allocation})")
-				skipped_count += 1
-				continue
-
-			# Create allocation
-			result = create_leave_allocation(
-				employee_id=emp_id,
-				leave_type=leave_type,
-				leaves_allocated=allocation,
-				from_date=from_date,
-				to_date=to_date,
-				description=description,
-				carry_forward=(leave_type == "Annual Leave")  # Only Annual Leave can be carried forward
-			)
-
-			if result:
-				print(f"  ✓ Allocated {leave_type}: {allocation} days")
-				emp_success += 1
-			else:
-				print(f"  ✗ Failed to allocate {leave_type}")
-				emp_failed += 1
-
-		print(f"  Summary: {emp_success} allocated, {emp_failed} failed")
-		print("-" * 80)
+	targets, skipped = plan_leave_allocations(employees, leave_allocations, policy_name)
+	print(f"Processing {len(employees)} active employees: {len(targets)} allocations, {len(skipped)} skipped\n")
 
-		success_count += emp_success
-		failed_count += emp_failed
+	result = process_leave_allocations(targets, from_date, to_date, chunk_size=chunk_size)
 
 	print("\n" + "="*80)
 	print("✅ LEAVE ALLOCATION COMPLETE!")
-	print(f"\nTotal Allocations: {success_count}")
-	print(f"Failed: {failed_count}")
-	print(f"Skipped (eligibility): {skipped_count}")
+	print(f"\nCreated: {result['allocations_created']}")
+	print(f"Updated: {result['allocations_updated']}")
+	print(f"Unchanged: {result['allocations_unchanged']}")
+	print(f"Failed: {result['allocations_failed']}")
+	print(f"Skipped (eligibility): {len(skipped)}")
 	print("="*80 + "\n")
 
 	return {
 		"status": "success",
 		"total_employees": len(employees),
-		"allocations_created": success_count,
-		"allocations_failed": failed_count,
-		"allocations_skipped": skipped_count
+		"allocations_created": result["allocations_created"],
+		"allocations_updated": result["allocations_updated"],
+		"allocations_unchanged": result["allocations_unchanged"],
+		"allocations_failed": result["allocations_failed"],
+		"allocations_skipped": len(skipped)
 	}
 
 
@@ -356,13 +688,12 @@ def allocate_single_employee(employee_id, from_date=None, to_date=None,
 		to_date = add_years(getdate(from_date), 1)
 
 	# Check if employee exists
-	if not frappe.db.exists("Employee", employee_id):
+	employees = get_allocation_employees(employee_id)
+	if not employees:
 		print(f"✗ Employee {employee_id} not found")
 		return {"status": "failed", "message": "Employee not found"}
 
-	# Get employee details
-	emp = frappe.get_doc("Employee", employee_id)
-
+	emp = employees[0]
 	print(f"Employee: {emp.name} - {emp.employee_name}")
 	print(f"Gender: {emp.gender}")
 	print(f"Nationality: {emp.get('custom_nationality')}")
@@ -377,78 +708,26 @@ def allocate_single_employee(employee_id, from_date=None, to_date=None,
 		print("✗ No leave types found in policy")
 		return {"status": "failed", "message": "No leave types in policy"}
 
-	success_count = 0
-	failed_count = 0
-	skipped_count = 0
-
-	for leave_data in leave_allocations:
-		leave_type = leave_data["leave_type"]
-		standard_allocation = leave_data["annual_allocation"]
-
-		# Check eligibility
-		leave_type_doc = frappe.get_doc("Leave Type", leave_type)
-
-		# Gender restriction
-		if hasattr(leave_type_doc, "custom_gender_specific") and leave_type_doc.custom_gender_specific:
-			if leave_type_doc.custom_gender_specific != "All" and leave_type_doc.custom_gender_specific != emp.gender:
-				print(f"⊘ Skipped {leave_type} - Gender restriction")
-				skipped_count += 1
-				continue
-
-		# Religion restriction
-		if hasattr(leave_type_doc, "custom_religion_specific") and leave_type_doc.custom_religion_specific:
-			emp_religion = emp.get("custom_religion")
-			if leave_type_doc.custom_religion_specific == "All (Muslim)" and emp_religion != "Muslim":
-				print(f"⊘ Skipped {leave_type} - Religion restriction")
-				skipped_count += 1
-				continue
-			elif leave_type_doc.custom_religion_specific == "Non-Muslim" and emp_religion == "Muslim":
-				print(f"⊘ Skipped {leave_type} - Religion restriction")
-				skipped_count += 1
-				continue
-
-		# Determine allocation
-		if leave_type == "Annual Leave" and employee_id in OPENING_BALANCES:
-			allocation = OPENING_BALANCES[employee_id]
-			description = f"Opening balance as of November 2025: {allocation} days"
-		else:
-			allocation = standard_allocation
-			description = f"Annual allocation from {policy_name}"
-
-		# Skip zero/negative
-		if allocation <= 0:
-			print(f"⊘ Skipped {leave_type} - Zero/Negative balance ({allocation})")
-			skipped_count += 1
-			continue
-
-		# Create allocation
-		result = create_leave_allocation(
-			employee_id=employee_id,
-			leave_type=leave_type,
-			leaves_allocated=allocation,
-			from_date=from_date,
-			to_date=to_date,
-			description=description,
-			carry_forward=(leave_type == "Annual Leave")
-		)
+	targets, skipped = plan_leave_allocations(employees, leave_allocations, policy_name)
+	for _employee, leave_type, reason in skipped:
+		print(f"⊘ Skipped {leave_type} - {reason}")
 
-		if result:
-			print(f"✓ Allocated {leave_type}: {allocation} days")
-			success_count += 1
-		else:
-			print(f"✗ Failed to allocate {leave_type}")
-			failed_count += 1
+	result = process_leave_allocations(targets, from_date, to_date)
 
 	print("\n" + "-" * 80)
-	print(f"✅ COMPLETE")
-	print(f"Allocated: {success_count}")
-	print(f"Failed: {failed_count}")
-	print(f"Skipped: {skipped_count}")
+	print("✅ COMPLETE")
+	print(f"Allocated: {result['allocations_created']}")
+	print(f"Updated: {result['allocations_updated']}")
+	print(f"Unchanged: {result['allocations_unchanged']}")
+	print(f"Failed: {result['allocations_failed']}")
+	print(f"Skipped: {len(skipped)}")
 	print("="*80 + "\n")
 
 	return {
 		"status": "success",
-		"allocations_created": success_count,
-		"allocations_failed": failed_count,
-		"allocations_skipped": skipped_count
+		"allocations_created": result["allocations_created"],
+		"allocations_updated": result["allocations_updated"],
+		"allocations_unchanged": result["allocations_unchanged"],
+		"allocations_failed": result["allocations_failed"],
+		"allocations_skipped": len(skipped)
 	}
@@ -0,0 +1,42 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import frappe
+
+
+def after_install():
+	add_indexes()
+
+
+def after_migrate():
+	add_indexes()
+
+
+def add_indexes():
+	"""
+	Indexes on the tables of other apps. Their schema sync does not know about them and
+	patches are only run on existing sites, so they are (re)checked on every install and
+	migrate.
+	"""
+	add_checkin_time_index()
+	add_purge_creation_indexes()
+
+
+def add_checkin_time_index():
+	"""Employee Checkin history is read per employee in time order"""
+	if frappe.db.table_exists("Employee Checkin"):
+		frappe.db.add_index("Employee Checkin", ["employee", "time"], "employee_time_index")
+
+
+def add_purge_creation_indexes():
+	"""The log purge deletes oldest first in creation order"""
+	for doctype in ("Error Log", "Deleted Document", "CrossChex Log"):
+		if not frappe.db.table_exists(doctype):
+			continue
+
+		# Recent Frappe versions already index creation on every table
+		indexed = frappe.db.sql(
+			f"SHOW INDEX FROM `tab{doctype}` WHERE Column_name = 'creation' AND Seq_in_index = 1"
+		)
+		if not indexed:
+			frappe.db.add_index(doctype, ["creation"], "creation_index")
@@ -1,27 +1,40 @@
 # Copyright (c) 2024, Momscode and contributors
 # For license information, please see license.txt
 
+import json
+from datetime import datetime, timedelta
+from datetime import time as dt_time
+
 import frappe
 from frappe import _
-from frappe.utils import getdate, get_datetime, now_datetime, time_diff_in_hours, get_time
-from datetime import datetime, timedelta
+from frappe.utils import add_days, get_datetime, get_time, getdate, now_datetime, time_diff_in_hours
+
+# Outcomes of the daily consolidation, also the keys of its stats dict
+CONSOLIDATION_OUTCOMES = ("present", "regularizations", "absent", "leave")
+
+CONSOLIDATION_ERROR_TITLES = {
+	"present": "Daily Attendance - Creation Error",
+	"regularizations": "Daily Attendance - Creation Error",
+	"absent": "Daily Attendance - Absent/Leave Creation Error",
+	"leave": "Daily Attendance - Absent/Leave Creation Error"
+}
 
 
 def get_active_shift_assignment(employee, date=None):
 	"""
 	Get the active Shift Assignment for an employee on a specific date.
 	If multiple assignments exist, returns the one with the most recent start date.
-	
+
 	Args:
 		employee: Employee ID
 		date: Date to check (defaults to today)
-	
+
 	Returns:
 		Shift Assignment document or None
 	"""
 	if not date:
 		date = getdate()
-	
+
 	# Query for active shift assignments on the given date
 	shift_assignments = frappe.db.sql("""
 		SELECT name, shift_type, start_date, end_date
@@ -34,58 +47,58 @@ def get_active_shift_assignment(employee, date=None):
 		ORDER BY start_date DESC
 		LIMIT 1
 	""", (employee, date, date), as_dict=1)
-	
+
 	if shift_assignments:
 		return frappe.get_doc("Shift Assignment", shift_assignments[0].name)
-	
+
 	return None
 
 
 def validate_shift_type(shift_type_name):
 	"""
 	Validate that the Shift Type has valid Start Time and End Time values.
-	
+
 	Args:
 		shift_type_name: Name of the Shift Type
-	
+
 	Returns:
 		Shift Type document
-	
+
 	Raises:
 		ValidationError if shift type is invalid
 	"""
 	shift_type = frappe.get_doc("Shift Type", shift_type_name)
-	
+
 	if not shift_type.start_time:
 		frappe.throw(_("Shift Type {0} does not have a valid Start Time").format(shift_type_name))
-	
+
 	if not shift_type.end_time:
 		frappe.throw(_("Shift Type {0} does not have a valid End Time").format(shift_type_name))
-	
+
 	return shift_type
 
 
 def calculate_late_time(checkin_time, shift_start_time, grace_period_minutes=0):
 	"""
 	Calculate how late an employee is based on checkin time and shift start time.
-	
+
 	Args:
 		checkin_time: datetime of checkin
 		shift_start_time: time object for shift start
 		grace_period_minutes: grace period in minutes
-	
+
 	Returns:
 		Time difference as time object, or None if not late
 	"""
 	checkin_date = getdate(checkin_time)
-	
+
 	# Create datetime for shift start on the checkin date
 	shift_start_datetime = datetime.combine(checkin_date, shift_start_time)
-	
+
 	# Add grace period
 	if grace_period_minutes:
 		shift_start_datetime += timedelta(minutes=grace_period_minutes)
-	
+
 	# Compare
 	if checkin_time > shift_start_datetime:
 		time_diff = checkin_time - shift_start_datetime
@@ -93,26 +106,26 @@ def calculate_late_time(checkin_time, shift_start_time, grace_period_minutes=0):
 		minutes = int((time_diff.total_seconds() % 3600) // 60)
 		seconds = int(time_diff.total_seconds() % 60)
 		return get_time(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-	
+
 	return None
 
 
 def calculate_early_exit_time(checkout_time, shift_end_time):
 	"""
 	Calculate how early an employee checked out compared to shift end time.
-	
+
 	Args:
 		checkout_time: datetime of checkout
 		shift_end_time: time object for shift end
-	
+
 	Returns:
 		Time difference as time object, or None if not early
 	"""
 	checkout_date = getdate(checkout_time)
-	
+
 	# Create datetime for shift end on the checkout date
 	shift_end_datetime = datetime.combine(checkout_date, shift_end_time)
-	
+
 	# Compare
 	if checkout_time < shift_end_datetime:
 		time_diff = shift_end_datetime - checkout_time
@@ -120,7 +133,7 @@ def calculate_early_exit_time(checkout_time, shift_end_time):
 		minutes = int((time_diff.total_seconds() % 3600) // 60)
 		seconds = int(time_diff.total_seconds() % 60)
 		return get_time(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-	
+
 	return None
 
 
@@ -128,52 +141,52 @@ def should_create_regularization(checkin_doc):
 	"""
 	Determine if an Attendance Regularization should be created based on checkin/checkout.
 	Creates regularization immediately for late entries, and after shift end for early exits.
-	
+
 	Args:
 		checkin_doc: Employee Checkin document
-	
+
 	Returns:
 		tuple (should_create: bool, reason: str, late_time: time or None)
 	"""
 	# Get active shift assignment
 	checkin_date = getdate(checkin_doc.time)
 	shift_assignment = get_active_shift_assignment(checkin_doc.employee, checkin_date)
-	
+
 	if not shift_assignment:
 		return False, "No active shift assignment found", None
-	
+
 	# Validate shift type
 	try:
 		shift_type = validate_shift_type(shift_assignment.shift_type)
 	except Exception as e:
 		frappe.log_error(message=str(e), title="Shift Type Validation Error")
 		return False, str(e), None
-	
+
 	current_time = now_datetime()
 	checkin_datetime = get_datetime(checkin_doc.time)
-	
+
 	# Check for late entry (IN log) - Create immediately
 	if checkin_doc.log_type == "IN":
 		grace_period = shift_type.late_entry_grace_period or 0
 		late_time = calculate_late_time(checkin_datetime, shift_type.start_time, grace_period)
-		
+
 		if late_time:
 			return True, "Late entry", late_time
-	
+
 	# Check for early exit (OUT log) - Only after shift end time
 	elif checkin_doc.log_type == "OUT":
 		# Create datetime for shift end on the checkin date
 		shift_end_datetime = datetime.combine(checkin_date, shift_type.end_time)
-		
+
 		# Only proceed if shift end time has passed
 		if current_time < shift_end_datetime:
 			return False, "Shift end time has not passed yet (early exit detection deferred)", None
-		
+
 		early_time = calculate_early_exit_time(checkin_datetime, shift_type.end_time)
-		
+
 		if early_time:
 			return True, "Early exit", early_time
-	
+
 	return False, "No regularization needed", None
 
 
@@ -181,7 +194,7 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 	"""
 	Create or update an Attendance Regularization document for the employee checkin.
 	Now works with the new structure where one regularization can have multiple checkins.
-	
+
 	Args:
 		checkin_doc: Employee Checkin document
 		shift_assignment: Shift Assignment document
@@ -192,16 +205,16 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 	existing_reg = frappe.db.get_value("Attendance Regularization Item",
 									   {"employee_checkin": checkin_doc.name},
 									   "parent")
-	
+
 	if existing_reg:
 		frappe.log_error(
 			message=f"Checkin {checkin_doc.name} already linked to regularization {existing_reg}",
 			title="Duplicate Regularization Attempt"
 		)
 		return
-	
+
 	checkin_date = getdate(checkin_doc.time)
-	
+
 	# Check if regularization exists for this employee and date
 	existing_regularizations = frappe.db.get_all(
 		"Attendance Regularization",
@@ -212,15 +225,15 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 		},
 		fields=["name", "docstatus"]
 	)
-	
+
 	if existing_regularizations:
 		# Check if any are in draft status (docstatus = 0)
 		draft_regularizations = [r for r in existing_regularizations if r.docstatus == 0]
-		
+
 		if draft_regularizations:
 			# Add to existing draft regularization
 			regularization = frappe.get_doc("Attendance Regularization", draft_regularizations[0].name)
-			
+
 			# Add new checkin item
 			regularization.append("attendance_regularization_item", {
 				"time": checkin_doc.time,
@@ -228,17 +241,17 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 				"device_id": checkin_doc.device_id if hasattr(checkin_doc, 'device_id') else None,
 				"employee_checkin": checkin_doc.name
 			})
-			
+
 			# Update late time if this checkin is later
 			if late_time and (not regularization.late or late_time > regularization.late):
 				regularization.late = late_time
-			
+
 			regularization.save(ignore_permissions=True)
-			
+
 			# Update the checkin with regularization reference
 			frappe.db.set_value("Employee Checkin", checkin_doc.name,
 								"custom_attendance_regularization", regularization.name)
-			
+
 			frappe.msgprint(_("Added checkin to existing Attendance Regularization {0}").format(
 				regularization.name
 			))
@@ -250,7 +263,7 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 				title="Cannot Add to Regularization"
 			)
 			return
-	
+
 	# Create new regularization document
 	regularization = frappe.get_doc({
 		"doctype": "Attendance Regularization",
@@ -264,12 +277,12 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 		"late": late_time,
 		"status": "Open"
 	})
-	
+
 	# Get reports_to from employee
 	employee = frappe.get_doc("Employee", checkin_doc.employee)
 	if employee.reports_to:
 		regularization.reports_to = employee.reports_to
-	
+
 	# Add checkin item
 	regularization.append("attendance_regularization_item", {
 		"time": checkin_doc.time,
@@ -277,13 +290,13 @@ def create_or_update_attendance_regularization(checkin_doc, shift_assignment, sh
 		"device_id": checkin_doc.device_id if hasattr(checkin_doc, 'device_id') else None,
 		"employee_checkin": checkin_doc.name
 	})
-	
+
 	regularization.insert(ignore_permissions=True)
-	
+
 	# Update the checkin with regularization reference
 	frappe.db.set_value("Employee Checkin", checkin_doc.name,
 						"custom_attendance_regularization", regularization.name)
-	
+
 	frappe.msgprint(_("Attendance Regularization {0} created for {1}").format(
 		regularization.name, checkin_doc.employee_name
 	))
@@ -293,7 +306,7 @@ def on_employee_checkin_submit(doc, method=None):
 	"""
 	Hook to run after Employee Checkin is created (after_insert).
 	Checks if attendance regularization should be created or updated.
-	
+
 	Note: Despite the function name, this runs on 'after_insert' to support
 	automatic checkin creation from CrossChex sync.
 
@@ -311,27 +324,27 @@ def on_employee_checkin_submit(doc, method=None):
 
 	# Check if regularization should be created
 	should_create, reason, late_time = should_create_regularization(doc)
-	
+
 	if not should_create:
 		frappe.log_error(
 			message=f"Regularization not created for {doc.name}: {reason}",
 			title="Attendance Regularization Check"
 		)
 		return
-	
+
 	# Get shift assignment and shift type
 	checkin_date = getdate(doc.time)
 	shift_assignment = get_active_shift_assignment(doc.employee, checkin_date)
-	
+
 	if not shift_assignment:
 		frappe.log_error(
 			message=f"No shift assignment found for {doc.employee} on {checkin_date}",
 			title="Attendance Regularization - No Shift Assignment"
 		)
 		return
-	
+
 	shift_type = validate_shift_type(shift_assignment.shift_type)
-	
+
 	# Create or update regularization
 	try:
 		create_or_update_attendance_regularization(doc, shift_assignment, shift_type, late_time)
@@ -341,6 +354,105 @@ def on_employee_checkin_submit(doc, method=None):
 		frappe.throw(_("Failed to create Attendance Regularization: {0}").format(str(e)))
 
 
+def update_checkin_aggregates(doc, method=None):
+	"""
+	Hook to run after an Employee Checkin is inserted (after_insert).
+	Keeps the incrementally maintained aggregates (employee-day summary, hourly rollup) up to date,
+	invalidates the dashboard caches of the checkin date and pushes the punch to open
+	dashboards.
+
+	Args:
+		doc: Employee Checkin document
+		method: Method name (not used)
+	"""
+	from hamptons.hamptons.dashboard_cache import bump_checkin_generation
+	from hamptons.hamptons.dashboard_realtime import publish_checkin_delta
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import update_day_summary
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		add_checkin_to_rollup,
+	)
+
+	summary = None
+	if frappe.db.exists("DocType", "Attendance Day Summary"):
+		# The nightly job rebuilds days whose summary drifted, never block ingestion
+		summary = _update_aggregate(update_day_summary, "Attendance Day Summary Update Error", doc)
+
+	department = summary.department if summary else frappe.db.get_value("Employee", doc.employee, "department")
+
+	if frappe.db.exists("DocType", "Employee Checkin Rollup"):
+		_update_aggregate(add_checkin_to_rollup, "Employee Checkin Rollup Update Error", doc, department)
+
+	bump_checkin_generation(doc.time)
+	publish_checkin_delta(doc, department, first_of_day=summary.punch_count == 1 if summary else None)
+
+
+def _update_aggregate(update, error_title, *args):
+	"""
+	Run an aggregate update inside a savepoint so its failure only undoes its own writes.
+
+	Deadlocks and lock wait timeouts are raised: MariaDB may already have rolled back
+	the whole transaction, checkin insert included, so ingestion must not carry on as if
+	the checkin was saved.
+	"""
+	frappe.db.savepoint("checkin_aggregate")
+	try:
+		return update(*args)
+	except Exception as e:
+		if frappe.db.is_deadlocked(e) or frappe.db.is_timedout(e):
+			raise
+		frappe.db.rollback(save_point="checkin_aggregate")
+		frappe.log_error(message=str(e), title=error_title)
+
+
+def remove_checkin_from_aggregates(doc, method=None):
+	"""
+	Hook to run after an Employee Checkin is deleted (after_delete).
+	Rebuilds the employee-day summary and the rollup of the day the checkin belonged to.
+	"""
+	if not frappe.db.exists("DocType", "Attendance Day Summary"):
+		return
+
+	from hamptons.hamptons.dashboard_cache import bump_checkin_generation
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import rebuild_day_summaries
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		rebuild_checkin_rollup,
+	)
+
+	checkin_date = getdate(doc.time)
+	rebuild_day_summaries(checkin_date, checkin_date, employee=doc.employee)
+	rebuild_checkin_rollup(checkin_date, checkin_date)
+	bump_checkin_generation(checkin_date)
+
+
+def update_edited_checkin_aggregates(doc, method=None):
+	"""
+	Hook to run after an Employee Checkin is saved (on_update).
+	An edit of the time, log type, employee or device can move the first IN / last OUT
+	without changing the punch count, which is all the drift check compares. The
+	employee-day summaries and rollups of both the old and the new day are rebuilt.
+	"""
+	before = doc.get_doc_before_save()
+	# Inserts are folded in by update_checkin_aggregates
+	if not before or not frappe.db.exists("DocType", "Attendance Day Summary"):
+		return
+	if not any(doc.has_value_changed(field) for field in ("time", "log_type", "employee", "device_id")):
+		return
+
+	from hamptons.hamptons.dashboard_cache import bump_checkin_generation
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import rebuild_day_summaries
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		rebuild_checkin_rollup,
+	)
+
+	days = {(before.employee, getdate(before.time)), (doc.employee, getdate(doc.time))}
+	for employee, checkin_date in days:
+		rebuild_day_summaries(checkin_date, checkin_date, employee=employee)
+
+	for checkin_date in {d for _employee, d in days}:
+		rebuild_checkin_rollup(checkin_date, checkin_date)
+		bump_checkin_generation(checkin_date)
+
+
 def daily_attendance_regularization_job():
 	"""
 	Consolidate daily checkins per employee and create Attendance or Attendance Regularization
@@ -366,9 +478,22 @@ def run_attendance_regularization_sync(days: int = 365, include_yesterday: bool
 	if not frappe.db.exists("DocType", "Attendance Regularization"):
 		frappe.throw(_("Attendance Regularization DocType is not installed on this site"))
 
-	from frappe.utils import getdate
 	from datetime import timedelta
 
+	from frappe.utils import getdate
+
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+	end_date = getdate() - timedelta(days=1) if include_yesterday else getdate()
+	start_date = getdate() - timedelta(days=days)
+
+	# Progress of the background job is reported to this record and pushed to the user
+	job_run = create_job_run(
+		"Attendance Regularization Sync",
+		total=(end_date - start_date).days + 1,
+		phase=f"{start_date} to {end_date}"
+	)
+
 	# Enqueue the job to run in background
 	frappe.enqueue(
 		'hamptons.overrides.employee_checkin.process_attendance_sync_background',
@@ -376,60 +501,96 @@ def run_attendance_regularization_sync(days: int = 365, include_yesterday: bool
 		timeout=3600,  # 1 hour timeout
 		days=days,
 		include_yesterday=include_yesterday,
+		job_run=job_run,
 		now=False
 	)
-	
-	end_date = getdate() - timedelta(days=1) if include_yesterday else getdate()
-	start_date = getdate() - timedelta(days=days)
-	
+
 	return {
 		"success": True,
 		"message": f"Background sync job started for {days} days (from {start_date} to {end_date})",
 		"start_date": str(start_date),
 		"end_date": str(end_date),
-		"note": "Processing in background. Check Attendance Regularization list for results."
+		"job_run": job_run,
+		"note": "Processing in background. Follow progress in the linked Hamptons Job Run."
 	}
 
-def process_attendance_sync_background(days: int = 365, include_yesterday: bool = True):
+def process_attendance_sync_background(days: int = 365, include_yesterday: bool = True, job_run=None):
 	"""
 	Background job to process attendance consolidation.
 	This runs in a separate worker to avoid timeout.
+
+	Args:
+		days: Number of days back to consolidate
+		include_yesterday: End the range yesterday instead of today
+		job_run: Hamptons Job Run to report progress to; one is created if not passed
 	"""
-	from frappe.utils import getdate
 	from datetime import timedelta
-	
+
+	from frappe.utils import getdate
+
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import ensure_day_summaries
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
 	end_date = getdate() - timedelta(days=1) if include_yesterday else getdate()
 	start_date = getdate() - timedelta(days=days)
-	
-	processed = 0
-	error_count = 0
-	summary = []
-	cur = start_date
-	
-	while cur <= end_date:
-		try:
-			stats = consolidate_attendance_for_date(cur)
-			processed += 1
-			summary.append({"date": str(cur), **stats})
-			
-			# Commit every 10 days to avoid long transactions
-			if processed % 10 == 0:
-				frappe.db.commit()
-				frappe.logger().info(f"Attendance sync: Processed {processed} days so far...")
-		except Exception as e:
-			error_count += 1
-			frappe.log_error(message=str(e), title=f"Manual Regularization Sync Error - {cur}")
-		cur = cur + timedelta(days=1)
-	
+
+	progress = JobProgress(
+		"Attendance Regularization Sync",
+		total=(end_date - start_date).days + 1,
+		phase=f"{start_date} to {end_date}",
+		job_run=job_run
+	)
+
+	with progress.fail_on_error():
+		processed = 0
+		error_count = 0
+		summary = []
+		cur = start_date
+		data = None
+		window_end = None
+
+		while cur <= end_date:
+			try:
+				# Load shift assignments, summaries, existing records and approved leave once
+				# per month sized window instead of once per day
+				if data is None or cur > window_end:
+					data = None
+					window_end = min(cur + timedelta(days=30), end_date)
+					ensure_day_summaries(cur, window_end)
+					data = load_consolidation_data(cur, window_end)
+
+				stats = consolidate_attendance_for_date(cur, data=data)
+				processed += 1
+				summary.append({"date": str(cur), **stats})
+
+				# Commit every 10 days to avoid long transactions
+				if processed % 10 == 0:
+					frappe.db.commit()
+					frappe.logger().info(f"Attendance sync: Processed {processed} days so far...")
+			except Exception as e:
+				error_count += 1
+				frappe.log_error(message=str(e), title=f"Manual Regularization Sync Error - {cur}")
+				progress.error(f"{cur}: {e}")
+			cur = cur + timedelta(days=1)
+			progress.update(increment=1, phase=f"{cur.strftime('%Y-%m')}")
+
+		progress.finish({
+			"processed_days": processed,
+			"errors": error_count,
+			"start_date": str(start_date),
+			"end_date": str(end_date),
+			"totals": {k: sum(d.get(k, 0) for d in summary) for k in CONSOLIDATION_OUTCOMES}
+		})
+
 	# Final commit
 	frappe.db.commit()
-	
+
 	# Log completion
 	frappe.logger().info(
 		f"Attendance sync completed: {processed} days processed, {error_count} errors. "
 		f"Range: {start_date} to {end_date}"
 	)
-	
+
 	return {
 		"success": True,
 		"processed_days": processed,
@@ -439,9 +600,12 @@ def process_attendance_sync_background(days: int = 365, include_yesterday: bool
 	}
 
 
-def consolidate_attendance_for_date(processing_date):
+def consolidate_attendance_for_date(processing_date, bulk=True, data=None):
 	"""
 	Consolidate checkins for a specific date and create Attendance/Regularization per rules.
+	Records are written with multi-row inserts unless bulk is False, in which case every
+	record goes through its own insert/submit. Backfills pass the consolidation data
+	loaded once for their range (see load_consolidation_data).
 	Returns stats dict.
 	"""
 	# Check if Attendance Regularization DocType exists on this site
@@ -451,227 +615,496 @@ def consolidate_attendance_for_date(processing_date):
 		)
 		return {"processed": 0, "created": 0, "updated": 0, "errors": 0}
 
-	import json
+	processing_date = getdate(processing_date)
+	plan = plan_attendance_for_date(processing_date, data)
 
-	# Fetch all checkins for the day
-	rows = frappe.db.sql(
-		"""
-		SELECT ec.name, ec.employee, ec.employee_name, ec.time, ec.log_type
-		FROM `tabEmployee Checkin` ec
-		WHERE DATE(ec.time) = %s
-		ORDER BY ec.employee, ec.time
-		""",
-		(processing_date,),
-		as_dict=True
+	if bulk:
+		stats = create_planned_records_in_bulk(plan)
+	else:
+		stats = create_planned_records(plan)
+
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import finalize_day_summaries
+	finalize_day_summaries(processing_date)
+
+	frappe.logger().info(
+		f"Daily Attendance Summary {processing_date}: Present={stats['present']}, Regularizations={stats['regularizations']}, Absent={stats['absent']}, OnLeave/HalfDay={stats['leave']}"
 	)
-	
-	# Build map of employee -> list of checkins
-	emp_checks = {}
-	for r in rows:
-		emp_checks.setdefault(r["employee"], []).append(r)
-	
-	# Get employees with active shift assignment today
-	active_employees = frappe.db.sql(
-		"""
-		SELECT DISTINCT sa.employee, sa.shift_type
-		FROM `tabShift Assignment` sa
-		WHERE sa.docstatus = 1
-		AND sa.start_date <= %s
-		AND (sa.end_date IS NULL OR sa.end_date >= %s)
-		""",
-		(processing_date, processing_date),
-		as_dict=True
+
+	return stats
+
+
+def plan_attendance_for_date(processing_date, data=None):
+	"""
+	Apply the consolidation rules for a date without writing anything.
+
+	Args:
+		processing_date: Date to consolidate
+		data: Consolidation data from load_consolidation_data for a range covering the
+			date; loaded for the date alone when not passed
+
+	Returns:
+		List of (outcome, doc) tuples where outcome is one of CONSOLIDATION_OUTCOMES
+		and doc is the dict to create the Attendance or Attendance Regularization from
+	"""
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import (
+		ensure_day_summaries,
+		get_summary_checkins,
 	)
-	
-	created_attendance = 0
-	created_regularizations = 0
-	absents_marked = 0
-	leaves_marked = 0
-	
-	for sa in active_employees:
+
+	processing_date = getdate(processing_date)
+
+	if data is None:
+		# First IN / last OUT per employee come from the employee-day summary maintained at
+		# ingestion; the day is rebuilt from raw checkins first if it drifted
+		ensure_day_summaries(processing_date, processing_date)
+		data = load_consolidation_data(processing_date, processing_date)
+
+	# Records created earlier in the plan count as existing for the rest of the day
+	existing_attendance = data.existing_attendance.get(processing_date, set()).copy()
+	existing_regularizations = data.existing_regularizations.get(processing_date, set()).copy()
+
+	plan = []
+	for sa in get_assignments_for_day(data, processing_date):
 		emp = sa["employee"]
 		shift_type_name = sa["shift_type"]
-		
+		employee = data.employees.get(emp) or frappe._dict()
+
 		# Skip if attendance date is before employee's joining date
-		emp_joining_date = frappe.db.get_value("Employee", emp, "date_of_joining")
-		if emp_joining_date and processing_date < emp_joining_date:
+		if employee.date_of_joining and processing_date < getdate(employee.date_of_joining):
 			continue
-		
-		shift_type = frappe.get_doc("Shift Type", shift_type_name)
-		
-		checks = emp_checks.get(emp, [])
-		
+
+		shift_type = data.shift_types[shift_type_name]
+
+		summary = data.summaries.get((emp, processing_date))
+
 		# No checkins -> mark based on approved leave or Absent
-		if not checks:
-			try:
-				# Check approved leave for the day
-				leave = frappe.db.sql(
-					"""
-					SELECT name, leave_type, half_day, half_day_date
-					FROM `tabLeave Application`
-					WHERE employee = %s
-					AND docstatus = 1
-					AND status IN ('Approved')
-					AND %s BETWEEN from_date AND to_date
-					ORDER BY modified DESC
-					LIMIT 1
-					""",
-					(emp, processing_date),
-					as_dict=True
-				)
-				if leave:
-					la = leave[0]
-					# Determine status: Half Day or On Leave
-					is_half_day = int(la.get("half_day") or 0) == 1 and la.get("half_day_date") == processing_date
-					att_status = "Half Day" if is_half_day else "On Leave"
-					attendance = frappe.get_doc({
-						"doctype": "Attendance",
-						"employee": emp,
-						"attendance_date": processing_date,
-						"shift": shift_type_name,
-						"status": att_status,
-						"leave_type": la.get("leave_type"),
-						"company": frappe.defaults.get_user_default("Company")
-					})
-					attendance.insert(ignore_permissions=True)
-					attendance.submit()
-					leaves_marked += 1
-				else:
-					attendance = frappe.get_doc({
-						"doctype": "Attendance",
-						"employee": emp,
-						"attendance_date": processing_date,
-						"shift": shift_type_name,
-						"status": "Absent",
-						"company": frappe.defaults.get_user_default("Company")
-					})
-					attendance.insert(ignore_permissions=True)
-					attendance.submit()
-					absents_marked += 1
-			except Exception as e:
-				frappe.log_error(message=str(e), title="Daily Attendance - Absent/Leave Creation Error")
-			continue
-		
-		# Consolidate: first IN, last OUT
-		first_in = next((c for c in checks if c["log_type"] == "IN"), None)
-		last_out = next((c for c in reversed(checks) if c["log_type"] == "OUT"), None)
-		
-		# Determine late/early logic
-		late_enabled = bool(getattr(shift_type, "enable_late_entry_marking", False))
-		grace = int(getattr(shift_type, "late_entry_grace_period", 0) or 0)
-		
-		needs_regularization = False
-		late_time_val = None
-		
-		from datetime import datetime, timedelta, time as dt_time
-		from frappe.utils import get_time
-		
-		if first_in:
-			# Check late against shift start + grace
-			# Ensure shift_type.start_time is a time object, not timedelta
-			start_time = shift_type.start_time
-			if isinstance(start_time, timedelta):
-				# Convert timedelta to time (assuming it's seconds from midnight)
-				total_seconds = int(start_time.total_seconds())
-				hours = total_seconds // 3600
-				minutes = (total_seconds % 3600) // 60
-				seconds = total_seconds % 60
-				start_time = get_time(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-			elif not isinstance(start_time, dt_time):
-				start_time = get_time(start_time)
-			
-			shift_start_dt = datetime.combine(processing_date, start_time)
-			shift_start_dt += timedelta(minutes=grace)
-			first_in_dt = frappe.utils.get_datetime(first_in["time"])
-			if first_in_dt > shift_start_dt:
-				if not late_enabled:
-					needs_regularization = True
-				else:
-					# keep late value for record
-					diff = first_in_dt - shift_start_dt
-					late_time_val = get_time(f"{int(diff.total_seconds()//3600):02d}:{int((diff.total_seconds()%3600)//60):02d}:{int(diff.total_seconds()%60):02d}")
-		
-		if last_out:
-			# Early exit if before end time
-			# Ensure shift_type.end_time is a time object, not timedelta
-			end_time = shift_type.end_time
-			if isinstance(end_time, timedelta):
-				# Convert timedelta to time (assuming it's seconds from midnight)
-				total_seconds = int(end_time.total_seconds())
-				hours = total_seconds // 3600
-				minutes = (total_seconds % 3600) // 60
-				seconds = total_seconds % 60
-				end_time = get_time(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
-			elif not isinstance(end_time, dt_time):
-				end_time = get_time(end_time)
-			
-			shift_end_dt = datetime.combine(processing_date, end_time)
-			last_out_dt = frappe.utils.get_datetime(last_out["time"])
-			if last_out_dt < shift_end_dt:
-				needs_regularization = True
-		
-		# Edge cases: only IN or only OUT
-		if not first_in or not last_out:
-			needs_regularization = True
-		
-		try:
-			# Avoid duplicates: if Attendance already exists for the date, skip creation
-			existing_att = frappe.db.exists("Attendance", {"employee": emp, "attendance_date": processing_date, "docstatus": ["<", 2]})
-			if existing_att:
-				continue
-			
-			if not needs_regularization and first_in and last_out:
-				# Auto mark Present
-				attendance = frappe.get_doc({
+		if not summary or not summary.punch_count:
+			# Check approved leave for the day
+			la = data.get_leave(emp, processing_date)
+			if la:
+				# Determine status: Half Day or On Leave
+				is_half_day = int(la.get("half_day") or 0) == 1 and la.get("half_day_date") == processing_date
+				plan.append(("leave", {
 					"doctype": "Attendance",
 					"employee": emp,
-					"employee_name": frappe.db.get_value("Employee", emp, "employee_name"),
 					"attendance_date": processing_date,
 					"shift": shift_type_name,
-					"status": "Present",
-					"company": frappe.defaults.get_user_default("Company")
-				})
-				attendance.insert(ignore_permissions=True)
-				attendance.submit()
-				created_attendance += 1
+					"status": "Half Day" if is_half_day else "On Leave",
+					"leave_type": la.get("leave_type"),
+					"company": data.company
+				}))
 			else:
-				# Skip if a regularization already exists for employee/date
-				existing_reg = frappe.db.exists("Attendance Regularization", {"employee": emp, "posting_date": processing_date, "docstatus": ["<", 2]})
-				if existing_reg:
-					continue
-				# Create Attendance Regularization with consolidated items
-				reg = frappe.get_doc({
-					"doctype": "Attendance Regularization",
+				plan.append(("absent", {
+					"doctype": "Attendance",
 					"employee": emp,
-					"employee_name": frappe.db.get_value("Employee", emp, "employee_name"),
-					"posting_date": processing_date,
+					"attendance_date": processing_date,
 					"shift": shift_type_name,
-					"start_time": shift_type.start_time,
-					"end_time": shift_type.end_time,
-					"late": late_time_val,
-					"status": "Pending"
-				})
-				# Add items: first IN and last OUT if they exist
-				for c in [first_in, last_out]:
-					if c:
-						reg.append("attendance_regularization_item", {
-							"time": c["time"],
-							"log_type": c["log_type"],
-							"employee_checkin": c["name"]
-						})
-				reg.insert(ignore_permissions=True)
-				created_regularizations += 1
-		except Exception as e:
-			frappe.log_error(message=str(e), title="Daily Attendance - Creation Error")
+					"status": "Absent",
+					"company": data.company
+				}))
 			continue
-	
-	frappe.logger().info(
-		f"Daily Attendance Summary {processing_date}: Present={created_attendance}, Regularizations={created_regularizations}, Absent={absents_marked}, OnLeave/HalfDay={leaves_marked}"
+
+		needs_regularization, late_time_val, first_in, last_out = evaluate_day_checkins(
+			processing_date, get_summary_checkins(summary), shift_type
+		)
+
+		# Avoid duplicates: if Attendance already exists for the date, skip creation
+		if emp in existing_attendance:
+			continue
+
+		if not needs_regularization and first_in and last_out:
+			# Auto mark Present
+			plan.append(("present", {
+				"doctype": "Attendance",
+				"employee": emp,
+				"employee_name": employee.employee_name,
+				"attendance_date": processing_date,
+				"shift": shift_type_name,
+				"status": "Present",
+				"company": data.company
+			}))
+			existing_attendance.add(emp)
+		else:
+			# Skip if a regularization already exists for employee/date
+			if emp in existing_regularizations:
+				continue
+			# Create Attendance Regularization with consolidated items (first IN and last OUT)
+			plan.append(("regularizations", {
+				"doctype": "Attendance Regularization",
+				"employee": emp,
+				"employee_name": employee.employee_name,
+				"posting_date": processing_date,
+				"shift": shift_type_name,
+				"start_time": shift_type.start_time,
+				"end_time": shift_type.end_time,
+				"late": late_time_val,
+				"status": "Pending",
+				"attendance_regularization_item": [
+					{
+						"time": c["time"],
+						"log_type": c["log_type"],
+						"employee_checkin": c["name"]
+					}
+					for c in (first_in, last_out) if c
+				]
+			}))
+			existing_regularizations.add(emp)
+
+	return plan
+
+
+def load_consolidation_data(from_date, to_date, summaries=None, include_existing=True):
+	"""
+	Load everything the consolidation rules read for a date range with one query per
+	concern, so that planning any day of the range runs in memory.
+
+	Args:
+		from_date: First date of the range
+		to_date: Last date of the range
+		summaries: Employee-day summaries keyed by (employee, date); the stored
+			Attendance Day Summary rows of the range when not passed
+		include_existing: Load the Attendance and Regularization records already created,
+			which the rules skip
+
+	Approved leave for the whole range is indexed up front (see get_approved_leave_index).
+
+	Returns:
+		frappe._dict with assignments, employees, shift_types, summaries,
+		existing_attendance, existing_regularizations, company and get_leave
+	"""
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import SUMMARY_FIELDS
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+
+	# Shift assignments active on any day of the range
+	assignments = frappe.db.sql(
+		"""
+		SELECT sa.employee, sa.shift_type, sa.start_date, sa.end_date
+		FROM `tabShift Assignment` sa
+		WHERE sa.docstatus = 1
+		AND sa.start_date <= %s
+		AND (sa.end_date IS NULL OR sa.end_date >= %s)
+		ORDER BY sa.employee, sa.start_date
+		""",
+		(to_date, from_date),
+		as_dict=True
+	)
+
+	if summaries is None:
+		summaries = {
+			(s.employee, getdate(s.attendance_date)): s for s in frappe.get_all(
+				"Attendance Day Summary",
+				filters={"attendance_date": ["between", [from_date, to_date]]},
+				fields=SUMMARY_FIELDS
+			)
+		}
+
+	existing_attendance = {}
+	existing_regularizations = {}
+	if include_existing and assignments:
+		for a in frappe.get_all(
+			"Attendance",
+			filters={"attendance_date": ["between", [from_date, to_date]], "docstatus": ["<", 2]},
+			fields=["employee", "attendance_date"]
+		):
+			existing_attendance.setdefault(getdate(a.attendance_date), set()).add(a.employee)
+		for r in frappe.get_all(
+			"Attendance Regularization",
+			filters={"posting_date": ["between", [from_date, to_date]], "docstatus": ["<", 2]},
+			fields=["employee", "posting_date"]
+		):
+			existing_regularizations.setdefault(getdate(r.posting_date), set()).add(r.employee)
+
+	return frappe._dict(
+		assignments=assignments,
+		employees=get_consolidation_employees({sa.employee for sa in assignments}) if assignments else {},
+		shift_types=get_consolidation_shift_types({sa.shift_type for sa in assignments}) if assignments else {},
+		summaries=summaries,
+		existing_attendance=existing_attendance,
+		existing_regularizations=existing_regularizations,
+		company=frappe.defaults.get_user_default("Company"),
+		get_leave=get_approved_leave_index(from_date, to_date, {sa.employee for sa in assignments})
 	)
-	
+
+
+def get_assignments_for_day(data, processing_date):
+	"""Distinct (employee, shift_type) pairs of the assignments active on a date"""
+	seen = set()
+	assignments = []
+	for sa in data.assignments:
+		if getdate(sa.start_date) > processing_date or (sa.end_date and getdate(sa.end_date) < processing_date):
+			continue
+		key = (sa.employee, sa.shift_type)
+		if key not in seen:
+			seen.add(key)
+			assignments.append(sa)
+	return assignments
+
+
+def get_approved_leave_index(from_date, to_date, employees):
+	"""
+	Load the approved Leave Applications overlapping a date range with one query and
+	index them per (employee, date).
+
+	Where several applications cover the same day the most recently modified one wins,
+	as in the per-day lookup this replaces. Each entry carries half_day and
+	half_day_date so Half Day marking is decided from the index as well.
+
+	Returns:
+		Lookup function (employee, date) -> leave application dict or None
+	"""
+	from frappe.utils import date_diff
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	index = {}
+
+	if employees:
+		leaves = frappe.db.sql(
+			"""
+			SELECT name, employee, leave_type, half_day, half_day_date, from_date, to_date
+			FROM `tabLeave Application`
+			WHERE employee IN %(employees)s
+			AND docstatus = 1
+			AND status IN ('Approved')
+			AND from_date <= %(to_date)s
+			AND to_date >= %(from_date)s
+			ORDER BY modified
+			""",
+			{"employees": list(employees), "from_date": from_date, "to_date": to_date},
+			as_dict=True
+		)
+
+		for la in leaves:
+			if la.half_day_date:
+				la.half_day_date = getdate(la.half_day_date)
+			# Only the part of the interval inside the range is indexed
+			start = max(getdate(la.from_date), from_date)
+			end = min(getdate(la.to_date), to_date)
+			for i in range(date_diff(end, start) + 1):
+				# Later (more recently modified) applications overwrite earlier ones
+				index[(la.employee, add_days(start, i))] = la
+
+	def get_leave(employee, processing_date):
+		return index.get((employee, processing_date))
+
+	return get_leave
+
+
+# Shift Type settings that can be changed for a simulation run
+SIMULATION_SHIFT_FIELDS = ("start_time", "end_time", "late_entry_grace_period", "enable_late_entry_marking")
+
+
+@frappe.whitelist()
+def simulate_attendance_consolidation(from_date, to_date, shift_overrides=None, include_existing=0):
+	"""
+	Dry run of the consolidation rules over a date range. Runs entirely in memory on
+	data loaded once for the range and writes nothing, not even stale day summaries.
+
+	Args:
+		from_date: First date to simulate
+		to_date: Last date to simulate
+		shift_overrides: Shift Type settings to try, e.g.
+			{"General": {"late_entry_grace_period": 15, "enable_late_entry_marking": 1}}
+		include_existing: Skip employee-days that already have Attendance or a
+			Regularization, as the real run would. Off by default so that closed
+			periods can be re-evaluated.
+
+	Everything the rules read is loaded once for the whole range, so a full year
+	simulates in one request. The result exposes every employee's outcomes, so only
+	HR and System Managers may run it.
+
+	Returns:
+		dict: Counts per outcome for the range ("totals") and per employee
+		("employees"); with overrides also the counts under the current settings
+		("baseline")
+	"""
+	from frappe.utils import cint, date_diff
+
+	from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import get_range_summaries
+
+	frappe.only_for(("HR Manager", "System Manager"))
+
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	if from_date > to_date:
+		frappe.throw(_("From Date cannot be after To Date"))
+
+	if isinstance(shift_overrides, str):
+		shift_overrides = json.loads(shift_overrides)
+	shift_overrides = shift_overrides or {}
+
+	for shift_type_name, overrides in shift_overrides.items():
+		invalid = set(overrides) - set(SIMULATION_SHIFT_FIELDS)
+		if invalid:
+			frappe.throw(_("Cannot simulate changes to {0} of Shift Type {1}").format(", ".join(invalid), shift_type_name))
+
+	data = load_consolidation_data(
+		from_date, to_date,
+		summaries=get_range_summaries(from_date, to_date),
+		include_existing=cint(include_existing)
+	)
+
+	days = [add_days(from_date, i) for i in range(date_diff(to_date, from_date) + 1)]
+
+	def run(run_data):
+		totals = dict.fromkeys(CONSOLIDATION_OUTCOMES, 0)
+		employees = {}
+		for day in days:
+			for outcome, row in plan_attendance_for_date(day, run_data):
+				totals[outcome] += 1
+				counts = employees.setdefault(row["employee"], dict.fromkeys(CONSOLIDATION_OUTCOMES, 0))
+				counts[outcome] += 1
+		return totals, employees
+
+	simulated = frappe._dict(data)
+	simulated.shift_types = {
+		name: frappe._dict(st, **shift_overrides.get(name, {})) for name, st in data.shift_types.items()
+	}
+	totals, employees = run(simulated)
+
+	result = {
+		"from_date": str(from_date),
+		"to_date": str(to_date),
+		"days": len(days),
+		"totals": totals,
+		"employees": employees
+	}
+	if shift_overrides:
+		result["baseline"] = run(data)[0]
+
+	return result
+
+
+def evaluate_day_checkins(processing_date, checks, shift_type):
+	"""
+	Apply the late entry / early exit rules to one employee-day.
+
+	Args:
+		processing_date: Date being consolidated
+		checks: Checkins of the employee for the day, ordered by time
+		shift_type: Shift Type row with start_time, end_time, late_entry_grace_period
+			and enable_late_entry_marking
+
+	Returns:
+		tuple (needs_regularization: bool, late_time: time or None, first_in, last_out)
+	"""
+	# Consolidate: first IN, last OUT
+	first_in = next((c for c in checks if c["log_type"] == "IN"), None)
+	last_out = next((c for c in reversed(checks) if c["log_type"] == "OUT"), None)
+
+	# Determine late/early logic
+	late_enabled = bool(shift_type.get("enable_late_entry_marking"))
+	grace = int(shift_type.get("late_entry_grace_period") or 0)
+
+	needs_regularization = False
+	late_time_val = None
+
+	if first_in:
+		# Check late against shift start + grace
+		shift_start_dt = datetime.combine(processing_date, to_time(shift_type.start_time))
+		shift_start_dt += timedelta(minutes=grace)
+		first_in_dt = get_datetime(first_in["time"])
+		if first_in_dt > shift_start_dt:
+			if not late_enabled:
+				needs_regularization = True
+			else:
+				# keep late value for record
+				diff = first_in_dt - shift_start_dt
+				late_time_val = get_time(f"{int(diff.total_seconds()//3600):02d}:{int((diff.total_seconds()%3600)//60):02d}:{int(diff.total_seconds()%60):02d}")
+
+	if last_out:
+		# Early exit if before end time
+		shift_end_dt = datetime.combine(processing_date, to_time(shift_type.end_time))
+		last_out_dt = get_datetime(last_out["time"])
+		if last_out_dt < shift_end_dt:
+			needs_regularization = True
+
+	# Edge cases: only IN or only OUT
+	if not first_in or not last_out:
+		needs_regularization = True
+
+	return needs_regularization, late_time_val, first_in, last_out
+
+
+def to_time(value):
+	"""
+	Normalize a Shift Type time (timedelta from the database, string or time) to a time object
+	"""
+	if isinstance(value, timedelta):
+		# Convert timedelta to time (seconds from midnight)
+		total_seconds = int(value.total_seconds())
+		hours = total_seconds // 3600
+		minutes = (total_seconds % 3600) // 60
+		seconds = total_seconds % 60
+		return get_time(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
+	elif not isinstance(value, dt_time):
+		return get_time(value)
+	return value
+
+
+def get_consolidation_employees(employees):
+	"""Employee name and joining date for a set of employees, keyed by employee"""
 	return {
-		"present": created_attendance,
-		"regularizations": created_regularizations,
-		"absent": absents_marked,
-		"leave": leaves_marked
+		e.name: e for e in frappe.get_all(
+			"Employee",
+			filters={"name": ["in", list(employees)]},
+			fields=["name", "employee_name", "date_of_joining"]
+		)
 	}
+
+
+def get_consolidation_shift_types(shift_types):
+	"""Shift Type timings and late entry settings for a set of shift types, keyed by name"""
+	return {
+		st.name: st for st in frappe.get_all(
+			"Shift Type",
+			filters={"name": ["in", list(shift_types)]},
+			fields=["name", "start_time", "end_time", "enable_late_entry_marking", "late_entry_grace_period"]
+		)
+	}
+
+
+def create_planned_records(plan):
+	"""
+	Create the planned records one document at a time (insert and submit each).
+
+	Returns:
+		Stats dict with the number of records created per outcome
+	"""
+	stats = dict.fromkeys(CONSOLIDATION_OUTCOMES, 0)
+
+	for outcome, row in plan:
+		try:
+			doc = frappe.get_doc(row)
+			doc.insert(ignore_permissions=True)
+			if row["doctype"] == "Attendance":
+				doc.submit()
+			stats[outcome] += 1
+		except Exception as e:
+			frappe.log_error(message=str(e), title=CONSOLIDATION_ERROR_TITLES[outcome])
+
+	return stats
+
+
+def create_planned_records_in_bulk(plan):
+	"""
+	Create the planned records with the bulk creation API: one validation pass and
+	multi-row inserts per doctype.
+
+	Returns:
+		Stats dict with the number of records created per outcome
+	"""
+	from hamptons.hamptons.attendance_bulk import bulk_create_attendance, bulk_create_regularizations
+
+	stats = dict.fromkeys(CONSOLIDATION_OUTCOMES, 0)
+	outcomes = {id(row): outcome for outcome, row in plan}
+
+	attendance_rows = [row for outcome, row in plan if row["doctype"] == "Attendance"]
+	regularization_rows = [row for outcome, row in plan if row["doctype"] == "Attendance Regularization"]
+
+	for result in (bulk_create_attendance(attendance_rows), bulk_create_regularizations(regularization_rows)):
+		for row, _name in result["created"]:
+			stats[outcomes[id(row)]] += 1
+		for row, error in result["errors"]:
+			frappe.log_error(message=error, title=CONSOLIDATION_ERROR_TITLES[outcomes[id(row)]])
+
+	return stats
@@ -0,0 +1,12 @@
+import frappe
+
+
+def execute():
+	"""Add the Attendance Regularization indexes to existing sites"""
+	from hamptons.hamptons.doctype.attendance_regularization.attendance_regularization import (
+		on_doctype_update,
+	)
+
+	# search_index on employee_checkin is created by the schema sync of the child table
+	frappe.reload_doc("hamptons", "doctype", "attendance_regularization_item")
+	on_doctype_update()
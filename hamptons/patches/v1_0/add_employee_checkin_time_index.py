@@ -0,0 +1,5 @@
+def execute():
+	"""Add the Employee Checkin (employee, time) index to existing sites"""
+	from hamptons.install import add_checkin_time_index
+
+	add_checkin_time_index()
@@ -0,0 +1,5 @@
+def execute():
+	"""Add the creation indexes of the log purge to existing sites"""
+	from hamptons.install import add_purge_creation_indexes
+
+	add_purge_creation_indexes()
@@ -0,0 +1,11 @@
+import frappe
+
+
+def execute():
+	"""Build the hourly check-in rollup from the existing checkins"""
+	from hamptons.hamptons.doctype.employee_checkin_rollup.employee_checkin_rollup import (
+		rebuild_checkin_rollup,
+	)
+
+	frappe.reload_doc("hamptons", "doctype", "employee_checkin_rollup")
+	rebuild_checkin_rollup()
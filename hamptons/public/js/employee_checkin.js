@@ -76,38 +76,65 @@ function show_checkin_summary(frm) {
 }
 
 function show_employee_recent_checkins(frm) {
-  // Show recent check-ins for the employee (last 7 days)
-  frappe.call({
-    method: 'hamptons.hamptons.dashboard_api.get_employee_checkin_details',
-    args: {
-      employee: frm.doc.employee,
-      from_date: frappe.datetime.add_days(frappe.datetime.get_today(), -7),
-      to_date: frappe.datetime.get_today()
-    },
-    callback: function(r) {
-      if (r.message && r.message.checkins_by_date) {
-        let html = '<div class="recent-checkins" style="padding: 10px; background: #f5f7fa; border-radius: 5px; margin: 10px 0;">';
-        html += '<h5 style="margin-bottom: 10px; color: #36414c;">Recent Check-ins (Last 7 Days)</h5>';
-        
+  // Show recent check-ins for the employee (last 7 days), one page at a time
+  const dialog = new frappe.ui.Dialog({
+    title: __('Recent Check-ins'),
+    fields: [{ fieldtype: 'HTML', fieldname: 'checkins_html' }],
+    secondary_action_label: __('Load Older'),
+    secondary_action: () => load_page()
+  });
+  const days = [];
+  let cursor = null;
+
+  const render = function() {
+    let html = '<div class="recent-checkins" style="padding: 10px; background: #f5f7fa; border-radius: 5px; margin: 10px 0;">';
+    html += '<h5 style="margin-bottom: 10px; color: #36414c;">Recent Check-ins (Last 7 Days)</h5>';
+
+    days.forEach(function(day) {
+      html += `<div style="margin-bottom: 10px; padding: 8px; background: white; border-radius: 3px;">`;
+      html += `<strong>${day.date_formatted}</strong><br>`;
+      html += '<small>';
+      day.checkins.forEach(function(checkin) {
+        let type_color = checkin.log_type === 'IN' ? 'green' : 'red';
+        html += `<span style="color: ${type_color};">${checkin.log_type}: ${checkin.time_formatted}</span> `;
+      });
+      html += '</small></div>';
+    });
+
+    html += '</div>';
+    dialog.fields_dict.checkins_html.$wrapper.html(html);
+  };
+
+  const load_page = function() {
+    frappe.call({
+      method: 'hamptons.hamptons.dashboard_api.get_employee_checkin_history',
+      args: {
+        employee: frm.doc.employee,
+        from_date: frappe.datetime.add_days(frappe.datetime.get_today(), -7),
+        to_date: frappe.datetime.get_today(),
+        cursor: cursor ? JSON.stringify(cursor) : null,
+        page_length: 50
+      },
+      callback: function(r) {
+        if (!r.message) return;
+
         r.message.checkins_by_date.forEach(function(day) {
-          html += `<div style="margin-bottom: 10px; padding: 8px; background: white; border-radius: 3px;">`;
-          html += `<strong>${day.date_formatted}</strong><br>`;
-          html += '<small>';
-          day.checkins.forEach(function(checkin) {
-            let type_color = checkin.log_type === 'IN' ? 'green' : 'red';
-            html += `<span style="color: ${type_color};">${checkin.log_type}: ${checkin.time_formatted}</span> `;
-          });
-          html += '</small></div>';
-        });
-        
-        html += '</div>';
-        
-        frappe.msgprint({
-          title: __('Recent Check-ins'),
-          message: html,
-          indicator: 'blue'
+          // A day cut by the previous page continues here
+          const last = days[days.length - 1];
+          if (last && last.date === day.date) {
+            last.checkins = last.checkins.concat(day.checkins);
+          } else {
+            days.push(day);
+          }
         });
+        cursor = r.message.next_cursor;
+
+        render();
+        dialog.get_secondary_btn().toggle(!!cursor);
+        dialog.show();
       }
-    }
-  });
+    });
+  };
+
+  load_page();
 }
@@ -217,10 +217,10 @@ def create_leave_type(leave_data):
 
 	except Exception as e:
 		frappe.log_error(
-			message=f"Error creating leave type {leave_type_name}: {str(e)}",
+			message=f"Error creating leave type {leave_type_name}: {e!s}",
 			title="Leave Type Creation Error"
 		)
-		print(f"  ✗ Error creating leave type '{leave_type_name}': {str(e)}")
+		print(f"  ✗ Error creating leave type '{leave_type_name}': {e!s}")
 		frappe.db.rollback()
 		return None
 
@@ -270,10 +270,10 @@ def create_leave_policy():
 
 	except Exception as e:
 		frappe.log_error(
-			message=f"Error creating leave policy: {str(e)}",
+			message=f"Error creating leave policy: {e!s}",
 			title="Leave Policy Creation Error"
 		)
-		print(f"  ✗ Error creating leave policy: {str(e)}")
+		print(f"  ✗ Error creating leave policy: {e!s}")
 		frappe.db.rollback()
 		return None
 
@@ -354,7 +354,7 @@ def assign_leave_policy_to_employee(employee_id, policy_name="Oman Labor Law Lea
 	Returns:
 		Leave Policy Assignment document
 	"""
-	from frappe.utils import today, getdate
+	from frappe.utils import getdate, today
 
 	if not effective_from:
 		effective_from = today()
@@ -397,27 +397,198 @@ def assign_leave_policy_to_employee(employee_id, policy_name="Oman Labor Law Lea
 
 	except Exception as e:
 		frappe.log_error(
-			message=f"Error assigning leave policy to {employee_id}: {str(e)}",
+			message=f"Error assigning leave policy to {employee_id}: {e!s}",
 			title="Leave Policy Assignment Error"
 		)
-		print(f"  ✗ Error: {str(e)}")
+		print(f"  ✗ Error: {e!s}")
 		frappe.db.rollback()
 		return None
 
 
-def bulk_assign_leave_policy(filters=None, policy_name="Oman Labor Law Leave Policy"):
+def get_existing_assignments(employees, policy_name, effective_from):
+	"""
+	Not cancelled assignments of the policy for the employees, in one query.
+
+	Returns:
+		dict: Employee to the assignment row
+	"""
+	if not employees:
+		return {}
+
+	existing = {}
+	for row in frappe.get_all(
+		"Leave Policy Assignment",
+		filters={
+			"employee": ["in", employees],
+			"leave_policy": policy_name,
+			"effective_from": effective_from,
+			"docstatus": ["<", 2]
+		},
+		fields=["name", "employee", "docstatus"],
+		order_by="creation"
+	):
+		existing.setdefault(row.employee, row)
+
+	return existing
+
+
+def assign_leave_policies(employees, policy_name="Oman Labor Law Leave Policy", effective_from=None,
+						carry_forward=1, chunk_size=50, job_run=None, job_name="Leave Policy Assignment"):
+	"""
+	Assign a leave policy to employees in chunked transactions.
+
+	Existing assignments are loaded in one query up front: submitted ones are left as
+	they are, drafts are submitted and missing ones created. Each employee runs in its
+	own savepoint so a failure only rolls back that employee; the chunk is committed as
+	a whole.
+
+	Args:
+		employees: Employee IDs
+		policy_name: Name of the leave policy
+		effective_from: Effective date (default: today)
+		carry_forward: Whether to carry forward leaves
+		chunk_size: Employees per transaction
+		job_run: Hamptons Job Run to report progress to, created when missing
+
+	Returns:
+		dict: Created, submitted, already assigned and failed counts
+	"""
+	from frappe.utils import getdate, today
+
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import JobProgress
+
+	# Everything after the run is marked Running happens inside fail_on_error, so the
+	# run can not be left Running by an escaping exception
+	progress = JobProgress(job_name, total=len(employees), phase=policy_name, job_run=job_run)
+
+	with progress.fail_on_error():
+		effective_from = getdate(effective_from or today())
+		existing = get_existing_assignments(employees, policy_name, effective_from)
+
+		created = 0
+		submitted = 0
+		already_assigned = 0
+		failed = 0
+		for start in range(0, len(employees), chunk_size):
+			for employee in employees[start:start + chunk_size]:
+				current = existing.get(employee)
+				if current and current.docstatus == 1:
+					already_assigned += 1
+					continue
+
+				frappe.db.savepoint("leave_policy_assignment")
+				try:
+					if current:
+						doc = frappe.get_doc("Leave Policy Assignment", current.name)
+					else:
+						doc = frappe.new_doc("Leave Policy Assignment")
+						doc.employee = employee
+						doc.leave_policy = policy_name
+						doc.effective_from = effective_from
+
+					doc.carry_forward = carry_forward
+					doc.save(ignore_permissions=True)
+					doc.submit()
+
+					if current:
+						submitted += 1
+					else:
+						created += 1
+				except Exception as e:
+					frappe.db.rollback(save_point="leave_policy_assignment")
+					frappe.log_error(
+						message=f"Error assigning leave policy to {employee}: {e!s}",
+						title="Leave Policy Assignment Error"
+					)
+					progress.error(f"{employee}: {e!s}")
+					failed += 1
+
+			frappe.db.commit()
+			progress.update(processed=min(start + chunk_size, len(employees)))
+
+		result = {
+			"created": created,
+			"submitted": submitted,
+			"already_assigned": already_assigned,
+			"failed": failed
+		}
+		progress.finish(result)
+	frappe.db.commit()
+
+	return result
+
+
+def enqueue_bulk_assign_leave_policy(filters=None, policy_name="Oman Labor Law Leave Policy",
+									effective_from=None, workers=1, chunk_size=50):
+	"""
+	Bulk assign leave policy in background jobs, with the matching employees split
+	across `workers` jobs of the long queue.
+
+	Run using: bench --site [site] execute hamptons.setup_oman_leave_policy.enqueue_bulk_assign_leave_policy --kwargs "{'workers': 4}"
+
+	Args:
+		filters: Dictionary of Employee filters (default: Active employees)
+		policy_name: Name of the leave policy
+		effective_from: Effective date (default: today)
+		workers: Number of background jobs
+		chunk_size: Employees per transaction
+
+	Returns:
+		Dictionary with the Hamptons Job Run of every worker
+	"""
+	from frappe.utils import cint, getdate, today
+
+	from hamptons.hamptons.doctype.hamptons_job_run.hamptons_job_run import create_job_run
+
+	if not frappe.db.exists("Leave Policy", policy_name):
+		return {"status": "failed", "message": f"Leave Policy '{policy_name}' not found"}
+
+	employees = frappe.get_all("Employee", filters=filters or {"status": "Active"}, pluck="name", order_by="name")
+	if not employees:
+		return {"status": "failed", "message": "No employees found"}
+
+	effective_from = getdate(effective_from or today())
+	workers = max(1, min(cint(workers), len(employees)))
+
+	job_runs = []
+	for i in range(workers):
+		group = employees[i::workers]
+		job_name = f"Leave Policy Assignment ({i + 1}/{workers})"
+		job_run = create_job_run(job_name, total=len(group), phase=policy_name)
+		frappe.enqueue(
+			"hamptons.setup_oman_leave_policy.assign_leave_policies",
+			queue="long",
+			timeout=3600,
+			employees=group,
+			policy_name=policy_name,
+			effective_from=effective_from,
+			chunk_size=chunk_size,
+			job_run=job_run,
+			job_name=job_name
+		)
+		job_runs.append(job_run)
+
+	frappe.db.commit()
+
+	return {
+		"status": "queued",
+		"total_employees": len(employees),
+		"job_runs": job_runs
+	}
+
+
+def bulk_assign_leave_policy(filters=None, policy_name="Oman Labor Law Leave Policy", chunk_size=50):
 	"""
 	Bulk assign leave policy to multiple employees
 
 	Args:
 		filters: Dictionary of filters (e.g., {"status": "Active", "department": "HR"})
 		policy_name: Name of the leave policy
+		chunk_size: Employees per transaction
 
 	Returns:
 		Dictionary with results
 	"""
-	from frappe.utils import today
-
 	print("\n" + "="*70)
 	print("BULK ASSIGNING LEAVE POLICY TO EMPLOYEES")
 	print("="*70 + "\n")
@@ -426,11 +597,12 @@ def bulk_assign_leave_policy(filters=None, policy_name="Oman Labor Law Leave Pol
 	if not filters:
 		filters = {"status": "Active"}
 
+	if not frappe.db.exists("Leave Policy", policy_name):
+		print(f"✗ Leave Policy '{policy_name}' not found")
+		return {"status": "failed", "message": "Leave Policy not found"}
+
 	# Get employees matching filters
-	employees = frappe.get_all("Employee",
-		filters=filters,
-		fields=["name", "employee_name", "department", "designation"]
-	)
+	employees = frappe.get_all("Employee", filters=filters, pluck="name", order_by="name")
 
 	if not employees:
 		print("✗ No employees found matching the filters")
@@ -439,30 +611,19 @@ def bulk_assign_leave_policy(filters=None, policy_name="Oman Labor Law Leave Pol
 	print(f"Found {len(employees)} employees")
 	print("-" * 70)
 
-	success_count = 0
-	failed_count = 0
-
-	for emp in employees:
-		result = assign_leave_policy_to_employee(
-			employee_id=emp.name,
-			policy_name=policy_name,
-			effective_from=today()
-		)
-
-		if result:
-			success_count += 1
-		else:
-			failed_count += 1
+	result = assign_leave_policies(employees, policy_name=policy_name, chunk_size=chunk_size)
+	success_count = result["created"] + result["submitted"] + result["already_assigned"]
 
 	print("\n" + "-" * 70)
-	print(f"✅ BULK ASSIGNMENT COMPLETE")
+	print("✅ BULK ASSIGNMENT COMPLETE")
 	print(f"   Success: {success_count}")
-	print(f"   Failed: {failed_count}")
+	print(f"   Already assigned: {result['already_assigned']}")
+	print(f"   Failed: {result['failed']}")
 	print("="*70 + "\n")
 
 	return {
 		"status": "success",
 		"total_employees": len(employees),
 		"success_count": success_count,
-		"failed_count": failed_count
+		"failed_count": result["failed"]
 	}
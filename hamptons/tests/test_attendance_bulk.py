@@ -0,0 +1,141 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import add_days, getdate
+
+from hamptons.overrides.employee_checkin import consolidate_attendance_for_date
+from hamptons.tests.utils import make_employee, make_shift_assignment
+
+TEST_SHIFT = "_Test Bulk Consolidation Shift"
+
+
+class TestAttendanceBulk(unittest.TestCase):
+	"""Bulk consolidation must create exactly the records the per-document path creates"""
+
+	def setUp(self):
+		self.processing_date = getdate(add_days(getdate(), -3))
+
+		if not frappe.db.exists("Shift Type", TEST_SHIFT):
+			frappe.get_doc(
+				{
+					"doctype": "Shift Type",
+					"name": TEST_SHIFT,
+					"start_time": "08:00:00",
+					"end_time": "17:00:00",
+					"late_entry_grace_period": 10,
+				}
+			).insert(ignore_permissions=True)
+
+		# on time, late, early exit, IN only, no punches (absent)
+		self.punches = {
+			"On Time": [("07:55:00", "IN"), ("17:05:00", "OUT")],
+			"Late": [("08:30:00", "IN"), ("17:10:00", "OUT")],
+			"Early": [("08:00:00", "IN"), ("15:00:00", "OUT")],
+			"In Only": [("08:00:00", "IN")],
+			"Absent": [],
+		}
+		self.employees = {}
+		for label, punches in self.punches.items():
+			employee = make_employee(f"_Test Bulk {label}")
+			self.employees[label] = employee
+			make_shift_assignment(employee, TEST_SHIFT, self.processing_date, self.processing_date)
+			for punch_time, log_type in punches:
+				# db_insert skips the after_insert hook that creates regularizations on its own
+				frappe.get_doc(
+					{
+						"doctype": "Employee Checkin",
+						"employee": employee,
+						"time": f"{self.processing_date} {punch_time}",
+						"log_type": log_type,
+						"skip_auto_attendance": 1,
+					}
+				).db_insert()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def snapshot(self):
+		"""Records created by the consolidation, without names and timestamps"""
+		employees = list(self.employees.values())
+
+		attendance = frappe.get_all(
+			"Attendance",
+			filters={"employee": ["in", employees], "attendance_date": self.processing_date},
+			fields=[
+				"employee",
+				"employee_name",
+				"attendance_date",
+				"shift",
+				"status",
+				"leave_type",
+				"leave_application",
+				"company",
+				"department",
+				"docstatus",
+			],
+			order_by="employee",
+		)
+
+		regularizations = []
+		for reg in frappe.get_all(
+			"Attendance Regularization",
+			filters={"employee": ["in", employees], "posting_date": self.processing_date},
+			fields=[
+				"name",
+				"employee",
+				"employee_name",
+				"posting_date",
+				"shift",
+				"start_time",
+				"end_time",
+				"late",
+				"status",
+				"reports_to",
+				"docstatus",
+			],
+			order_by="employee",
+		):
+			reg["items"] = frappe.get_all(
+				"Attendance Regularization Item",
+				filters={"parent": reg.pop("name")},
+				fields=["idx", "time", "log_type", "employee_checkin", "docstatus"],
+				order_by="idx",
+			)
+			regularizations.append(reg)
+
+		return attendance, regularizations
+
+	def test_bulk_matches_per_document_path(self):
+		frappe.db.savepoint("before_consolidation")
+
+		per_document_stats = consolidate_attendance_for_date(self.processing_date, bulk=False)
+		per_document_records = self.snapshot()
+
+		frappe.db.rollback(save_point="before_consolidation")
+
+		bulk_stats = consolidate_attendance_for_date(self.processing_date, bulk=True)
+		bulk_records = self.snapshot()
+
+		self.assertEqual(bulk_stats, per_document_stats)
+		self.assertEqual(bulk_records, per_document_records)
+
+		attendance, regularizations = bulk_records
+		self.assertEqual(
+			{a.employee: a.status for a in attendance},
+			{self.employees["On Time"]: "Present", self.employees["Absent"]: "Absent"},
+		)
+		self.assertEqual(
+			{r.employee for r in regularizations},
+			{self.employees[label] for label in ("Late", "Early", "In Only")},
+		)
+
+	def test_bulk_skips_existing_attendance(self):
+		consolidate_attendance_for_date(self.processing_date, bulk=True)
+		stats = consolidate_attendance_for_date(self.processing_date, bulk=True)
+
+		self.assertEqual(stats["present"], 0)
+		self.assertEqual(stats["regularizations"], 0)
+		self.assertEqual(stats["absent"], 0)
@@ -0,0 +1,67 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import add_days, get_datetime, getdate
+
+from hamptons.hamptons.doctype.attendance_day_summary.attendance_day_summary import (
+	get_summary_name,
+	rebuild_day_summaries,
+)
+from hamptons.tests.utils import make_employee
+
+
+class TestAttendanceDaySummary(unittest.TestCase):
+	"""Edited checkins must be reflected in the employee-day summary"""
+
+	def setUp(self):
+		self.day = getdate(add_days(getdate(), -2))
+		self.employee = make_employee("_Test Day Summary")
+		self.checkins = {}
+		for punch_time, log_type in (("08:00:00", "IN"), ("17:00:00", "OUT")):
+			checkin = frappe.get_doc(
+				{
+					"doctype": "Employee Checkin",
+					"employee": self.employee,
+					"time": f"{self.day} {punch_time}",
+					"log_type": log_type,
+					"skip_auto_attendance": 1,
+				}
+			)
+			# db_insert skips the after_insert hook that creates regularizations on its own
+			checkin.db_insert()
+			self.checkins[log_type] = checkin.name
+		rebuild_day_summaries(self.day, self.day, employee=self.employee)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def summary(self, employee, day):
+		return frappe.db.get_value(
+			"Attendance Day Summary",
+			get_summary_name(employee, day),
+			["punch_count", "first_in", "last_out"],
+			as_dict=True,
+		)
+
+	def test_edited_time_moves_last_out(self):
+		checkin = frappe.get_doc("Employee Checkin", self.checkins["OUT"])
+		checkin.time = f"{self.day} 18:30:00"
+		checkin.save(ignore_permissions=True)
+
+		summary = self.summary(self.employee, self.day)
+		self.assertEqual(summary.punch_count, 2)
+		self.assertEqual(get_datetime(summary.last_out), get_datetime(f"{self.day} 18:30:00"))
+
+	def test_checkin_moved_to_another_day(self):
+		next_day = add_days(self.day, 1)
+		checkin = frappe.get_doc("Employee Checkin", self.checkins["OUT"])
+		checkin.time = f"{next_day} 17:00:00"
+		checkin.save(ignore_permissions=True)
+
+		summary = self.summary(self.employee, self.day)
+		self.assertEqual(summary.punch_count, 1)
+		self.assertIsNone(summary.last_out)
+		self.assertEqual(self.summary(self.employee, next_day).punch_count, 1)
@@ -0,0 +1,85 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import add_days
+
+
+class TestAttendanceRegularizationIndexes(unittest.TestCase):
+	"""The regularization lookups must read through their indexes"""
+
+	def setUp(self):
+		# Enough rows over several employees, dates and statuses for the optimizer to
+		# prefer the selective index over a scan
+		statuses = ("Pending", "Approved", "Rejected")
+		for i in range(60):
+			frappe.get_doc(
+				{
+					"doctype": "Attendance Regularization",
+					"employee": f"_T-EMP-{i % 12:04d}",
+					"reports_to": f"_T-EMP-{i % 5:04d}",
+					"posting_date": add_days("2025-01-01", i % 20),
+					"status": statuses[i % 3],
+					"docstatus": 0,
+				}
+			).db_insert()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def explain(self, query, values=None):
+		return frappe.db.sql(f"EXPLAIN {query}", values, as_dict=True)
+
+	def assertUsesIndex(self, query, alias, index, values=None):
+		plan = [row for row in self.explain(query, values) if row.table == alias]
+		self.assertTrue(plan, f"{alias} not in plan")
+		self.assertEqual(plan[0].key, index, f"{index} not chosen for: {query}")
+
+	def test_indexes_exist(self):
+		for index in ("employee_posting_date_index", "status_posting_date_index", "reports_to_status_index"):
+			self.assertTrue(frappe.db.has_index("tabAttendance Regularization", index), index)
+
+		columns = {
+			row.Column_name
+			for row in frappe.db.sql("SHOW INDEX FROM `tabAttendance Regularization Item`", as_dict=True)
+		}
+		self.assertIn("employee_checkin", columns)
+
+	def test_employee_day_lookup(self):
+		# create_or_update_attendance_regularization, consolidation, the report joins
+		self.assertUsesIndex(
+			"""SELECT name, docstatus FROM `tabAttendance Regularization` ar
+			WHERE employee = %s AND posting_date = %s AND docstatus != 2""",
+			"ar",
+			"employee_posting_date_index",
+			("_T-EMP-0001", "2025-01-01"),
+		)
+
+	def test_status_queue(self):
+		# dashboard pending regularizations
+		self.assertUsesIndex(
+			"""SELECT name FROM `tabAttendance Regularization` ar
+			WHERE status = 'Pending' ORDER BY posting_date DESC LIMIT 10""",
+			"ar",
+			"status_posting_date_index",
+		)
+
+	def test_manager_queue(self):
+		self.assertUsesIndex(
+			"""SELECT name FROM `tabAttendance Regularization` ar
+			WHERE reports_to = %s AND status = 'Pending'""",
+			"ar",
+			"reports_to_status_index",
+			("_T-EMP-0002",),
+		)
+
+	def test_item_by_checkin(self):
+		self.assertUsesIndex(
+			"""SELECT parent FROM `tabAttendance Regularization Item` ari
+			WHERE employee_checkin = %s""",
+			"ari",
+			"employee_checkin",
+			("_T-CHECKIN-0001",),
+		)
@@ -0,0 +1,41 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+from unittest.mock import patch
+
+import frappe
+from frappe.utils import add_days, getdate
+
+from hamptons.hamptons import dashboard_api
+from hamptons.hamptons.dashboard_cache import bump_generations, get_checkin_scopes
+
+
+class TestCheckinDashboardCache(unittest.TestCase):
+	"""A punch must only invalidate the dashboard of its own date"""
+
+	def setUp(self):
+		if not frappe.db.exists("DocType", "Attendance Regularization"):
+			self.skipTest("Attendance Regularization is not installed")
+
+		self.today = getdate()
+		self.yesterday = add_days(self.today, -1)
+
+	def test_punch_today_keeps_past_date_cached(self):
+		with patch.object(
+			dashboard_api,
+			"get_checkin_dashboard_day_data",
+			wraps=dashboard_api.get_checkin_dashboard_day_data,
+		) as builder:
+			dashboard_api.get_checkin_dashboard_data(self.yesterday)
+			dashboard_api.get_checkin_dashboard_data(self.today)
+			builder.reset_mock()
+
+			# What the commit hook of a checkin punched today bumps
+			bump_generations(get_checkin_scopes(self.today))
+
+			dashboard_api.get_checkin_dashboard_data(self.yesterday)
+			builder.assert_not_called()
+
+			dashboard_api.get_checkin_dashboard_data(self.today)
+			builder.assert_called_once_with(self.today)
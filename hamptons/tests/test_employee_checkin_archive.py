@@ -0,0 +1,140 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import add_days, add_months, get_first_day, getdate
+
+from hamptons.hamptons.doctype.employee_checkin_archive.employee_checkin_archive import (
+	ARCHIVE_BOUNDARY_KEY,
+	archive_checkins,
+	get_checkin_source,
+)
+from hamptons.tests.utils import make_employee
+
+
+class TestEmployeeCheckinSource(unittest.TestCase):
+	"""Both branches of the archive union must read their range from an index"""
+
+	def setUp(self):
+		self.boundary = get_first_day(add_months(getdate(), -1))
+		frappe.db.set_default(ARCHIVE_BOUNDARY_KEY, str(self.boundary))
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def explain_branches(self, from_date, conditions, values, **kwargs):
+		plan = frappe.db.sql(
+			f"EXPLAIN SELECT ec.name FROM {get_checkin_source(from_date, conditions, **kwargs)} ec WHERE {conditions}",
+			values,
+			as_dict=True,
+		)
+		# The derived table itself is listed as <derived2>; the branches keep the alias
+		return [row for row in plan if row.table == "ec"]
+
+	def assertBranchesUseIndex(self, branches, index):
+		self.assertEqual(len(branches), 2, "expected one branch per table")
+		for branch in branches:
+			self.assertEqual(branch.key, index, f"branch {branch.id} reads with {branch.key}")
+
+	def test_hot_table_only_after_boundary(self):
+		self.assertEqual(get_checkin_source(self.boundary), "`tabEmployee Checkin`")
+
+	def test_employee_range_uses_employee_time_index(self):
+		from_date = add_days(self.boundary, -10)
+		branches = self.explain_branches(
+			from_date,
+			"ec.employee = %(employee)s AND ec.time >= %(from_date)s AND ec.time < %(to_date)s",
+			{"employee": "_T-EMP-0001", "from_date": from_date, "to_date": add_days(self.boundary, 10)},
+		)
+		self.assertBranchesUseIndex(branches, "employee_time_index")
+
+	def test_keyset_page_reads_in_index_order(self):
+		from_date = add_days(self.boundary, -10)
+		branches = self.explain_branches(
+			from_date,
+			"ec.employee = %(employee)s AND ec.time >= %(from_date)s AND ec.time < %(to_date)s",
+			{
+				"employee": "_T-EMP-0001",
+				"from_date": from_date,
+				"to_date": add_days(self.boundary, 10),
+				"limit": 100,
+			},
+			order_by="ec.time DESC, ec.name DESC",
+			limit="%(limit)s",
+		)
+		self.assertBranchesUseIndex(branches, "employee_time_index")
+		for branch in branches:
+			self.assertNotIn("filesort", branch.Extra or "", "page must not sort the whole range")
+
+
+class TestArchiveCheckins(unittest.TestCase):
+	"""Archived checkins must change table without getting lost to the readers"""
+
+	def setUp(self):
+		# archive_checkins commits, so the test works on a month no site data is in
+		self.previous_boundary = frappe.db.get_default(ARCHIVE_BOUNDARY_KEY)
+		frappe.defaults.clear_default(ARCHIVE_BOUNDARY_KEY)
+		self.boundary = getdate("2001-02-01")
+
+		self.employee = make_employee("_Test Checkin Archive")
+		self.checkins = []
+		for punch_time in ("2001-01-15 08:00:00", "2001-01-31 23:59:59", "2001-02-01 00:00:00"):
+			checkin = frappe.get_doc(
+				{
+					"doctype": "Employee Checkin",
+					"employee": self.employee,
+					"time": punch_time,
+					"log_type": "IN",
+					"skip_auto_attendance": 1,
+				}
+			)
+			checkin.db_insert()
+			self.checkins.append(checkin.name)
+		frappe.db.commit()
+
+	def tearDown(self):
+		frappe.db.rollback()
+		frappe.db.delete("Employee Checkin", {"employee": self.employee})
+		frappe.db.delete("Employee Checkin Archive", {"employee": self.employee})
+		if self.previous_boundary:
+			frappe.db.set_default(ARCHIVE_BOUNDARY_KEY, self.previous_boundary)
+		else:
+			frappe.defaults.clear_default(ARCHIVE_BOUNDARY_KEY)
+		frappe.db.commit()
+
+	def names(self, doctype):
+		return set(frappe.get_all(doctype, filters={"employee": self.employee}, pluck="name"))
+
+	def test_rows_move_across_the_boundary(self):
+		archive_checkins(self.boundary)
+
+		self.assertEqual(self.names("Employee Checkin"), {self.checkins[2]})
+		self.assertEqual(self.names("Employee Checkin Archive"), set(self.checkins[:2]))
+
+		conditions = "ec.employee = %(employee)s AND ec.time >= %(from_date)s AND ec.time < %(to_date)s"
+		rows = frappe.db.sql(
+			f"""
+			SELECT ec.name
+			FROM {get_checkin_source(getdate("2001-01-01"), conditions)} ec
+			WHERE {conditions}
+			ORDER BY ec.time
+			""",
+			{"employee": self.employee, "from_date": getdate("2001-01-01"), "to_date": getdate("2001-03-01")},
+			pluck=True,
+		)
+		self.assertEqual(rows, self.checkins)
+
+	def test_name_collision_keeps_the_hot_row(self):
+		frappe.db.sql(
+			"INSERT INTO `tabEmployee Checkin Archive` (name, employee, time) VALUES (%s, %s, %s)",
+			(self.checkins[0], self.employee, "2000-12-31 08:00:00"),
+		)
+		frappe.db.commit()
+
+		with self.assertRaises(Exception):
+			archive_checkins(self.boundary)
+		frappe.db.rollback()
+
+		self.assertIn(self.checkins[0], self.names("Employee Checkin"))
@@ -0,0 +1,228 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import add_days, getdate
+
+from hamptons.hamptons.report.employee_checkin_report.employee_checkin_report import (
+	get_checkin_data,
+	get_summary_data,
+)
+from hamptons.tests.utils import make_employee, make_shift_assignment
+
+TEST_SHIFT = "_Test Checkin Report Shift"
+
+# The query get_checkin_data replaced, kept as the reference for the golden output
+LEGACY_QUERY = """
+	SELECT
+		DATE(ec.time) as date,
+		ec.employee,
+		ec.employee_name,
+		emp.department,
+		emp.designation,
+		sa.shift_type as shift,
+		st.start_time as shift_start,
+		st.end_time as shift_end,
+		MIN(ec.time) as first_in,
+		MAX(CASE WHEN ec.log_type = 'OUT' THEN ec.time
+			ELSE (
+				SELECT MAX(ec2.time)
+				FROM `tabEmployee Checkin` ec2
+				WHERE ec2.employee = ec.employee
+					AND DATE(ec2.time) = DATE(ec.time)
+			)
+		END) as last_out,
+		COUNT(*) as total_checkins,
+		GROUP_CONCAT(DISTINCT ec.device_id ORDER BY ec.time SEPARATOR ', ') as device_id,
+		ar.name as regularization,
+		ar.status as regularization_status
+	FROM `tabEmployee Checkin` ec
+	LEFT JOIN `tabEmployee` emp ON emp.name = ec.employee
+	LEFT JOIN `tabShift Assignment` sa ON sa.employee = ec.employee
+		AND sa.docstatus = 1
+		AND sa.start_date <= DATE(ec.time)
+		AND (sa.end_date IS NULL OR sa.end_date >= DATE(ec.time))
+	LEFT JOIN `tabShift Type` st ON st.name = sa.shift_type
+	LEFT JOIN `tabAttendance Regularization` ar ON ar.employee = ec.employee
+		AND ar.posting_date = DATE(ec.time)
+	WHERE DATE(ec.time) >= %(from_date)s AND DATE(ec.time) <= %(to_date)s {conditions}
+	GROUP BY DATE(ec.time), ec.employee
+	ORDER BY DATE(ec.time) DESC, ec.employee_name
+"""
+
+LEGACY_CONDITIONS = {
+	"employee": "ec.employee = %(employee)s",
+	"shift": "sa.shift_type = %(shift)s",
+	"log_type": "ec.log_type = %(log_type)s",
+	"device_id": "ec.device_id = %(device_id)s",
+	"show_only_late": """
+		EXISTS (
+			SELECT 1 FROM `tabEmployee Checkin` ec2
+			INNER JOIN `tabShift Assignment` sa2 ON sa2.employee = ec2.employee
+				AND sa2.docstatus = 1
+				AND sa2.start_date <= DATE(ec2.time)
+				AND (sa2.end_date IS NULL OR sa2.end_date >= DATE(ec2.time))
+			INNER JOIN `tabShift Type` st2 ON st2.name = sa2.shift_type
+			WHERE ec2.employee = ec.employee
+				AND DATE(ec2.time) = DATE(ec.time)
+				AND ec2.log_type = 'IN'
+				AND TIME(ec2.time) > st2.start_time
+		)
+	""",
+	"show_only_with_regularization": "ar.name IS NOT NULL",
+}
+
+
+class TestEmployeeCheckinReport(unittest.TestCase):
+	"""The single pass check-in query and the summary query must return the rows of the legacy query"""
+
+	def setUp(self):
+		self.to_date = getdate(add_days(getdate(), -2))
+		self.from_date = add_days(self.to_date, -2)
+
+		if not frappe.db.exists("Shift Type", TEST_SHIFT):
+			frappe.get_doc(
+				{
+					"doctype": "Shift Type",
+					"name": TEST_SHIFT,
+					"start_time": "08:00:00",
+					"end_time": "17:00:00",
+				}
+			).insert(ignore_permissions=True)
+
+		# Punches per day offset: regular day, late IN, IN only, OUT only, unknown log type
+		punches = {
+			"Regular": [
+				("07:55:00", "IN", "GATE-A"),
+				("12:00:00", "OUT", "GATE-A"),
+				("12:40:00", "IN", "GATE-B"),
+				("17:05:00", "OUT", "GATE-B"),
+			],
+			"Late": [("08:30:00", "IN", "GATE-A"), ("17:10:00", "OUT", None)],
+			"In Only": [("07:50:00", "IN", "GATE-B"), ("16:00:00", "IN", "GATE-B")],
+			"Out Only": [("09:00:00", "OUT", "GATE-A"), ("18:00:00", "OUT", "GATE-C")],
+			"No Shift": [("10:00:00", None, None), ("15:00:00", "OUT", "GATE-C")],
+		}
+
+		self.employees = {}
+		for label, day_punches in punches.items():
+			employee_name = f"_Test Report {label}"
+			employee = make_employee(employee_name)
+			self.employees[label] = employee
+			if label != "No Shift":
+				make_shift_assignment(employee, TEST_SHIFT, self.from_date, add_days(self.to_date, 1))
+
+			for offset in range(3):
+				date = add_days(self.from_date, offset)
+				# Skip a day to have gaps in the range
+				if label == "Late" and offset == 1:
+					continue
+				for punch_time, log_type, device_id in day_punches:
+					frappe.get_doc(
+						{
+							"doctype": "Employee Checkin",
+							"employee": employee,
+							"employee_name": employee_name,
+							"time": f"{date} {punch_time}",
+							"log_type": log_type,
+							"device_id": device_id,
+							"skip_auto_attendance": 1,
+						}
+					).db_insert()
+
+			# Punches outside the range must not leak into the edge days
+			frappe.get_doc(
+				{
+					"doctype": "Employee Checkin",
+					"employee": employee,
+					"employee_name": employee_name,
+					"time": f"{add_days(self.to_date, 1)} 00:00:00",
+					"log_type": "IN",
+					"skip_auto_attendance": 1,
+				}
+			).db_insert()
+
+		for label in ("Late", "In Only"):
+			frappe.get_doc(
+				{
+					"doctype": "Attendance Regularization",
+					"employee": self.employees[label],
+					"posting_date": self.from_date,
+					"status": "Open",
+				}
+			).db_insert()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def legacy_rows(self, filters):
+		conditions = "".join(
+			f" AND {LEGACY_CONDITIONS[key]}" for key in LEGACY_CONDITIONS if filters.get(key)
+		)
+		return frappe.db.sql(LEGACY_QUERY.format(conditions=conditions), filters, as_dict=1)
+
+	def rows(self, get_data, filters):
+		employees = set(self.employees.values())
+		return [row for row in get_data(filters) if row.employee in employees]
+
+	def assertSameRows(self, get_data=get_checkin_data, **extra_filters):
+		filters = frappe._dict(from_date=self.from_date, to_date=self.to_date, **extra_filters)
+
+		expected = self.rows(self.legacy_rows, filters)
+		actual = self.rows(get_data, filters)
+
+		self.assertTrue(expected or extra_filters, "synthetic dataset produced no rows")
+		self.assertEqual(actual, expected, f"filters: {extra_filters}")
+
+	def test_matches_legacy_query(self):
+		self.assertSameRows()
+
+	def test_matches_legacy_query_with_punch_filters(self):
+		self.assertSameRows(log_type="IN")
+		self.assertSameRows(log_type="OUT")
+		self.assertSameRows(device_id="GATE-B")
+		self.assertSameRows(log_type="OUT", device_id="GATE-A")
+
+	def test_matches_legacy_query_with_day_filters(self):
+		self.assertSameRows(show_only_late=1)
+		self.assertSameRows(show_only_late=1, log_type="OUT")
+		self.assertSameRows(show_only_with_regularization=1)
+		self.assertSameRows(shift=TEST_SHIFT)
+		self.assertSameRows(employee=self.employees["In Only"])
+
+	def test_summary_matches_legacy_query(self):
+		self.assertSameRows(get_summary_data)
+		self.assertSameRows(get_summary_data, show_only_with_regularization=1)
+		self.assertSameRows(get_summary_data, shift=TEST_SHIFT)
+		self.assertSameRows(get_summary_data, employee=self.employees["Late"])
+
+	def test_one_row_per_employee_day(self):
+		# An overlapping shift assignment and a cancelled next to a new regularization
+		frappe.get_doc(
+			{
+				"doctype": "Shift Assignment",
+				"employee": self.employees["Regular"],
+				"shift_type": TEST_SHIFT,
+				"start_date": self.from_date,
+				"end_date": self.to_date,
+				"docstatus": 1,
+			}
+		).db_insert()
+		frappe.get_doc(
+			{
+				"doctype": "Attendance Regularization",
+				"employee": self.employees["Late"],
+				"posting_date": self.from_date,
+				"status": "Open",
+				"docstatus": 2,
+			}
+		).db_insert()
+
+		filters = frappe._dict(from_date=self.from_date, to_date=self.to_date)
+		for get_data in (get_checkin_data, get_summary_data):
+			days = [(row.date, row.employee) for row in self.rows(get_data, filters)]
+			self.assertEqual(len(days), len(set(days)), get_data.__name__)
+			# Five employees over three days, one of them skipped
+			self.assertEqual(len(days), 14, get_data.__name__)
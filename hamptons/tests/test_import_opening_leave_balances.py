@@ -0,0 +1,85 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+import unittest
+
+import frappe
+from frappe.utils import getdate
+
+from hamptons.import_opening_leave_balances import diff_leave_allocations, process_leave_allocations
+from hamptons.tests.utils import make_employee
+
+TEST_LEAVE_TYPE = "_Test Opening Leave"
+
+
+class TestLeaveAllocationReconciliation(unittest.TestCase):
+	"""Re-running the allocation must amend changed allocations and leave the rest alone"""
+
+	def setUp(self):
+		self.from_date = getdate("2030-01-01")
+		self.to_date = getdate("2030-12-31")
+
+		if not frappe.db.exists("Leave Type", TEST_LEAVE_TYPE):
+			frappe.get_doc(
+				{"doctype": "Leave Type", "leave_type_name": TEST_LEAVE_TYPE, "max_leaves_allowed": 30}
+			).insert(ignore_permissions=True)
+
+		self.employee = make_employee("_Test Opening Balance")
+		frappe.db.commit()
+
+	def tearDown(self):
+		# process_leave_allocations commits per chunk
+		allocations = frappe.get_all(
+			"Leave Allocation",
+			filters={"employee": self.employee, "leave_type": TEST_LEAVE_TYPE},
+			pluck="name",
+		)
+		if allocations:
+			frappe.db.delete("Leave Ledger Entry", {"transaction_name": ["in", allocations]})
+			frappe.db.delete("Leave Allocation", {"name": ["in", allocations]})
+		frappe.db.commit()
+
+	def target(self, leaves):
+		return frappe._dict(
+			employee=self.employee,
+			leave_type=TEST_LEAVE_TYPE,
+			new_leaves_allocated=leaves,
+			description="Opening balance",
+			carry_forward=0,
+		)
+
+	def allocations(self):
+		return frappe.get_all(
+			"Leave Allocation",
+			filters={"employee": self.employee, "leave_type": TEST_LEAVE_TYPE},
+			fields=["name", "docstatus", "new_leaves_allocated", "amended_from"],
+			order_by="creation",
+		)
+
+	def test_changed_balance_amends_submitted_allocation(self):
+		result = process_leave_allocations([self.target(10)], self.from_date, self.to_date)
+		self.assertEqual(result["allocations_created"], 1)
+		original = self.allocations()[0]
+		self.assertEqual(original.docstatus, 1)
+
+		result = process_leave_allocations([self.target(12)], self.from_date, self.to_date)
+		self.assertEqual(result["allocations_updated"], 1)
+		self.assertEqual(result["allocations_failed"], 0)
+
+		cancelled, amended = self.allocations()
+		self.assertEqual(cancelled.name, original.name)
+		self.assertEqual(cancelled.docstatus, 2)
+		self.assertEqual(amended.docstatus, 1)
+		self.assertEqual(amended.amended_from, original.name)
+		self.assertEqual(amended.new_leaves_allocated, 12)
+
+	def test_unchanged_balance_is_not_touched(self):
+		process_leave_allocations([self.target(10)], self.from_date, self.to_date)
+		before = self.allocations()
+
+		diff = diff_leave_allocations([self.target(10)], self.from_date, self.to_date)
+		self.assertEqual((len(diff.create), len(diff.update), len(diff.unchanged)), (0, 0, 1))
+
+		result = process_leave_allocations([self.target(10)], self.from_date, self.to_date)
+		self.assertEqual(result["allocations_unchanged"], 1)
+		self.assertEqual(self.allocations(), before)
@@ -0,0 +1,45 @@
+# Copyright (c) 2025, Hamptons and contributors
+# For license information, please see license.txt
+
+"""Record factories shared by the Hamptons tests"""
+
+import frappe
+
+
+def make_employee(employee_name, **fields):
+	"""The Active employee named `employee_name`, created when missing"""
+	name = frappe.db.get_value("Employee", {"employee_name": employee_name})
+	if name:
+		return name
+
+	employee = frappe.get_doc(
+		{
+			"doctype": "Employee",
+			"first_name": employee_name,
+			"gender": "Male",
+			"date_of_birth": "1990-01-01",
+			"date_of_joining": "2020-01-01",
+			"company": frappe.defaults.get_user_default("Company"),
+			"status": "Active",
+			**fields,
+		}
+	)
+	employee.insert(ignore_permissions=True)
+	return employee.name
+
+
+def make_shift_assignment(employee, shift_type, start_date, end_date):
+	"""Submit a Shift Assignment of `shift_type` for the employee"""
+	assignment = frappe.get_doc(
+		{
+			"doctype": "Shift Assignment",
+			"employee": employee,
+			"shift_type": shift_type,
+			"company": frappe.defaults.get_user_default("Company"),
+			"start_date": start_date,
+			"end_date": end_date,
+		}
+	)
+	assignment.insert(ignore_permissions=True)
+	assignment.submit()
+	return assignment.name
@@ -1,45 +1,120 @@
 # Copyright (c) 2024, sammish and contributors
 # For license information, please see license.txt
 
-import frappe
-from frappe.utils import now_datetime, add_days
+import time
 from datetime import timedelta
 
+import frappe
+from frappe.utils import add_days, cint, now_datetime
+
+# Retention in days of the purged doctypes; CrossChex Log follows Crosschex Settings
+LOG_RETENTION_DAYS = {
+	"Error Log": 15,
+	"Deleted Document": 15
+}
+PURGE_CHUNK_SIZE = 1000
+# Pause between chunks so replicas keep up and other writers get the locks
+PURGE_SLEEP_SECONDS = 0.5
+# cleanup_old_logs is a cron event on the default queue, whose jobs are killed after
+# 300 seconds; stop well before that and leave the rest to the next run
+PURGE_TIME_BUDGET = 4 * 60
+
+
+def get_retention_policy():
+	"""
+	Days of records kept per purged doctype.
+
+	Returns:
+		dict: Doctype to retention in days
+	"""
+	policy = dict(LOG_RETENTION_DAYS)
+	policy["CrossChex Log"] = cint(
+		frappe.db.get_single_value("Crosschex Settings", "log_retention_days")
+	) or 30
+	return policy
+
+
+def purge_old_records(doctype, cutoff_date, chunk_size=PURGE_CHUNK_SIZE,
+		sleep_seconds=PURGE_SLEEP_SECONDS, deadline=None):
+	"""
+	Delete the records of a doctype created before the cutoff date, oldest first.
+
+	Each chunk is one `DELETE ... ORDER BY creation LIMIT` on the creation index,
+	committed on its own, so memory stays flat and locks are short whatever the number
+	of rows. Stops when nothing older is left or the deadline has passed; the rest is
+	picked up by the next run.
+
+	Args:
+		doctype: Doctype to purge
+		cutoff_date: Records created before this datetime are deleted
+		chunk_size: Rows deleted per statement
+		sleep_seconds: Pause between chunks
+		deadline: time.monotonic() value after which no new chunk is started
+
+	Returns:
+		int: Number of records deleted
+	"""
+	if not frappe.db.table_exists(doctype):
+		return 0
+
+	deleted = 0
+	while True:
+		frappe.db.sql(
+			f"DELETE FROM `tab{doctype}` WHERE creation < %s ORDER BY creation LIMIT %s",
+			(cutoff_date, chunk_size)
+		)
+		count = frappe.db._cursor.rowcount
+		frappe.db.commit()
+		deleted += count
+
+		if count < chunk_size or (deadline and time.monotonic() >= deadline):
+			break
+
+		time.sleep(sleep_seconds)
 
-def cleanup_old_logs():
+	if deleted:
+		frappe.logger().info(f"Deleted {deleted} {doctype} records older than {cutoff_date}")
+
+	return deleted
+
+
+def cleanup_old_logs(time_budget=PURGE_TIME_BUDGET):
 	"""
-	Delete error logs and deleted files older than 15 days.
+	Purge Error Logs, Deleted Documents and CrossChex Logs past their retention.
 	This function is called by the scheduler every 5 days.
-	
+
+	Args:
+		time_budget: Seconds the whole purge may run before it stops
+
 	Returns:
 		dict: Result containing success status, counts, and cutoff date
 	"""
 	try:
-		cutoff_date = add_days(now_datetime(), -15)
-		
-		# Delete old Error Logs
-		error_logs_deleted = delete_old_error_logs(cutoff_date)
-		
-		# Delete old Deleted Documents
-		deleted_docs_removed = delete_old_deleted_documents(cutoff_date)
-		
-		# Commit the changes
-		frappe.db.commit()
-		
+		deadline = time.monotonic() + time_budget
+		deleted = {}
+
+		for doctype, days in get_retention_policy().items():
+			if time.monotonic() >= deadline:
+				break
+			deleted[doctype] = purge_old_records(
+				doctype, add_days(now_datetime(), -days), deadline=deadline
+			)
+
 		# Log the cleanup activity
 		frappe.logger().info(
-			f"Cleanup completed: {error_logs_deleted} error logs and {deleted_docs_removed} deleted documents removed"
+			"Cleanup completed: " + ", ".join(f"{count} {doctype}" for doctype, count in deleted.items())
 		)
-		
+
 		return {
 			"success": True,
-			"error_logs_deleted": error_logs_deleted,
-			"deleted_documents_removed": deleted_docs_removed,
-			"cutoff_date": cutoff_date
+			"error_logs_deleted": deleted.get("Error Log", 0),
+			"deleted_documents_removed": deleted.get("Deleted Document", 0),
+			"crosschex_logs_deleted": deleted.get("CrossChex Log", 0),
+			"cutoff_date": add_days(now_datetime(), -LOG_RETENTION_DAYS["Error Log"])
 		}
-		
+
 	except Exception as e:
-		frappe.logger().error(f"Error during cleanup: {str(e)}")
+		frappe.logger().error(f"Error during cleanup: {e!s}")
 		frappe.log_error(
 			message=str(e),
 			title="Cleanup Old Logs Error"
@@ -53,87 +128,27 @@ def cleanup_old_logs():
 def delete_old_error_logs(cutoff_date):
 	"""
 	Delete Error Log entries older than the cutoff date.
-	
+
 	Args:
 		cutoff_date: datetime object representing the cutoff date
-	
+
 	Returns:
 		int: Number of error logs deleted
 	"""
-	try:
-		# Get count before deletion
-		old_logs = frappe.db.sql("""
-			SELECT name 
-			FROM `tabError Log`
-			WHERE creation < %s
-		""", (cutoff_date,), as_dict=1)
-		
-		count = len(old_logs)
-		
-		if count > 0:
-			# Delete in batches to avoid long-running queries
-			batch_size = 500
-			for i in range(0, count, batch_size):
-				batch = old_logs[i:i+batch_size]
-				names = [log.name for log in batch]
-				
-				frappe.db.sql("""
-					DELETE FROM `tabError Log`
-					WHERE name IN ({})
-				""".format(','.join(['%s'] * len(names))), tuple(names))
-				
-				frappe.db.commit()
-			
-			frappe.logger().info(f"Deleted {count} error logs older than {cutoff_date}")
-		
-		return count
-		
-	except Exception as e:
-		frappe.logger().error(f"Error deleting old error logs: {str(e)}")
-		raise
+	return purge_old_records("Error Log", cutoff_date, deadline=time.monotonic() + PURGE_TIME_BUDGET)
 
 
 def delete_old_deleted_documents(cutoff_date):
 	"""
 	Delete Deleted Document entries older than the cutoff date.
-	
+
 	Args:
 		cutoff_date: datetime object representing the cutoff date
-	
+
 	Returns:
 		int: Number of deleted documents removed
 	"""
-	try:
-		# Get count before deletion
-		old_deleted_docs = frappe.db.sql("""
-			SELECT name 
-			FROM `tabDeleted Document`
-			WHERE creation < %s
-		""", (cutoff_date,), as_dict=1)
-		
-		count = len(old_deleted_docs)
-		
-		if count > 0:
-			# Delete in batches to avoid long-running queries
-			batch_size = 500
-			for i in range(0, count, batch_size):
-				batch = old_deleted_docs[i:i+batch_size]
-				names = [doc.name for doc in batch]
-				
-				frappe.db.sql("""
-					DELETE FROM `tabDeleted Document`
-					WHERE name IN ({})
-				""".format(','.join(['%s'] * len(names))), tuple(names))
-				
-				frappe.db.commit()
-			
-			frappe.logger().info(f"Deleted {count} deleted documents older than {cutoff_date}")
-		
-		return count
-		
-	except Exception as e:
-		frappe.logger().error(f"Error deleting old deleted documents: {str(e)}")
-		raise
+	return purge_old_records("Deleted Document", cutoff_date, deadline=time.monotonic() + PURGE_TIME_BUDGET)
 
 
 @frappe.whitelist()
@@ -141,16 +156,16 @@ def manual_cleanup():
 	"""
 	Manual cleanup trigger that can be called from the UI.
 	Returns a user-friendly message about the cleanup results.
-	
+
 	Returns:
 		dict: Result with success status and message/error
 	"""
 	result = cleanup_old_logs()
-	
+
 	if result.get("success"):
 		return {
 			"success": True,
-			"message": f"Cleanup completed successfully. Removed {result['error_logs_deleted']} error logs and {result['deleted_documents_removed']} deleted documents older than {result['cutoff_date'].strftime('%Y-%m-%d %H:%M:%S')}"
+			"message": f"Cleanup completed successfully. Removed {result['error_logs_deleted']} error logs and {result['deleted_documents_removed']} deleted documents older than {result['cutoff_date'].strftime('%Y-%m-%d %H:%M:%S')}, and {result['crosschex_logs_deleted']} CrossChex logs past their retention"
 		}
 	else:
 		return {
@@ -164,35 +179,35 @@ def delete_all_error_logs():
 	"""
 	Delete ALL error logs regardless of age.
 	Use with caution - this will remove all error logs from the system.
-	
+
 	Returns:
 		dict: Result with success status and count of deleted logs
 	"""
 	try:
 		# Get total count
 		total_count = frappe.db.count("Error Log")
-		
+
 		if total_count == 0:
 			return {
 				"success": True,
 				"message": "No error logs found to delete",
 				"count": 0
 			}
-		
+
 		# Delete all error logs
 		frappe.db.sql("DELETE FROM `tabError Log`")
 		frappe.db.commit()
-		
+
 		frappe.logger().info(f"Deleted all {total_count} error logs")
-		
+
 		return {
 			"success": True,
 			"message": f"Successfully deleted all {total_count} error logs",
 			"count": total_count
 		}
-		
+
 	except Exception as e:
-		frappe.logger().error(f"Error deleting all error logs: {str(e)}")
+		frappe.logger().error(f"Error deleting all error logs: {e!s}")
 		frappe.log_error(
 			message=str(e),
 			title="Delete All Error Logs Error"
@@ -210,7 +225,7 @@ def test_crosschex_sync_for_hamptons3():
 	Returns detailed diagnostic information
 	"""
 	import json
-	
+
 	try:
 		# Get the API configuration
 		config = frappe.db.get_value(
@@ -219,27 +234,27 @@ def test_crosschex_sync_for_hamptons3():
 			["name", "configuration_name", "api_url", "api_key", "connection_status", "last_sync_time"],
 			as_dict=True
 		)
-		
+
 		if not config:
 			return {"success": False, "error": "Configuration not found for API Key 853cfe14ff50623d550056a72f829036"}
-		
+
 		# Check current checkin count
 		before_count = frappe.db.count("Employee Checkin")
-		
+
 		# Test the sync
 		from hamptons.hamptons.doctype.crosschex_settings.crosschex_settings import sync_individual_device
-		
+
 		result = sync_individual_device(
 			api_url=config['api_url'],
 			api_key=config['api_key'],
 			config_row_name=config['name'],
 			config_name=config['configuration_name']
 		)
-		
+
 		# Check new checkin count
 		after_count = frappe.db.count("Employee Checkin")
 		new_checkins = after_count - before_count
-		
+
 		# Get recent checkins
 		recent = frappe.db.sql("""
 			SELECT employee, employee_name, time, log_type, device_id
@@ -247,7 +262,7 @@ def test_crosschex_sync_for_hamptons3():
 			ORDER BY time DESC
 			LIMIT 5
 		""", as_dict=True)
-		
+
 		return {
 			"success": True,
 			"config": config,
@@ -259,7 +274,7 @@ def test_crosschex_sync_for_hamptons3():
 			},
 			"recent_checkins": recent
 		}
-		
+
 	except Exception as e:
 		frappe.log_error(
 			message=str(e),